@@ -0,0 +1,37 @@
+"""tasks archive
+
+Revision ID: 7c1e9a4d2b10
+Revises: 45f51c173683
+Create Date: 2026-10-19 09:12:31.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '7c1e9a4d2b10'
+down_revision = '45f51c173683'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tasks_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('text', sa.String(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('tags', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tasks_archive_owner_id'), 'tasks_archive', ['owner_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_tasks_archive_owner_id'), table_name='tasks_archive')
+    op.drop_table('tasks_archive')
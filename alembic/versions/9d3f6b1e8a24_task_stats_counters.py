@@ -0,0 +1,192 @@
+"""task stats counters
+
+Revision ID: 9d3f6b1e8a24
+Revises: 7c1e9a4d2b10
+Create Date: 2026-10-19 16:40:05.118273
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '9d3f6b1e8a24'
+down_revision = '7c1e9a4d2b10'
+branch_labels = None
+depends_on = None
+
+# The counter triggers as this revision created them.
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_stats_ai AFTER INSERT ON tasks BEGIN
+      INSERT INTO task_status_counts (owner_id, status, count) VALUES (NEW.owner_id, NEW.status, 1) ON CONFLICT (owner_id, status) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_tag_counts (owner_id, tag, count) SELECT NEW.owner_id, value, 1 FROM json_each(NEW.tags) WHERE true ON CONFLICT (owner_id, tag) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT NEW.owner_id, date(NEW.updated_at), 1 WHERE NEW.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_stats_au AFTER UPDATE OF status, tags, owner_id, updated_at ON tasks BEGIN
+      INSERT INTO task_status_counts (owner_id, status, count) VALUES (OLD.owner_id, OLD.status, -1) ON CONFLICT (owner_id, status) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_tag_counts (owner_id, tag, count) SELECT OLD.owner_id, value, -1 FROM json_each(OLD.tags) WHERE true ON CONFLICT (owner_id, tag) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT OLD.owner_id, date(OLD.updated_at), -1 WHERE OLD.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_status_counts (owner_id, status, count) VALUES (NEW.owner_id, NEW.status, 1) ON CONFLICT (owner_id, status) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_tag_counts (owner_id, tag, count) SELECT NEW.owner_id, value, 1 FROM json_each(NEW.tags) WHERE true ON CONFLICT (owner_id, tag) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT NEW.owner_id, date(NEW.updated_at), 1 WHERE NEW.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_stats_ad AFTER DELETE ON tasks BEGIN
+      INSERT INTO task_status_counts (owner_id, status, count) VALUES (OLD.owner_id, OLD.status, -1) ON CONFLICT (owner_id, status) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_tag_counts (owner_id, tag, count) SELECT OLD.owner_id, value, -1 FROM json_each(OLD.tags) WHERE true ON CONFLICT (owner_id, tag) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT OLD.owner_id, date(OLD.updated_at), -1 WHERE OLD.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_stats_ai AFTER INSERT ON tasks_archive BEGIN
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT NEW.owner_id, date(NEW.updated_at), 1 WHERE NEW.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_stats_au AFTER UPDATE OF status, owner_id, updated_at ON tasks_archive BEGIN
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT OLD.owner_id, date(OLD.updated_at), -1 WHERE OLD.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT NEW.owner_id, date(NEW.updated_at), 1 WHERE NEW.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_stats_ad AFTER DELETE ON tasks_archive BEGIN
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT OLD.owner_id, date(OLD.updated_at), -1 WHERE OLD.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+]
+
+POSTGRESQL_TRIGGERS = [
+    """
+    CREATE OR REPLACE FUNCTION task_stats_apply(p_owner integer, p_status text, p_tags json,
+                                                p_updated timestamptz, p_sign integer, p_hot boolean)
+    RETURNS void AS $$
+    BEGIN
+      IF p_hot THEN
+        INSERT INTO task_status_counts (owner_id, status, count) VALUES (p_owner, p_status, p_sign)
+          ON CONFLICT (owner_id, status) DO UPDATE SET count = task_status_counts.count + excluded.count;
+        INSERT INTO task_tag_counts (owner_id, tag, count)
+          SELECT p_owner, t, p_sign FROM json_array_elements_text(COALESCE(p_tags, '[]'::json)) AS t
+          ON CONFLICT (owner_id, tag) DO UPDATE SET count = task_tag_counts.count + excluded.count;
+      END IF;
+      IF p_status IN ('done', 'DONE') THEN
+        INSERT INTO task_daily_completions (owner_id, day, count)
+          VALUES (p_owner, (p_updated AT TIME ZONE 'UTC')::date, p_sign)
+          ON CONFLICT (owner_id, day) DO UPDATE SET count = task_daily_completions.count + excluded.count;
+      END IF;
+    END $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION tasks_stats_trigger() RETURNS trigger AS $$
+    BEGIN
+      IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM task_stats_apply(OLD.owner_id, OLD.status, OLD.tags, OLD.updated_at, -1, true);
+      END IF;
+      IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM task_stats_apply(NEW.owner_id, NEW.status, NEW.tags, NEW.updated_at, 1, true);
+      END IF;
+      RETURN NULL;
+    END $$ LANGUAGE plpgsql
+    """,
+    """
+    DROP TRIGGER IF EXISTS tasks_stats ON tasks
+    """,
+    """
+    CREATE TRIGGER tasks_stats AFTER INSERT OR UPDATE OR DELETE ON tasks FOR EACH ROW EXECUTE FUNCTION tasks_stats_trigger()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION tasks_archive_stats_trigger() RETURNS trigger AS $$
+    BEGIN
+      IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM task_stats_apply(OLD.owner_id, OLD.status, OLD.tags, OLD.updated_at, -1, false);
+      END IF;
+      IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM task_stats_apply(NEW.owner_id, NEW.status, NEW.tags, NEW.updated_at, 1, false);
+      END IF;
+      RETURN NULL;
+    END $$ LANGUAGE plpgsql
+    """,
+    """
+    DROP TRIGGER IF EXISTS tasks_archive_stats ON tasks_archive
+    """,
+    """
+    CREATE TRIGGER tasks_archive_stats AFTER INSERT OR UPDATE OR DELETE ON tasks_archive FOR EACH ROW EXECUTE FUNCTION tasks_archive_stats_trigger()
+    """,
+]
+
+# Backfill the counters from the existing tasks, as `python -m tasklist_app.stats --rebuild` did then.
+SQLITE_BACKFILL = [
+    "INSERT INTO task_status_counts (owner_id, status, count) "
+    "SELECT owner_id, status, count(*) FROM tasks GROUP BY owner_id, status",
+    "INSERT INTO task_tag_counts (owner_id, tag, count) "
+    "SELECT tasks.owner_id, t.value, count(*) FROM tasks JOIN json_each(tasks.tags) AS t "
+    "GROUP BY tasks.owner_id, t.value",
+    "INSERT INTO task_daily_completions (owner_id, day, count) "
+    "SELECT owner_id, day, count(*) FROM ("
+    "SELECT owner_id, date(updated_at) AS day FROM tasks WHERE status IN ('done', 'DONE') "
+    "UNION ALL SELECT owner_id, date(updated_at) FROM tasks_archive WHERE status IN ('done', 'DONE')"
+    ") AS done GROUP BY owner_id, day",
+]
+
+POSTGRESQL_BACKFILL = [
+    "INSERT INTO task_status_counts (owner_id, status, count) "
+    "SELECT owner_id, status, count(*) FROM tasks GROUP BY owner_id, status",
+    "INSERT INTO task_tag_counts (owner_id, tag, count) "
+    "SELECT tasks.owner_id, t.value, count(*) "
+    "FROM tasks CROSS JOIN LATERAL json_array_elements_text(tasks.tags) AS t(value) "
+    "GROUP BY tasks.owner_id, t.value",
+    "INSERT INTO task_daily_completions (owner_id, day, count) "
+    "SELECT owner_id, day, count(*) FROM ("
+    "SELECT owner_id, (updated_at AT TIME ZONE 'UTC')::date AS day FROM tasks WHERE status IN ('done', 'DONE') "
+    "UNION ALL SELECT owner_id, (updated_at AT TIME ZONE 'UTC')::date FROM tasks_archive "
+    "WHERE status IN ('done', 'DONE')"
+    ") AS done GROUP BY owner_id, day",
+]
+
+
+def upgrade():
+    op.create_table('task_status_counts',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id', 'status')
+    )
+    op.create_table('task_tag_counts',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('tag', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id', 'tag')
+    )
+    op.create_table('task_daily_completions',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id', 'day')
+    )
+    statements = {
+        'sqlite': SQLITE_TRIGGERS + SQLITE_BACKFILL,
+        'postgresql': POSTGRESQL_TRIGGERS + POSTGRESQL_BACKFILL,
+    }
+    for statement in statements.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def downgrade():
+    bind = op.get_bind()
+    for table in ('tasks', 'tasks_archive'):
+        if bind.dialect.name == 'postgresql':
+            op.execute(f'DROP TRIGGER IF EXISTS {table}_stats ON {table}')
+            op.execute(f'DROP FUNCTION IF EXISTS {table}_stats_trigger()')
+        else:
+            for suffix in ('ai', 'au', 'ad'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_stats_{suffix}')
+    if bind.dialect.name == 'postgresql':
+        op.execute('DROP FUNCTION IF EXISTS task_stats_apply(integer, text, json, timestamptz, integer, boolean)')
+    op.drop_table('task_daily_completions')
+    op.drop_table('task_tag_counts')
+    op.drop_table('task_status_counts')
@@ -0,0 +1,41 @@
+"""admin list indexes
+
+Revision ID: b4c7e2a91f05
+Revises: 9d3f6b1e8a24
+Create Date: 2026-10-19 18:12:47.530918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b4c7e2a91f05'
+down_revision = '9d3f6b1e8a24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_tasks_created_at_id', 'tasks', ['created_at', 'id'], unique=False)
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    op.create_index('ix_users_email_pattern', 'users', ['email'], unique=False,
+                    postgresql_ops={'email': 'text_pattern_ops'})
+    # Trigram index for the admin's `text ILIKE '%term%'`; needs the pg_trgm extension,
+    # which may require privileges the migration role lacks. Without it the search
+    # still works, bounded by ADMIN_STATEMENT_TIMEOUT_SECONDS.
+    with bind.begin_nested() as savepoint:
+        try:
+            op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        except sa.exc.DBAPIError:
+            savepoint.rollback()
+            return
+    op.execute('CREATE INDEX ix_tasks_text_trgm ON tasks USING gin (text gin_trgm_ops)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_tasks_text_trgm')
+        op.drop_index('ix_users_email_pattern', table_name='users')
+    op.drop_index('ix_tasks_created_at_id', table_name='tasks')
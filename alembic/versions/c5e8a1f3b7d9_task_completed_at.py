@@ -0,0 +1,260 @@
+"""task completed_at
+
+Revision ID: c5e8a1f3b7d9
+Revises: b4c7e2a91f05
+Create Date: 2026-10-19 21:04:12.660514
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c5e8a1f3b7d9'
+down_revision = 'b4c7e2a91f05'
+branch_labels = None
+depends_on = None
+
+# Daily completions move from the day of `updated_at` to the day of `completed_at`
+# (falling back to `updated_at` for done rows written without it).
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_stats_ai AFTER INSERT ON tasks BEGIN
+      INSERT INTO task_status_counts (owner_id, status, count) VALUES (NEW.owner_id, NEW.status, 1) ON CONFLICT (owner_id, status) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_tag_counts (owner_id, tag, count) SELECT NEW.owner_id, value, 1 FROM json_each(NEW.tags) WHERE true ON CONFLICT (owner_id, tag) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT NEW.owner_id, date(COALESCE(NEW.completed_at, NEW.updated_at)), 1 WHERE NEW.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_stats_au AFTER UPDATE OF status, tags, owner_id, updated_at, completed_at ON tasks BEGIN
+      INSERT INTO task_status_counts (owner_id, status, count) VALUES (OLD.owner_id, OLD.status, -1) ON CONFLICT (owner_id, status) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_tag_counts (owner_id, tag, count) SELECT OLD.owner_id, value, -1 FROM json_each(OLD.tags) WHERE true ON CONFLICT (owner_id, tag) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT OLD.owner_id, date(COALESCE(OLD.completed_at, OLD.updated_at)), -1 WHERE OLD.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_status_counts (owner_id, status, count) VALUES (NEW.owner_id, NEW.status, 1) ON CONFLICT (owner_id, status) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_tag_counts (owner_id, tag, count) SELECT NEW.owner_id, value, 1 FROM json_each(NEW.tags) WHERE true ON CONFLICT (owner_id, tag) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT NEW.owner_id, date(COALESCE(NEW.completed_at, NEW.updated_at)), 1 WHERE NEW.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_stats_ad AFTER DELETE ON tasks BEGIN
+      INSERT INTO task_status_counts (owner_id, status, count) VALUES (OLD.owner_id, OLD.status, -1) ON CONFLICT (owner_id, status) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_tag_counts (owner_id, tag, count) SELECT OLD.owner_id, value, -1 FROM json_each(OLD.tags) WHERE true ON CONFLICT (owner_id, tag) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT OLD.owner_id, date(COALESCE(OLD.completed_at, OLD.updated_at)), -1 WHERE OLD.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_stats_ai AFTER INSERT ON tasks_archive BEGIN
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT NEW.owner_id, date(COALESCE(NEW.completed_at, NEW.updated_at)), 1 WHERE NEW.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_stats_au AFTER UPDATE OF status, owner_id, updated_at, completed_at ON tasks_archive BEGIN
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT OLD.owner_id, date(COALESCE(OLD.completed_at, OLD.updated_at)), -1 WHERE OLD.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT NEW.owner_id, date(COALESCE(NEW.completed_at, NEW.updated_at)), 1 WHERE NEW.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_stats_ad AFTER DELETE ON tasks_archive BEGIN
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT OLD.owner_id, date(COALESCE(OLD.completed_at, OLD.updated_at)), -1 WHERE OLD.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+]
+
+POSTGRESQL_FUNCTIONS = [
+    """
+    CREATE OR REPLACE FUNCTION task_stats_apply(p_owner integer, p_status text, p_tags json,
+                                                p_completed timestamptz, p_sign integer, p_hot boolean)
+    RETURNS void AS $$
+    BEGIN
+      IF p_hot THEN
+        INSERT INTO task_status_counts (owner_id, status, count) VALUES (p_owner, p_status, p_sign)
+          ON CONFLICT (owner_id, status) DO UPDATE SET count = task_status_counts.count + excluded.count;
+        INSERT INTO task_tag_counts (owner_id, tag, count)
+          SELECT p_owner, t, p_sign FROM json_array_elements_text(COALESCE(p_tags, '[]'::json)) AS t
+          ON CONFLICT (owner_id, tag) DO UPDATE SET count = task_tag_counts.count + excluded.count;
+      END IF;
+      IF p_status IN ('done', 'DONE') THEN
+        INSERT INTO task_daily_completions (owner_id, day, count)
+          VALUES (p_owner, (p_completed AT TIME ZONE 'UTC')::date, p_sign)
+          ON CONFLICT (owner_id, day) DO UPDATE SET count = task_daily_completions.count + excluded.count;
+      END IF;
+    END $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION tasks_stats_trigger() RETURNS trigger AS $$
+    BEGIN
+      IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM task_stats_apply(OLD.owner_id, OLD.status, OLD.tags,
+                                 COALESCE(OLD.completed_at, OLD.updated_at), -1, true);
+      END IF;
+      IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM task_stats_apply(NEW.owner_id, NEW.status, NEW.tags,
+                                 COALESCE(NEW.completed_at, NEW.updated_at), 1, true);
+      END IF;
+      RETURN NULL;
+    END $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION tasks_archive_stats_trigger() RETURNS trigger AS $$
+    BEGIN
+      IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM task_stats_apply(OLD.owner_id, OLD.status, OLD.tags,
+                                 COALESCE(OLD.completed_at, OLD.updated_at), -1, false);
+      END IF;
+      IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM task_stats_apply(NEW.owner_id, NEW.status, NEW.tags,
+                                 COALESCE(NEW.completed_at, NEW.updated_at), 1, false);
+      END IF;
+      RETURN NULL;
+    END $$ LANGUAGE plpgsql
+    """,
+]
+
+# The triggers as 9d3f6b1e8a24 created them, restored on downgrade.
+OLD_SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_stats_ai AFTER INSERT ON tasks BEGIN
+      INSERT INTO task_status_counts (owner_id, status, count) VALUES (NEW.owner_id, NEW.status, 1) ON CONFLICT (owner_id, status) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_tag_counts (owner_id, tag, count) SELECT NEW.owner_id, value, 1 FROM json_each(NEW.tags) WHERE true ON CONFLICT (owner_id, tag) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT NEW.owner_id, date(NEW.updated_at), 1 WHERE NEW.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_stats_au AFTER UPDATE OF status, tags, owner_id, updated_at ON tasks BEGIN
+      INSERT INTO task_status_counts (owner_id, status, count) VALUES (OLD.owner_id, OLD.status, -1) ON CONFLICT (owner_id, status) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_tag_counts (owner_id, tag, count) SELECT OLD.owner_id, value, -1 FROM json_each(OLD.tags) WHERE true ON CONFLICT (owner_id, tag) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT OLD.owner_id, date(OLD.updated_at), -1 WHERE OLD.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_status_counts (owner_id, status, count) VALUES (NEW.owner_id, NEW.status, 1) ON CONFLICT (owner_id, status) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_tag_counts (owner_id, tag, count) SELECT NEW.owner_id, value, 1 FROM json_each(NEW.tags) WHERE true ON CONFLICT (owner_id, tag) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT NEW.owner_id, date(NEW.updated_at), 1 WHERE NEW.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_stats_ad AFTER DELETE ON tasks BEGIN
+      INSERT INTO task_status_counts (owner_id, status, count) VALUES (OLD.owner_id, OLD.status, -1) ON CONFLICT (owner_id, status) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_tag_counts (owner_id, tag, count) SELECT OLD.owner_id, value, -1 FROM json_each(OLD.tags) WHERE true ON CONFLICT (owner_id, tag) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT OLD.owner_id, date(OLD.updated_at), -1 WHERE OLD.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_stats_ai AFTER INSERT ON tasks_archive BEGIN
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT NEW.owner_id, date(NEW.updated_at), 1 WHERE NEW.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_stats_au AFTER UPDATE OF status, owner_id, updated_at ON tasks_archive BEGIN
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT OLD.owner_id, date(OLD.updated_at), -1 WHERE OLD.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT NEW.owner_id, date(NEW.updated_at), 1 WHERE NEW.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_stats_ad AFTER DELETE ON tasks_archive BEGIN
+      INSERT INTO task_daily_completions (owner_id, day, count) SELECT OLD.owner_id, date(OLD.updated_at), -1 WHERE OLD.status IN ('done', 'DONE') ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+]
+
+OLD_POSTGRESQL_FUNCTIONS = [
+    """
+    CREATE OR REPLACE FUNCTION task_stats_apply(p_owner integer, p_status text, p_tags json,
+                                                p_updated timestamptz, p_sign integer, p_hot boolean)
+    RETURNS void AS $$
+    BEGIN
+      IF p_hot THEN
+        INSERT INTO task_status_counts (owner_id, status, count) VALUES (p_owner, p_status, p_sign)
+          ON CONFLICT (owner_id, status) DO UPDATE SET count = task_status_counts.count + excluded.count;
+        INSERT INTO task_tag_counts (owner_id, tag, count)
+          SELECT p_owner, t, p_sign FROM json_array_elements_text(COALESCE(p_tags, '[]'::json)) AS t
+          ON CONFLICT (owner_id, tag) DO UPDATE SET count = task_tag_counts.count + excluded.count;
+      END IF;
+      IF p_status IN ('done', 'DONE') THEN
+        INSERT INTO task_daily_completions (owner_id, day, count)
+          VALUES (p_owner, (p_updated AT TIME ZONE 'UTC')::date, p_sign)
+          ON CONFLICT (owner_id, day) DO UPDATE SET count = task_daily_completions.count + excluded.count;
+      END IF;
+    END $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION tasks_stats_trigger() RETURNS trigger AS $$
+    BEGIN
+      IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM task_stats_apply(OLD.owner_id, OLD.status, OLD.tags, OLD.updated_at, -1, true);
+      END IF;
+      IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM task_stats_apply(NEW.owner_id, NEW.status, NEW.tags, NEW.updated_at, 1, true);
+      END IF;
+      RETURN NULL;
+    END $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION tasks_archive_stats_trigger() RETURNS trigger AS $$
+    BEGIN
+      IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM task_stats_apply(OLD.owner_id, OLD.status, OLD.tags, OLD.updated_at, -1, false);
+      END IF;
+      IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM task_stats_apply(NEW.owner_id, NEW.status, NEW.tags, NEW.updated_at, 1, false);
+      END IF;
+      RETURN NULL;
+    END $$ LANGUAGE plpgsql
+    """,
+]
+
+SQLITE_TRIGGER_NAMES = [
+    f'{table}_stats_{suffix}' for table in ('tasks', 'tasks_archive') for suffix in ('ai', 'au', 'ad')
+]
+PG_APPLY_SIGNATURE = 'task_stats_apply(integer, text, json, timestamptz, integer, boolean)'
+
+# Completions keyed by `updated_at` again, as the old triggers maintain them.
+OLD_COMPLETIONS_BACKFILL = {
+    'sqlite':
+        "INSERT INTO task_daily_completions (owner_id, day, count) "
+        "SELECT owner_id, day, count(*) FROM ("
+        "SELECT owner_id, date(updated_at) AS day FROM tasks WHERE status IN ('done', 'DONE') "
+        "UNION ALL SELECT owner_id, date(updated_at) FROM tasks_archive WHERE status IN ('done', 'DONE')"
+        ") AS done GROUP BY owner_id, day",
+    'postgresql':
+        "INSERT INTO task_daily_completions (owner_id, day, count) "
+        "SELECT owner_id, day, count(*) FROM ("
+        "SELECT owner_id, (updated_at AT TIME ZONE 'UTC')::date AS day FROM tasks WHERE status IN ('done', 'DONE') "
+        "UNION ALL SELECT owner_id, (updated_at AT TIME ZONE 'UTC')::date FROM tasks_archive "
+        "WHERE status IN ('done', 'DONE')"
+        ") AS done GROUP BY owner_id, day",
+}
+
+
+def _replace_triggers(sqlite_triggers, postgresql_functions):
+    """Swap the counter triggers (SQLite) or the functions they call (PostgreSQL)."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        for name in SQLITE_TRIGGER_NAMES:
+            op.execute(f'DROP TRIGGER IF EXISTS {name}')
+        for statement in sqlite_triggers:
+            op.execute(statement)
+    elif bind.dialect.name == 'postgresql':
+        # The parameter is renamed, which CREATE OR REPLACE does not allow.
+        op.execute(f'DROP FUNCTION IF EXISTS {PG_APPLY_SIGNATURE}')
+        for statement in postgresql_functions:
+            op.execute(statement)
+
+
+def upgrade():
+    for table in ('tasks', 'tasks_archive'):
+        op.add_column(table, sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True))
+        # Done rows keep the day they are counted on today.
+        op.execute(f"UPDATE {table} SET completed_at = updated_at WHERE status IN ('done', 'DONE')")
+    _replace_triggers(SQLITE_TRIGGERS, POSTGRESQL_FUNCTIONS)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        # SQLite refuses to drop a column that a trigger names.
+        for name in SQLITE_TRIGGER_NAMES:
+            op.execute(f'DROP TRIGGER IF EXISTS {name}')
+    for table in ('tasks', 'tasks_archive'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('completed_at')
+    _replace_triggers(OLD_SQLITE_TRIGGERS, OLD_POSTGRESQL_FUNCTIONS)
+    if bind.dialect.name in OLD_COMPLETIONS_BACKFILL:
+        op.execute('DELETE FROM task_daily_completions')
+        op.execute(OLD_COMPLETIONS_BACKFILL[bind.dialect.name])
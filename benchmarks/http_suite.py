@@ -0,0 +1,259 @@
+"""HTTP benchmark suite for the Tasklist API against large seeded datasets.
+
+For every dataset size and user count it seeds a fresh SQLite file with
+`tasklist_app.seed` (deterministic from `--seed`), then drives the
+real `app` in-process through httpx's ASGI transport with a fixed number of
+concurrent clients. The scenarios are deep `/tasks` pages, `q` search,
+`sort=done`, mention-heavy `POST /tasks`, both exports, and login. Each one
+reports p50/p95/p99 latency and throughput.
+
+Results can be saved as a JSON baseline, and a later run can be compared with
+it. The run fails when any scenario's p95 grows, or its throughput drops, by
+more than `--max-regression`.
+
+Usage:
+    python -m benchmarks.http_suite --sizes 10000,100000 --users 10,100 --save benchmarks/baseline.json
+    python -m benchmarks.http_suite --sizes 10000,100000 --users 10,100 --baseline benchmarks/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+os.environ.setdefault("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+
+import httpx  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from tasklist_app import deps, seed, utils  # noqa: E402
+from tasklist_app.database import Base, _make_engine  # noqa: E402
+from tasklist_app.main import app  # noqa: E402
+
+PASSWORD = "bench-password"
+EMAIL_DOMAIN = "bench.example"
+WORDS = seed.WORDS
+
+
+def _email(i: int) -> str:
+    """Email of the i-th benchmark user (handle `userN`)."""
+    return seed.user_email(i, EMAIL_DOMAIN)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(pct / 100.0 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+async def _drive(
+    client: httpx.AsyncClient,
+    make_request: Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]],
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> dict:
+    """Send `requests` requests with `concurrency` workers and summarize latencies."""
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker(wid: int) -> None:
+        nonlocal errors
+        rnd = random.Random(seed * 1000 + wid)
+        for _ in remaining:
+            start = time.perf_counter()
+            r = await make_request(client, rnd)
+            latencies.append(time.perf_counter() - start)
+            if r.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "rps": round(len(latencies) / wall, 2) if wall else 0.0,
+    }
+
+
+def _scenarios(tasks: int, users: int) -> Dict[str, Callable]:
+    """Build the request makers for one dataset."""
+    per_user = max(1, tasks // users)
+    deep = max(0, per_user - 100)
+
+    async def tasks_deep_page(c, rnd):
+        return await c.get("/tasks", params={"limit": 20, "offset": rnd.randint(deep // 2, deep)})
+
+    async def tasks_search(c, rnd):
+        return await c.get("/tasks", params={"limit": 20, "q": rnd.choice(WORDS)})
+
+    async def tasks_sort_done(c, rnd):
+        return await c.get("/tasks", params={"limit": 20, "sort": "done", "offset": rnd.randint(0, deep)})
+
+    async def create_with_mentions(c, rnd):
+        mentions = " ".join(f"@user{rnd.randrange(users)}" for _ in range(min(users, 5)))
+        return await c.post("/tasks", json={"text": f"sync {rnd.choice(WORDS)} {mentions} #bench", "status": "pending"})
+
+    async def export_csv(c, rnd):
+        return await c.get("/tasks-export.csv")
+
+    async def export_xlsx(c, rnd):
+        return await c.get("/tasks-export.xlsx")
+
+    async def login(c, rnd):
+        return await c.post("/auth/login", data={"username": _email(rnd.randrange(users)), "password": PASSWORD})
+
+    return {
+        "tasks_deep_page": tasks_deep_page,
+        "tasks_search": tasks_search,
+        "tasks_sort_done": tasks_sort_done,
+        "create_with_mentions": create_with_mentions,
+        "export_csv": export_csv,
+        "export_xlsx": export_xlsx,
+        "login": login,
+    }
+
+
+# Exports walk the whole table and login is bcrypt-bound: run fewer of them.
+_HEAVY = {"export_csv", "export_xlsx", "login"}
+
+
+def run_dataset(
+    tasks: int,
+    users: int,
+    requests: int = 200,
+    heavy_requests: int = 10,
+    concurrency: int = 8,
+    seed_value: int = 42,
+    workdir: Optional[Path] = None,
+) -> Dict[str, dict]:
+    """Seed one dataset, run every scenario against it, and return per-scenario stats."""
+    workdir = workdir or Path(tempfile.mkdtemp(prefix="tasklist_httpbench_"))
+    eng = _make_engine(f"sqlite:///{workdir / f'bench_{tasks}_{users}.db'}", label=f"httpbench_{tasks}_{users}")
+    Base.metadata.create_all(bind=eng)
+    Session = sessionmaker(bind=eng, autoflush=False, autocommit=False)
+    seed.seed_database(eng, users, tasks, seed=seed_value, password=PASSWORD, email_domain=EMAIL_DOMAIN)
+
+    def _get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def _run() -> Dict[str, dict]:
+        token = utils.create_access_token({"sub": _email(0)})
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=None,
+        ) as client:
+            out = {}
+            for name, make_request in _scenarios(tasks, users).items():
+                n = heavy_requests if name in _HEAVY else requests
+                out[name] = await _drive(client, make_request, n, min(concurrency, n), seed_value)
+            return out
+
+    app.dependency_overrides[deps.get_db] = _get_db
+    try:
+        return asyncio.run(_run())
+    finally:
+        app.dependency_overrides.pop(deps.get_db, None)
+        eng.dispose()
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Return a description of every scenario that regressed past `max_regression`."""
+    problems = []
+    for key, cur in current["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base:
+            continue
+        if base["p95_ms"] and cur["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            problems.append(f"{key}: p95 {base['p95_ms']:.1f} -> {cur['p95_ms']:.1f} ms")
+        if base["rps"] and cur["rps"] < base["rps"] * (1 - max_regression):
+            problems.append(f"{key}: throughput {base['rps']:.1f} -> {cur['rps']:.1f} req/s")
+        if cur["errors"] > base.get("errors", 0):
+            problems.append(f"{key}: errors {base.get('errors', 0)} -> {cur['errors']}")
+    return problems
+
+
+def _int_list(value: str) -> List[int]:
+    """Parse `10000,100000` (underscores allowed) into ints."""
+    return [int(v.replace("_", "")) for v in value.split(",") if v.strip()]
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the suite, print a table, save/compare baselines, and return the exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=_int_list, default=[10_000], help="comma-separated task counts, e.g. 10000,100000,1000000")
+    parser.add_argument("--users", type=_int_list, default=[10], help="comma-separated user counts")
+    parser.add_argument("--requests", type=int, default=200, help="requests per light scenario")
+    parser.add_argument("--heavy-requests", type=int, default=10, help="requests per export/login scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--baseline", type=Path, help="compare against this JSON baseline")
+    parser.add_argument("--max-regression", type=float, default=0.20,
+                        help="allowed relative p95 growth / throughput drop (0.20 = 20%%)")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+        },
+        "results": {},
+    }
+    print(f"{'dataset/scenario':<40} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'err':>4}")
+    for tasks in args.sizes:
+        for users in args.users:
+            results = run_dataset(
+                tasks, users, requests=args.requests, heavy_requests=args.heavy_requests,
+                concurrency=args.concurrency, seed_value=args.seed,
+            )
+            for name, r in results.items():
+                key = f"{tasks}t_{users}u/{name}"
+                report["results"][key] = r
+                print(f"{key:<40} {r['requests']:>5} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+                      f"{r['p99_ms']:>9.1f} {r['rps']:>9.1f} {r['errors']:>4}")
+
+    if args.save:
+        args.save.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"saved baseline to {args.save}")
+    if args.baseline:
+        problems = compare(report, json.loads(args.baseline.read_text()), args.max_regression)
+        for line in problems:
+            print(f"REGRESSION {line}")
+        if problems:
+            return 1
+        print(f"no regressions beyond {args.max_regression:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
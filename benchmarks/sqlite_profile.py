@@ -0,0 +1,135 @@
+"""Concurrent read/write benchmark for the SQLite production profile.
+
+Runs the same mixed workload against two file-backed SQLite databases, one
+opened with SQLite defaults (rollback journal, synchronous=FULL) and one with
+`SQLITE_PERFORMANCE_PROFILE` (WAL, synchronous=NORMAL, mmap, cache, busy
+timeout), and reports throughput and lock errors for each.
+
+Usage:
+    python -m benchmarks.sqlite_profile --writers 4 --readers 8 --duration 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from tasklist_app import crud, models  # noqa: E402
+from tasklist_app.database import Base, _make_engine  # noqa: E402
+
+
+def _seed(Session, tasks: int) -> int:
+    """Create one user with `tasks` tasks and return the user id."""
+    with Session() as db:
+        user = models.User(email="bench@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        db.execute(
+            insert(models.Task),
+            [
+                {"text": f"seed task {i} #bench", "status": "pending", "tags": ["#bench"], "owner_id": user.id}
+                for i in range(tasks)
+            ],
+        )
+        db.commit()
+        return user.id
+
+
+def run_workload(profile: bool, writers: int, readers: int, duration: float, seed_tasks: int) -> dict:
+    """Run the mixed workload once and return counters for the run."""
+    # The database lives only for this run; the engine is disposed before the directory goes.
+    with tempfile.TemporaryDirectory(prefix="tasklist_bench_") as tmp:
+        eng = _make_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", label=f"bench_{profile}", sqlite_profile=profile)
+        try:
+            Base.metadata.create_all(bind=eng)
+            Session = sessionmaker(bind=eng, autoflush=False, autocommit=False)
+            owner_id = _seed(Session, seed_tasks)
+
+            stop = threading.Event()
+            lock = threading.Lock()
+            stats = {"writes": 0, "reads": 0, "locked": 0}
+
+            def _bump(key: str) -> None:
+                with lock:
+                    stats[key] += 1
+
+            def writer() -> None:
+                while not stop.is_set():
+                    try:
+                        with Session() as db:
+                            db.add(models.Task(text="bench write #w", status="pending", tags=["#w"], owner_id=owner_id))
+                            db.commit()
+                        _bump("writes")
+                    except OperationalError:
+                        _bump("locked")
+
+            def reader() -> None:
+                rnd = random.Random()
+                while not stop.is_set():
+                    try:
+                        with Session() as db:
+                            crud.list_tasks_page(
+                                db, owner_id, limit=20, offset=rnd.randrange(0, seed_tasks),
+                                status=None, order_by="created_at", order_dir="desc",
+                            )
+                        _bump("reads")
+                    except OperationalError:
+                        _bump("locked")
+
+            threads = [threading.Thread(target=writer) for _ in range(writers)]
+            threads += [threading.Thread(target=reader) for _ in range(readers)]
+            for t in threads:
+                t.start()
+            time.sleep(duration)
+            stop.set()
+            for t in threads:
+                t.join()
+        finally:
+            eng.dispose()
+
+    stats["ops_per_sec"] = (stats["writes"] + stats["reads"]) / duration
+    stats["writes_per_sec"] = stats["writes"] / duration
+    stats["reads_per_sec"] = stats["reads"] / duration
+    return stats
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run both profiles, print a comparison, and enforce `--min-gain`."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--seed-tasks", type=int, default=5_000)
+    parser.add_argument("--min-gain", type=float, default=1.0,
+                        help="fail unless profile ops/s >= baseline ops/s * MIN_GAIN")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, profile in (("default", False), ("profile", True)):
+        results[name] = run_workload(profile, args.writers, args.readers, args.duration, args.seed_tasks)
+        r = results[name]
+        print(
+            f"{name:>8}: {r['ops_per_sec']:9.1f} ops/s  "
+            f"(writes {r['writes_per_sec']:8.1f}/s, reads {r['reads_per_sec']:8.1f}/s, locked errors {r['locked']})"
+        )
+
+    base = results["default"]["ops_per_sec"] or 1e-9
+    gain = results["profile"]["ops_per_sec"] / base
+    print(f"    gain: x{gain:.2f}")
+    return 0 if gain >= args.min_gain else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Micro-benchmark for tag and mention extraction on large task texts.
+
+Compares the single-pass scanner (`utils.scan_tokens` + `tags_from_tokens` +
+`mention_handles`) with the previous implementation. That implementation made
+four `re.findall` passes with list-based de-duplication, plus a separate
+mention regex compiled on every `create_task` call. Texts are around 10,000
+characters and carry hundreds of tokens.
+
+Usage:
+    python -m benchmarks.tag_scanner --chars 10000 --tokens 400 --repeat 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+os.environ.setdefault("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+
+from tasklist_app import utils  # noqa: E402
+
+_LEGACY_PATTERNS = [
+    r"(?<!\w)(#[\w-]+)",
+    r"(?<!\w)(@[\w.-]+)",
+    r"(https?://[^\s]+)",
+    r"([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[A-Za-z]{2,})",
+]
+
+
+def legacy(text: str) -> tuple[list[str], set[str]]:
+    """The previous tag extraction plus create_task's mention scan."""
+    tags: list[str] = []
+    for pat in _LEGACY_PATTERNS:
+        for m in re.findall(pat, text or ""):
+            if m not in tags:
+                tags.append(m)
+    mention_pattern = re.compile(r"@([A-Za-z0-9._-]+)")
+    handles = set(m.group(1).lower() for m in mention_pattern.finditer(text or ""))
+    return tags, handles
+
+
+def single_pass(text: str) -> tuple[list[str], list[str]]:
+    """The unified scanner used by crud.create_task."""
+    tokens = utils.scan_tokens(text)
+    return utils.tags_from_tokens(tokens), utils.mention_handles(tokens)
+
+
+def make_text(rnd: random.Random, chars: int, tokens: int) -> str:
+    """Build a text of about `chars` characters with about `tokens` distinct tokens."""
+    words = "review the quarterly numbers and send the summary before friday".split()
+    kinds = [
+        lambda i: f"#tag{i}",
+        lambda i: f"@user{i}",
+        lambda i: f"https://example.com/items/{i}?ref=task",
+        lambda i: f"person{i}@example.org",
+    ]
+    parts = [rnd.choice(kinds)(i) for i in range(tokens)]
+    while sum(len(p) + 1 for p in parts) < chars:
+        parts.append(rnd.choice(words))
+    rnd.shuffle(parts)
+    return " ".join(parts)[:chars]
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Time both implementations and print µs per call and the speedup."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chars", type=int, default=10_000)
+    parser.add_argument("--tokens", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    text = make_text(random.Random(args.seed), args.chars, args.tokens)
+    found = len(utils.scan_tokens(text))
+    results = {}
+    for name, fn in (("legacy", legacy), ("single-pass", single_pass)):
+        seconds = min(timeit.repeat(lambda: fn(text), number=args.repeat, repeat=5)) / args.repeat
+        results[name] = seconds
+        print(f"{name:>12}: {seconds * 1e6:9.1f} µs/call  ({len(text)} chars, {found} tokens)")
+    print(f"     speedup: x{results['legacy'] / results['single-pass']:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
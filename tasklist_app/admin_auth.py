@@ -8,7 +8,26 @@ from sqladmin.authentication import AuthenticationBackend
 from starlette.requests import Request
 
 from .database import SessionLocal
-from . import models, utils
+from . import deps, models, utils
+
+
+def admin_email_for(scope, admin_emails: set[str], session_key: str = "admin") -> Optional[str]:
+    """Return the whitelisted admin email behind an ASGI request, if any.
+
+    The email comes from the /admin session when present, otherwise from the
+    request's bearer token or auth cookie.
+    """
+    if not admin_emails:
+        return None
+    session = scope.get("session") or {}
+    email = session.get(session_key)
+    if not email:
+        request = Request(scope)
+        token = deps._extract_token_from_request(request, request.headers.get("authorization"))
+        email = deps._decode_token(token) if token else None
+    if email and email.lower() in admin_emails:
+        return email.lower()
+    return None
 
 
 class AdminAuth(AuthenticationBackend):
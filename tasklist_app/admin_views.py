@@ -0,0 +1,216 @@
+"""Admin list views that stay fast on large tables.
+
+sqladmin's stock list page counts every matching row, pages with OFFSET and
+searches with `CAST(col AS TEXT) ILIKE '%term%'` over each searchable column.
+On a production-sized `tasks` table that is several full scans per page load.
+`ScalableModelView` replaces the list query:
+
+- Keyset paging. The "next"/"prev" links carry the primary key of the last or
+  first row shown (`after=` / `before=`), and the page is read with a range
+  condition on (sort column, id). Page 1000 costs the same as page 1. Sorting
+  is limited to indexed columns (`column_sortable_list`).
+- Estimated counts. The whole table uses PostgreSQL's planner statistics.
+  A search is counted up to `ADMIN_COUNT_CAP` rows. The last page is exact.
+- Index-backed search. Each view overrides `search_query` with a small syntax
+  that maps onto indexes (see `UserAdmin` / `TaskAdmin` in `main.py`).
+- Every list statement runs under `ADMIN_STATEMENT_TIMEOUT_SECONDS`. A query
+  that exceeds it returns a 504 and releases its connection.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, func, or_, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, selectinload
+from sqladmin import ModelView
+from sqladmin.pagination import PageControl, Pagination
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+
+from .database import STATEMENT_TIMEOUTS, is_statement_timeout, statement_timeout
+from .settings import settings
+
+
+@dataclass
+class KeysetPagination(Pagination):
+    """Pagination with cursor links instead of numbered pages.
+
+    `page` is only the position shown to the admin ("Showing 51 to 75"). The
+    rows come from the cursor, so the page is never clamped to the estimated count.
+    """
+
+    previous_url: Optional[str] = None
+    next_url: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        """Validate the page size without clamping the page to the count."""
+        if self.page_size < 1:
+            raise ValueError("page_size must be greater than 0")
+
+    @property
+    def has_previous(self) -> bool:
+        """True if there is a "prev" cursor link."""
+        return self.previous_url is not None
+
+    @property
+    def has_next(self) -> bool:
+        """True if there is a "next" cursor link."""
+        return self.next_url is not None
+
+    @property
+    def previous_page(self) -> PageControl:
+        """Control for the previous page, linked to its cursor."""
+        return PageControl(number=self.page - 1, url=self.previous_url or "#")
+
+    @property
+    def next_page(self) -> PageControl:
+        """Control for the next page, linked to its cursor."""
+        return PageControl(number=self.page + 1, url=self.next_url or "#")
+
+    def add_pagination_urls(self, base_url) -> None:
+        """Show only the current page: keyset pages can't be jumped to by number."""
+        self.page_controls = [PageControl(number=self.page, url=str(base_url))]
+
+    def resize(self, page_size: int) -> "KeysetPagination":
+        """Changing the page size restarts at the first page."""
+        self.page = 1
+        self.page_size = page_size
+        return self
+
+
+def estimated_row_count(session: Session, table) -> int:
+    """Row count of `table` from PostgreSQL's statistics, or an exact count elsewhere."""
+    if session.get_bind().dialect.name == "postgresql":
+        estimate = session.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": table.name},
+        )
+        if estimate is not None and estimate >= 0:  # -1: never analyzed
+            return int(estimate)
+    return session.scalar(select(func.count()).select_from(table)) or 0
+
+
+def prefix_filter(session_maker, column, term: str):
+    """Index-friendly "starts with `term`" condition on a string column.
+
+    SQLite compares with the BINARY collation, so a half-open range is exact
+    and uses the column's plain index. Elsewhere it is `LIKE 'term%'`, which
+    PostgreSQL serves from a `text_pattern_ops` index.
+    """
+    bind = session_maker.kw.get("bind")
+    if bind is not None and bind.dialect.name == "sqlite" and term:
+        upper = term[:-1] + chr(ord(term[-1]) + 1)
+        return and_(column >= term, column < upper)
+    return column.startswith(term, autoescape=True)
+
+
+class ScalableModelView(ModelView):
+    """ModelView whose list page uses keyset paging, estimated counts and a statement timeout."""
+
+    column_default_sort = ("id", True)
+
+    def _list_sort(self, request: Request):
+        """Return (column, descending) for the requested or default sort."""
+        sort_by = request.query_params.get("sortBy")
+        if sort_by:
+            if sort_by not in self._sort_fields:
+                raise HTTPException(status_code=400, detail="Invalid sortBy parameter")
+            return getattr(self.model, sort_by), request.query_params.get("sort", "asc") == "desc"
+        name, descending = self._get_default_sort()[0]
+        return getattr(self.model, name), descending
+
+    async def list(self, request: Request) -> Pagination:
+        """Read one keyset page in a worker thread, bounded by the admin statement timeout."""
+        page = max(1, self.validate_page_number(request.query_params.get("page"), 1))
+        page_size = self.validate_page_number(request.query_params.get("pageSize"), self.page_size)
+        page_size = min(page_size, max(self.page_size_options))
+        if page_size < 1:
+            raise HTTPException(status_code=400, detail="Invalid page or pageSize parameter")
+        try:
+            return await run_in_threadpool(self._keyset_page, request, page, page_size)
+        except OperationalError as e:
+            if not is_statement_timeout(e):
+                raise
+            STATEMENT_TIMEOUTS.inc(route_class="admin")
+            raise HTTPException(
+                status_code=504,
+                detail=f"The query took longer than {settings.ADMIN_STATEMENT_TIMEOUT_SECONDS:g}s; narrow the search.",
+            ) from e
+
+    def _keyset_page(self, request: Request, page: int, page_size: int) -> KeysetPagination:
+        """Build and run the list, count and cursor queries for one page."""
+        params = request.query_params
+        column, descending = self._list_sort(request)
+        pk = getattr(self.model, self.pk_columns[0].name)
+        search = params.get("search")
+        after, before = params.get("after"), params.get("before")
+        cursor = after or before
+        backwards = cursor is not None and not after
+        if cursor is not None and not cursor.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        stmt = self.list_query(request)
+        for relation in self._list_relations:
+            stmt = stmt.options(selectinload(relation))
+        if search:
+            stmt = self.search_query(stmt=stmt, term=search)
+        filtered = stmt
+
+        with self.session_maker(expire_on_commit=False) as session:
+            with statement_timeout(session, settings.ADMIN_STATEMENT_TIMEOUT_SECONDS):
+                # Rows after the cursor in display order; `before` walks the same order in reverse.
+                forward_desc = descending != backwards
+                by_pk = column.key == pk.key
+                if cursor is not None:
+                    cursor_pk = int(cursor)
+                    if by_pk:
+                        stmt = stmt.where(pk < cursor_pk if forward_desc else pk > cursor_pk)
+                    else:
+                        # The cursor row's stored value, so the range matches ORDER BY exactly.
+                        anchor = select(column).where(pk == cursor_pk).scalar_subquery()
+                        if forward_desc:
+                            stmt = stmt.where(or_(column < anchor, and_(column == anchor, pk < cursor_pk)))
+                        else:
+                            stmt = stmt.where(or_(column > anchor, and_(column == anchor, pk > cursor_pk)))
+                order = [column.desc() if forward_desc else column.asc()]
+                if not by_pk:
+                    order.append(pk.desc() if forward_desc else pk.asc())
+                rows = list(session.execute(stmt.order_by(*order).limit(page_size + 1)).scalars().unique().all())
+                more = len(rows) > page_size
+                rows = rows[:page_size]
+                if backwards:
+                    rows.reverse()
+
+                has_next = more if not backwards else True
+                has_previous = (cursor is not None) if not backwards else more
+                shown_to = (page - 1) * page_size + len(rows)
+                if not has_next:
+                    count = shown_to
+                elif search:
+                    capped = filtered.with_only_columns(pk).order_by(None).limit(settings.ADMIN_COUNT_CAP).subquery()
+                    count = session.scalar(select(func.count()).select_from(capped)) or 0
+                else:
+                    count = estimated_row_count(session, self.model.__table__)
+                count = max(count, shown_to + int(has_next))
+
+        base = request.url.remove_query_params(["after", "before", "page"])
+        next_url = previous_url = None
+        if has_next and rows:
+            next_url = str(base.include_query_params(after=self._pk_value(rows[-1]), page=page + 1))
+        if has_previous:
+            if rows and page > 2:
+                previous_url = str(base.include_query_params(before=self._pk_value(rows[0]), page=page - 1))
+            else:
+                previous_url = str(base)
+        return KeysetPagination(
+            rows=rows, page=page, page_size=page_size, count=count,
+            previous_url=previous_url, next_url=next_url,
+        )
+
+    def _pk_value(self, row: Any):
+        """Primary key of a listed row (single-column keys only)."""
+        return getattr(row, self.pk_columns[0].name)
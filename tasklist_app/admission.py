@@ -0,0 +1,194 @@
+"""Admission control: per-route-class concurrency limits and priority load shedding.
+
+Every route shares one threadpool and one connection pool, so an export storm
+or a burst of logins (each a bcrypt hash) can starve `/tasks`.
+`AdmissionMiddleware` sorts each HTTP request into a route class and admits it
+through that class's gate:
+
+- A gate runs at most `ADMISSION_<CLASS>_CONCURRENCY` requests at a time.
+  Up to `ADMISSION_<CLASS>_QUEUE` more wait in FIFO order, each for at most
+  `ADMISSION_QUEUE_TIMEOUT_SECONDS`. A request that finds the queue full, or
+  waits too long, is answered 503 with `Retry-After`.
+- Classes are ranked: read, write, auth, admin, export. While a higher-ranked
+  class has requests queued, new auth, admin and export requests are shed on
+  arrival instead of joining their own queues.
+- `/health`, `/metrics`, static files (the app's and sqladmin's) and the live
+  update stream bypass admission, so probes, assets and open streams never
+  compete for a slot.
+
+A shed request never reaches a route, so it costs no thread and no
+connection. Limits are per worker.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from starlette.responses import JSONResponse
+
+from . import metrics
+from .settings import settings
+
+QUEUE_WAIT = metrics.histogram(
+    "tasklist_admission_queue_wait_seconds",
+    "Time requests spent queued for admission, by route class.",
+    ["route_class"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+SHED = metrics.counter(
+    "tasklist_admission_shed",
+    "Requests rejected by admission control (reason: priority, queue_full, queue_timeout).",
+    ["route_class", "reason"],
+)
+ACTIVE = metrics.gauge("tasklist_admission_active", "Requests admitted and running.", ["route_class"])
+QUEUED = metrics.gauge("tasklist_admission_queued", "Requests waiting for admission.", ["route_class"])
+
+# Highest priority first. Classes after `write` are shed while an earlier class is queueing.
+ROUTE_CLASSES = ("read", "write", "auth", "admin", "export")
+SHEDDABLE = frozenset({"auth", "admin", "export"})
+RETRY_AFTER = {"read": 1, "write": 1, "auth": 2, "admin": 5, "export": 10}
+
+_EXEMPT_PATHS = frozenset({"/health", "/metrics", "/tasks/stream"})
+_EXEMPT_PREFIXES = ("/static/", "/admin/statics/")
+_AUTH_PATHS = frozenset({"/auth/login", "/auth/register", "/app/login", "/app/register"})
+_WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+def route_class(scope) -> Optional[str]:
+    """Return the admission class of a request, or None if it bypasses admission."""
+    path, method = scope["path"], scope["method"]
+    if path in _EXEMPT_PATHS or path.startswith(_EXEMPT_PREFIXES):
+        return None
+    if path.startswith("/admin"):
+        return "admin"
+    if path.startswith("/tasks-export.") or path == "/tasks-import":
+        return "export"
+    if method == "POST" and path in _AUTH_PATHS:
+        return "auth"
+    if method in _WRITE_METHODS:
+        return "write"
+    return "read"
+
+
+class Shed(Exception):
+    """The request was not admitted; `reason` is the metric label."""
+
+    def __init__(self, reason: str) -> None:
+        """Record why the request was rejected."""
+        super().__init__(reason)
+        self.reason = reason
+
+
+class Gate:
+    """FIFO concurrency limiter with a bounded queue (one event loop, no locking)."""
+
+    def __init__(self, name: str, concurrency: int, queue: int) -> None:
+        """Admit `concurrency` requests at once and queue at most `queue` more."""
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        """Requests currently waiting."""
+        return len(self._waiters)
+
+    async def acquire(self, timeout: float) -> float:
+        """Wait for a slot and return the seconds spent queued; raise Shed if none comes."""
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            return 0.0
+        if len(self._waiters) >= self.queue:
+            raise Shed("queue_full")
+        start = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        QUEUED.inc(route_class=self.name)
+        try:
+            # A slot is handed over by `release` setting the result; `active` already counts it.
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # handed a slot just as the request gave up
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise Shed("queue_timeout") from None
+            raise
+        finally:
+            QUEUED.dec(route_class=self.name)
+        return time.perf_counter() - start
+
+    def release(self) -> None:
+        """Hand the slot to the oldest live waiter, or free it."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+def build_gates() -> Dict[str, Gate]:
+    """One gate per route class, sized from settings."""
+    return {
+        name: Gate(
+            name,
+            getattr(settings, f"ADMISSION_{name.upper()}_CONCURRENCY"),
+            getattr(settings, f"ADMISSION_{name.upper()}_QUEUE"),
+        )
+        for name in ROUTE_CLASSES
+    }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware admitting requests through their route class's gate."""
+
+    def __init__(self, app, gates: Optional[Dict[str, Gate]] = None) -> None:
+        """Wrap the downstream ASGI app; `gates` defaults to `build_gates()`."""
+        self.app = app
+        self.gates = gates if gates is not None else build_gates()
+
+    async def __call__(self, scope, receive, send):
+        """Admit, queue or shed one HTTP request; pass other scope types through."""
+        name = route_class(scope) if scope["type"] == "http" else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+        gate = self.gates[name]
+        try:
+            if name in SHEDDABLE and self._higher_priority_queued(name):
+                raise Shed("priority")
+            waited = await gate.acquire(settings.ADMISSION_QUEUE_TIMEOUT_SECONDS)
+        except Shed as shed:
+            SHED.inc(route_class=name, reason=shed.reason)
+            await self._reject(name, scope, receive, send)
+            return
+        QUEUE_WAIT.observe(waited, route_class=name)
+        ACTIVE.inc(route_class=name)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            ACTIVE.dec(route_class=name)
+            gate.release()
+
+    def _higher_priority_queued(self, name: str) -> bool:
+        """True while any class ranked above `name` has requests waiting."""
+        for other in ROUTE_CLASSES[:ROUTE_CLASSES.index(name)]:
+            if self.gates[other].queued:
+                return True
+        return False
+
+    async def _reject(self, name: str, scope, receive, send) -> None:
+        """Answer 503 with the class's Retry-After."""
+        response = JSONResponse(
+            status_code=503,
+            content={"detail": f"Server busy ({name} requests), retry shortly."},
+            headers={"Retry-After": str(RETRY_AFTER[name])},
+        )
+        await response(scope, receive, send)
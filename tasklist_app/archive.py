@@ -0,0 +1,108 @@
+"""Archival of done tasks out of the hot `tasks` table.
+
+Tasks whose status is done and that have not been updated for more than N days
+are copied into `tasks_archive` and deleted from `tasks`, one batch per
+transaction so no single statement holds locks for long.
+
+Run it from cron with:
+    python -m tasklist_app.archive --days 90 --batch-size 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import sys
+from typing import Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from . import invalidation, models
+from .settings import settings
+
+_COLUMNS = [c.name for c in models.Task.__table__.columns]
+
+
+def archive_done_tasks(
+    db: Session,
+    older_than_days: int,
+    batch_size: int = 1000,
+    now: Optional[dt.datetime] = None,
+    dry_run: bool = False,
+) -> int:
+    """Move done tasks untouched for `older_than_days` into the archive; return how many moved."""
+    now = now or dt.datetime.now(dt.timezone.utc)
+    cutoff = now - dt.timedelta(days=older_than_days)
+    task_table = models.Task.__table__
+    archive_table = models.TaskArchive.__table__
+
+    moved = 0
+    last_id = 0
+    returning = bool(getattr(db.get_bind().dialect, "delete_returning", False))
+    while True:
+        ids = db.scalars(
+            select(models.Task.id)
+            .where(
+                models.Task.id > last_id,
+                models.Task.status.in_(models.DONE_STATUSES),
+                models.Task.updated_at < cutoff,
+            )
+            .order_by(models.Task.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        last_id = ids[-1]
+        if dry_run:
+            moved += len(ids)
+            continue
+        # A task reopened or edited since the SELECT no longer matches and stays put.
+        eligible = (
+            task_table.c.id.in_(ids),
+            task_table.c.status.in_(models.DONE_STATUSES),
+            task_table.c.updated_at < cutoff,
+        )
+        if returning:
+            # The DELETE locks and rechecks each row, so exactly the deleted rows are archived.
+            rows = db.execute(
+                delete(task_table).where(*eligible).returning(*[task_table.c[name] for name in _COLUMNS])
+            ).mappings().all()
+            if rows:
+                db.execute(insert(archive_table), [dict(row) for row in rows])
+            moved += len(rows)
+        else:
+            db.execute(
+                insert(archive_table).from_select(
+                    _COLUMNS,
+                    select(*[task_table.c[name] for name in _COLUMNS]).where(*eligible),
+                )
+            )
+            moved += db.execute(delete(task_table).where(*eligible)).rowcount
+        db.commit()
+    if moved and not dry_run:
+        # Spans many owners: have every worker drop its task-derived caches.
+        invalidation.publish(invalidation.ALL)
+    return moved
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point for cron jobs."""
+    parser = argparse.ArgumentParser(description="Move long-done tasks into tasks_archive.")
+    parser.add_argument("--days", type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                        help="archive tasks done and untouched for more than DAYS days")
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="count candidates without moving them")
+    args = parser.parse_args(argv)
+
+    from .database import SessionLocal
+
+    with SessionLocal() as db:
+        moved = archive_done_tasks(db, args.days, batch_size=args.batch_size, dry_run=args.dry_run)
+    verb = "would archive" if args.dry_run else "archived"
+    print(f"{verb} {moved} task(s) done more than {args.days} day(s) ago")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
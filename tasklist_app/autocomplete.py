@@ -0,0 +1,190 @@
+"""In-memory prefix indexes behind `GET /autocomplete`.
+
+Two kinds of index answer the task input's suggestions:
+
+- `handles`: one per worker, every user's @handle (the email's local part).
+  It loads lazily on the first lookup. It is registered with the invalidation
+  bus, so a published `user:<id>` key (registration, account deletion) queues
+  that id, and the next lookup re-reads only the queued ids by primary key.
+  A full reload happens only after `clear()` (an `ALL` message or a bus reset),
+  or when the bus is unhealthy and the index is older than its staleness bound.
+- Per-user tag indexes, built from the maintained `task_tag_counts` rows and
+  kept in a `LocalCache` tagged with `tasks:<owner_id>`. Any write to the
+  user's tasks evicts them.
+
+Each index is a sorted array searched with `bisect`. A lookup is O(log n) plus
+the number of results returned, well under a millisecond for 100k handles.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import invalidation, models
+from .cache import LocalCache
+from .settings import settings
+
+# Characters a mention can contain (see utils._TOKEN_RE); other handles can't be typed.
+_HANDLE_RE = re.compile(r"[\w.-]+")
+
+
+def handle_of(email: str) -> Optional[str]:
+    """Return the lower-cased @handle for an email, or None if it can't be mentioned."""
+    local = (email or "").split("@", 1)[0].strip().lower().rstrip(".-")
+    return local if local and _HANDLE_RE.fullmatch(local) else None
+
+
+class PrefixIndex:
+    """Sorted array of distinct terms with reference counts."""
+
+    def __init__(self, terms=()) -> None:
+        """Build the index from an iterable of terms (duplicates are counted)."""
+        self._counts: Dict[str, int] = {}
+        for term in terms:
+            self._counts[term] = self._counts.get(term, 0) + 1
+        self._sorted: List[str] = sorted(self._counts)
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def add(self, term: str) -> None:
+        """Add one reference to `term`."""
+        if term in self._counts:
+            self._counts[term] += 1
+        else:
+            self._counts[term] = 1
+            insort(self._sorted, term)
+
+    def discard(self, term: str) -> None:
+        """Drop one reference to `term`; the term leaves the index at zero."""
+        count = self._counts.get(term)
+        if count is None:
+            return
+        if count > 1:
+            self._counts[term] = count - 1
+            return
+        del self._counts[term]
+        i = bisect_left(self._sorted, term)
+        if i < len(self._sorted) and self._sorted[i] == term:
+            del self._sorted[i]
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """Return up to `limit` terms starting with `prefix`, in lexical order."""
+        out: List[str] = []
+        i = bisect_left(self._sorted, prefix)
+        while i < len(self._sorted) and len(out) < limit:
+            term = self._sorted[i]
+            if not term.startswith(prefix):
+                break
+            out.append(term)
+            i += 1
+        return out
+
+
+class HandleIndex:
+    """Every user's handle, kept current by the invalidation bus's `user:<id>` keys."""
+
+    def __init__(self, name: str = "handles", ttl: float = 3600.0) -> None:
+        """Initialize empty; `ttl` bounds the age of the index while the bus is unhealthy."""
+        self.name = name
+        self.ttl = ttl
+        # Set by InvalidationBus.register, like LocalCache.
+        self.is_fresh = lambda: True
+        self._index: Optional[PrefixIndex] = None
+        self._by_id: Dict[int, str] = {}
+        self._pending: Set[int] = set()
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    # Bus interface (see InvalidationBus._evict / reset).
+    def evict(self, *keys: str) -> int:
+        """Queue the user ids named by `user:<id>` keys for re-reading; return how many."""
+        ids = set()
+        for key in keys:
+            kind, _, value = key.partition(":")
+            if kind == "user" and value.isdigit():
+                ids.add(int(value))
+        if ids:
+            with self._lock:
+                self._pending |= ids
+        return len(ids)
+
+    def clear(self) -> None:
+        """Forget everything; the next lookup reloads all handles."""
+        with self._lock:
+            self._index = None
+            self._by_id = {}
+            self._pending = set()
+
+    def __len__(self) -> int:
+        return len(self._index) if self._index is not None else 0
+
+    def _sync(self, db: Session) -> PrefixIndex:
+        """Load the index if needed and apply queued user ids; return it."""
+        with self._lock:
+            stale = self._index is not None and not self.is_fresh() and time.monotonic() - self._loaded_at > self.ttl
+            if self._index is None or stale:
+                rows = db.execute(select(models.User.id, models.User.email)).all()
+                self._by_id = {uid: h for uid, h in ((uid, handle_of(email)) for uid, email in rows) if h}
+                self._index = PrefixIndex(self._by_id.values())
+                self._pending = set()
+                self._loaded_at = time.monotonic()
+            elif self._pending:
+                ids, self._pending = self._pending, set()
+                found = dict(db.execute(
+                    select(models.User.id, models.User.email).where(models.User.id.in_(ids))
+                ).all())
+                for uid in ids:
+                    old = self._by_id.pop(uid, None)
+                    if old is not None:
+                        self._index.discard(old)
+                    new = handle_of(found.get(uid, ""))
+                    if new is not None:
+                        self._by_id[uid] = new
+                        self._index.add(new)
+            return self._index
+
+    def complete(self, db: Session, prefix: str, limit: int = 10) -> List[str]:
+        """Return up to `limit` handles starting with `prefix` (lower-cased, without '@')."""
+        index = self._sync(db)
+        with self._lock:
+            return index.complete(prefix.lower(), limit)
+
+
+handles = invalidation.bus.register(HandleIndex())
+# Capped at the bus's staleness bound; evicted on every write to the owner's tasks.
+_tag_indexes = invalidation.bus.register(
+    LocalCache("autocomplete_tags", max_entries=settings.AUTOCOMPLETE_TAG_INDEXES)
+)
+
+
+def user_tags(db: Session, owner_id: int, prefix: str, limit: int = 10) -> List[str]:
+    """Return up to `limit` of the user's #tags starting with `prefix` (which includes the '#')."""
+    key = f"tags:{owner_id}"
+    index = _tag_indexes.get(key)
+    if index is None:
+        C = models.TaskTagCount
+        tags = db.scalars(select(C.tag).where(C.owner_id == owner_id, C.count > 0, C.tag.like("#%"))).all()
+        # Matched case-insensitively, returned as written: "#casa\0#Casa".
+        index = PrefixIndex(f"{tag.lower()}\0{tag}" for tag in tags)
+        _tag_indexes.set(key, index, tags=[invalidation.tasks_key(owner_id)])
+    return [term.split("\0", 1)[1] for term in index.complete(prefix.lower(), limit)]
+
+
+def suggest(db: Session, owner_id: int, prefix: str, limit: int = 10) -> dict:
+    """Suggestions for a typed prefix: `@ab` → handles, `#ab` → own tags, `ab` → both."""
+    prefix = (prefix or "").strip()
+    bare = prefix.lstrip("@#")
+    result = {"handles": [], "tags": []}
+    if not prefix.startswith("#"):
+        result["handles"] = ["@" + h for h in handles.complete(db, bare, limit)]
+    if not prefix.startswith("@"):
+        result["tags"] = user_tags(db, owner_id, "#" + bare, limit)
+    return result
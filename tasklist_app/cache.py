@@ -0,0 +1,105 @@
+"""Per-worker in-process caches with tag-based eviction.
+
+A `LocalCache` maps string keys to values. Each entry carries a time-to-live
+and, optionally, invalidation tags such as `tasks:42` (see
+`invalidation.tasks_key`). `evict("tasks:42")` drops the entry stored under
+that key and every entry tagged with it. Caches that hold data other workers
+can change are registered with the invalidation bus. The bus evicts their tags
+when another worker writes, and it refuses every read while its listener is
+unhealthy, which bounds how stale a cached value can get.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from . import metrics
+
+CACHE_LOOKUPS = metrics.counter("tasklist_cache_lookups", "In-process cache lookups.", ["cache", "result"])
+CACHE_EVICTIONS = metrics.counter("tasklist_cache_evictions", "Entries dropped by invalidation.", ["cache"])
+
+_MISSING = object()
+
+
+class LocalCache:
+    """Thread-safe LRU cache with per-entry TTL and invalidation tags."""
+
+    def __init__(self, name: str, max_entries: int = 10_000, ttl: float = 60.0) -> None:
+        """Initialize with a metrics name, a size bound, and the default (and maximum) TTL in seconds."""
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # Set by InvalidationBus.register: False while cross-worker invalidation is not trustworthy.
+        self.is_fresh: Callable[[], bool] = lambda: True
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._tagged: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value, or `default` if missing, expired, or not trustworthy."""
+        if not self.is_fresh():
+            CACHE_LOOKUPS.inc(cache=self.name, result="bypass")
+            return default
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] > now:
+                self._entries.move_to_end(key)
+                CACHE_LOOKUPS.inc(cache=self.name, result="hit")
+                return entry[1]
+            if entry is not _MISSING:
+                self._drop(key)
+        CACHE_LOOKUPS.inc(cache=self.name, result="miss")
+        return default
+
+    def set(self, key: str, value: Any, tags: Iterable[str] = (), ttl: Optional[float] = None) -> None:
+        """Store `value` under `key`, tagged for eviction by any of `tags`."""
+        expires = time.monotonic() + (self.ttl if ttl is None else min(ttl, self.ttl))
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (expires, value, tags)
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def evict(self, *keys: str) -> int:
+        """Drop the entries stored under, or tagged with, any of `keys`; return how many."""
+        dropped = 0
+        with self._lock:
+            for key in keys:
+                for victim in [key, *self._tagged.get(key, ())]:
+                    if victim in self._entries:
+                        self._drop(victim)
+                        dropped += 1
+        if dropped:
+            CACHE_EVICTIONS.inc(dropped, cache=self.name)
+        return dropped
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+            self._tagged.clear()
+        if dropped:
+            CACHE_EVICTIONS.inc(dropped, cache=self.name)
+
+    def __len__(self) -> int:
+        """Number of stored entries (expired ones included until touched)."""
+        return len(self._entries)
+
+    def _drop(self, key: str) -> None:
+        """Remove one entry and its tag links (lock held)."""
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
@@ -2,18 +2,30 @@
 
 This module contains database operations used by the API layer:
 - User helpers for registration/login flows.
-- Task CRUD plus listing with ordering and pagination.
+- Task CRUD plus listing with ordering and pagination, optionally reading
+  through to `tasks_archive`, and tag facet counts for a listing's filter.
 The function names, signatures, and behavior are preserved as-is.
+
+Single-row writes use `INSERT/UPDATE/DELETE ... RETURNING` when the backend
+supports it (PostgreSQL, SQLite >= 3.35): one round trip per write, with no
+SELECT before it and no refresh after it. Returned objects are detached so the
+commit does not expire them. Older SQLite falls back to the classic ORM
+add/commit/refresh path.
 """
 
-from typing import Optional, Sequence
-import re
+from typing import Callable, Optional, Sequence
+import logging
 import datetime as dt
 
-from sqlalchemy import asc, desc, case
-from sqlalchemy.orm import Session
+from sqlalchemy import asc, delete, desc, case, func, insert, or_, select, true, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+from . import events, invalidation, models, schemas, stats, utils
+from .cache import LocalCache
+from .settings import settings
 
-from . import models, schemas, utils
+logger = logging.getLogger(__name__)
 
 
 # -----------------------------------------------------------------------------
@@ -32,17 +44,46 @@ def user_exists(db: Session, email: str) -> bool:
     return get_user_by_email(db, email) is not None
 
 
+def _supports_returning(db: Session, kind: str) -> bool:
+    """Return True if the write bind supports `<kind> ... RETURNING` (insert/update/delete)."""
+    return bool(getattr(db.get_bind().dialect, f"{kind}_returning", False))
+
+
+def _commit_detached(db: Session, obj):
+    """Commit and return `obj` detached, keeping the state loaded by RETURNING."""
+    if obj is not None:
+        db.expunge(obj)
+    db.commit()
+    return obj
+
+
+def _insert_returning(db: Session, model, values: dict):
+    """INSERT one row and load the mapped object from RETURNING."""
+    return db.scalars(insert(model).values(**values).returning(model)).one()
+
+
+def add_user(db: Session, email: str, password_hash: str) -> models.User:
+    """Insert a user row as given; a duplicate email raises IntegrityError (rolled back)."""
+    values = {"email": email, "password_hash": password_hash}
+    try:
+        if _supports_returning(db, "insert"):
+            user = _commit_detached(db, _insert_returning(db, models.User, values))
+        else:
+            user = models.User(**values)
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+    except IntegrityError:
+        db.rollback()
+        raise
+    invalidation.publish(invalidation.user_key(user.id))
+    return user
+
+
 def create_user(db: Session, user_in: schemas.UserCreate) -> models.User:
     """Create a new user hashing the provided password."""
     email_norm = (user_in.email or "").strip().lower()
-    user = models.User(
-        email=email_norm,
-        password_hash=utils.hash_password(user_in.password),
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+    return add_user(db, email_norm, utils.hash_password(user_in.password))
 
 
 def get_user_by_handle(db: Session, handle: str) -> models.User | None:
@@ -53,42 +94,135 @@ def get_user_by_handle(db: Session, handle: str) -> models.User | None:
     return db.query(models.User).filter(models.User.email.ilike(f"{norm}@%")).first()
 
 
+def delete_user(
+    db: Session,
+    user_id: int,
+    batch_size: int = 5000,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> dict | None:
+    """Delete a user and everything they own, in batches; return a summary or None.
+
+    Tasks (hot and archived) are removed `batch_size` rows per transaction so a
+    very large account never holds long locks; `progress(done, total)` is
+    called after each batch. The final user DELETE relies on the FK cascade
+    and never loads the account's tasks into memory.
+    """
+    user = db.get(models.User, user_id)
+    if user is None:
+        return None
+
+    tables = [models.Task.__table__, models.TaskArchive.__table__]
+    total = sum(
+        db.scalar(select(func.count()).select_from(t).where(t.c.owner_id == user_id)) or 0
+        for t in tables
+    )
+    done = 0
+    batches = 0
+    for table in tables:
+        while True:
+            ids = db.scalars(
+                select(table.c.id).where(table.c.owner_id == user_id).limit(batch_size)
+            ).all()
+            if not ids:
+                break
+            db.execute(delete(table).where(table.c.id.in_(ids)))
+            db.commit()
+            done += len(ids)
+            batches += 1
+            logger.info("account deletion user_id=%s: %d/%d rows removed", user_id, done, total)
+            if progress:
+                progress(done, total)
+
+    db.execute(delete(models.User.__table__).where(models.User.__table__.c.id == user_id))
+    db.commit()
+    invalidation.publish(invalidation.user_key(user_id), invalidation.tasks_key(user_id))
+    if user in db:
+        db.expunge(user)
+    return {"user_id": user_id, "tasks_deleted": done, "batches": batches}
+
+
 # -----------------------------------------------------------------------------
 # TASKS
 # -----------------------------------------------------------------------------
+def _is_done(status) -> bool:
+    """True for the statuses counted as completed (see models.DONE_STATUSES)."""
+    return status in models.DONE_STATUSES
+
+
+def _completed_at_for(status, now: dt.datetime):
+    """`completed_at` for a full update setting `status`, as a SQL expression.
+
+    Stamped with `now` when the task becomes done, kept while it stays done
+    (any other edit leaves its completion day alone) and cleared on reopening.
+    """
+    if not _is_done(status):
+        return None
+    already_done = models.Task.status.in_(models.DONE_STATUSES)
+    return case((already_done, func.coalesce(models.Task.completed_at, models.Task.updated_at)), else_=now)
+
+
 def create_task(db: Session, task_in: schemas.TaskCreate, owner_id: int) -> models.Task:
     """Create a task and replicate it to mentioned users via @handle."""
-    obj = models.Task(
-        text=task_in.text,
-        status=task_in.status,
-        tags=utils.extract_tags(task_in.text),
-        owner_id=owner_id,
-        created_at=dt.datetime.now(dt.timezone.utc),
-    )
-    db.add(obj)
-    db.commit()
-    db.refresh(obj)
+    tokens = utils.scan_tokens(task_in.text)
+    tags = utils.tags_from_tokens(tokens)
+    now = dt.datetime.now(dt.timezone.utc)
+    values = {
+        "text": task_in.text,
+        "status": task_in.status,
+        "tags": tags,
+        "owner_id": owner_id,
+        "created_at": now,
+        "completed_at": now if _is_done(task_in.status) else None,
+    }
+    returning = _supports_returning(db, "insert")
+    if returning:
+        obj = _commit_detached(db, _insert_returning(db, models.Task, values))
+    else:
+        obj = models.Task(**values)
+        db.add(obj)
+        db.commit()
+        db.refresh(obj)
+    invalidation.publish(invalidation.tasks_key(owner_id))
+    events.publish_task(events.CREATED, obj)
 
-    mention_pattern = re.compile(r"@([A-Za-z0-9._-]+)")
-    handles = set(m.group(1).lower() for m in mention_pattern.finditer(task_in.text or ""))
+    handles = utils.mention_handles(tokens)
 
     if handles:
         owner = db.query(models.User).filter(models.User.id == owner_id).first()
         owner_handle = (owner.email.split("@", 1)[0].lower() if owner and owner.email else "")
+        target_ids = []
         for handle in handles:
             if handle == owner_handle:
                 continue
             target_user = get_user_by_handle(db, handle)
-            if not target_user:
-                continue
-            replica = models.Task(
-                text=task_in.text,
-                status=task_in.status,
-                tags=utils.extract_tags(task_in.text),
-                owner_id=target_user.id,
-            )
-            db.add(replica)
-        db.commit()
+            if target_user:
+                target_ids.append(target_user.id)
+        rows = [
+            {
+                "text": task_in.text,
+                "status": task_in.status,
+                "tags": list(tags),
+                "owner_id": uid,
+                "completed_at": values["completed_at"],
+            }
+            for uid in target_ids
+        ]
+        if rows and returning:
+            replicas = db.scalars(insert(models.Task).returning(models.Task), rows).all()
+            for replica in replicas:
+                db.expunge(replica)
+            db.commit()
+        elif rows:
+            replicas = [models.Task(**row) for row in rows]
+            db.add_all(replicas)
+            db.commit()
+            for replica in replicas:
+                db.refresh(replica)
+        else:
+            replicas = []
+        for replica in replicas:
+            events.publish_task(events.CREATED, replica)
+        invalidation.publish(*(invalidation.tasks_key(r.owner_id) for r in replicas))
 
     return obj
 
@@ -100,55 +234,141 @@ def get_task(db: Session, task_id: int) -> models.Task | None:
 
 def update_task(db: Session, task_id: int, task_in: schemas.TaskUpdate) -> models.Task | None:
     """Update task text, status, and tags; return the updated task or None."""
+    now = dt.datetime.now(dt.timezone.utc)
+    values = {
+        "text": task_in.text,
+        "status": task_in.status,
+        "tags": utils.extract_tags(task_in.text),
+        "updated_at": now,
+        "completed_at": _completed_at_for(task_in.status, now),
+    }
+    if _supports_returning(db, "update"):
+        obj = db.scalars(
+            update(models.Task)
+            .where(models.Task.id == task_id)
+            .values(**values)
+            .returning(models.Task)
+            .execution_options(populate_existing=True)
+        ).first()
+        obj = _commit_detached(db, obj)
+    else:
+        obj = get_task(db, task_id)
+        if not obj:
+            return None
+        for key, value in values.items():
+            setattr(obj, key, value)
+        db.commit()
+        db.refresh(obj)
+    if obj is not None:
+        invalidation.publish(invalidation.tasks_key(obj.owner_id))
+    events.publish_task(events.UPDATED, obj)
+    return obj
+
+
+def patch_task(db: Session, task_id: int, changes: dict) -> models.Task | None:
+    """Apply a partial update, writing only columns whose value actually changes.
+
+    Tags are re-extracted only when the text changes, and a no-op patch issues no
+    UPDATE at all. Returns the (possibly unchanged) task, or None if it does not exist.
+    """
     obj = get_task(db, task_id)
     if not obj:
         return None
-    obj.text = task_in.text
-    obj.status = task_in.status
-    obj.tags = utils.extract_tags(task_in.text)
-    db.commit()
-    db.refresh(obj)
+    values = {k: v for k, v in changes.items() if v is not None and getattr(obj, k) != v}
+    if "text" in values:
+        values["tags"] = utils.extract_tags(values["text"])
+    if not values:
+        return obj
+    # Microsecond stamp (server now() may be whole seconds): row fragments are cached by it.
+    values["updated_at"] = dt.datetime.now(dt.timezone.utc)
+    if "status" in values and _is_done(values["status"]) != _is_done(obj.status):
+        values["completed_at"] = values["updated_at"] if _is_done(values["status"]) else None
+    if _supports_returning(db, "update"):
+        updated = db.scalars(
+            update(models.Task)
+            .where(models.Task.id == task_id)
+            .values(**values)
+            .returning(models.Task)
+            .execution_options(populate_existing=True)
+        ).first()
+        obj = _commit_detached(db, updated)
+    else:
+        for key, value in values.items():
+            setattr(obj, key, value)
+        db.commit()
+        db.refresh(obj)
+    if obj is not None:
+        invalidation.publish(invalidation.tasks_key(obj.owner_id))
+    events.publish_task(events.UPDATED, obj)
     return obj
 
 
 def delete_task(db: Session, task_id: int) -> bool:
     """Delete a task by ID; return True if it existed and was deleted."""
-    obj = get_task(db, task_id)
-    if not obj:
-        return False
-    db.delete(obj)
-    db.commit()
+    if _supports_returning(db, "delete"):
+        deleted = db.execute(
+            delete(models.Task).where(models.Task.id == task_id).returning(models.Task.owner_id)
+        ).first()
+        db.commit()
+        if deleted is None:
+            return False
+        owner_id = deleted.owner_id
+    else:
+        obj = get_task(db, task_id)
+        if not obj:
+            return False
+        owner_id = obj.owner_id
+        db.delete(obj)
+        db.commit()
+    invalidation.publish(invalidation.tasks_key(owner_id))
+    events.publish_deleted(owner_id, task_id)
     return True
 
 
-def list_tasks_page(
-    db, owner_id, limit, offset, status, order_by, order_dir, search=None
-):
-    """List tasks with optional filters and pagination, preserving original logic."""
-    q = db.query(models.Task)
+def _task_source(include_archived: bool = False):
+    """Return the Task entity, or Task mapped over `tasks UNION ALL tasks_archive`."""
+    if not include_archived:
+        return models.Task
+    names = [c.name for c in models.Task.__table__.columns]
+    hot = select(*[models.Task.__table__.c[n] for n in names])
+    cold = select(*[models.TaskArchive.__table__.c[n] for n in names])
+    return aliased(models.Task, union_all(hot, cold).subquery("tasks_all"))
+
+
+def _tasks_query(db, owner_id, status, order_by, order_dir, search=None, include_archived=False):
+    """Build the filtered and ordered task query shared by listings and exports."""
+    T = _task_source(include_archived)
+    q = db.query(T)
 
     if owner_id is not None:
-        q = q.filter(models.Task.owner_id == owner_id)
+        q = q.filter(T.owner_id == owner_id)
     if status:
-        q = q.filter(models.Task.status == status)
+        q = q.filter(T.status == status)
     if search:
         like = f"%{search.strip()}%"
-        q = q.filter(models.Task.text.ilike(like))
+        q = q.filter(T.text.ilike(like))
 
     desc_dir = (order_dir or "").lower() == "desc"
 
     if (order_by or "").lower() == "done":
-        is_done = case((models.Task.status == "DONE", 1), else_=0)
+        is_done = case((T.status == "DONE", 1), else_=0)
         primary = desc(is_done) if desc_dir else asc(is_done)
-        secondary = desc(models.Task.created_at) if desc_dir else asc(models.Task.created_at)
-        tertiary = desc(models.Task.id) if desc_dir else asc(models.Task.id)
+        secondary = desc(T.created_at) if desc_dir else asc(T.created_at)
+        tertiary = desc(T.id) if desc_dir else asc(T.id)
         q = q.order_by(primary, secondary, tertiary)
     else:
-        col = getattr(models.Task, order_by, models.Task.created_at)
+        col = getattr(T, order_by, T.created_at)
         primary = desc(col) if desc_dir else asc(col)
-        tertiary = desc(models.Task.id) if desc_dir else asc(models.Task.id)
+        tertiary = desc(T.id) if desc_dir else asc(T.id)
         q = q.order_by(primary, tertiary)
+    return q
 
+
+def list_tasks_page(
+    db, owner_id, limit, offset, status, order_by, order_dir, search=None, include_archived=False
+):
+    """List tasks with optional filters and pagination; archived tasks only when asked."""
+    q = _tasks_query(db, owner_id, status, order_by, order_dir, search, include_archived)
     total = q.count()
     items = q.limit(limit).offset(offset).all()
     return schemas.PageTasks(
@@ -157,22 +377,68 @@ def list_tasks_page(
     )
 
 
-def list_tasks_for_export(db, owner_id, status, order_by, order_dir, search=None):
-    """Return all matching tasks for export, preserving original selection logic."""
-    q = db.query(models.Task)
-    desc_dir = (order_dir or "").lower() == "desc"
+# Facets only change when the owner's tasks do, so they share the listing's invalidation key.
+_facet_cache = invalidation.bus.register(
+    LocalCache("tag_facets", max_entries=settings.FACET_CACHE_SIZE, ttl=settings.FACET_CACHE_TTL_SECONDS)
+)
 
-    if (order_by or "").lower() == "done":
-        is_done = case((models.Task.status == "DONE", 1), else_=0)
-        q = q.order_by(
-            desc(is_done) if desc_dir else asc(is_done),
-            desc(models.Task.created_at) if desc_dir else asc(models.Task.created_at),
-            desc(models.Task.id) if desc_dir else asc(models.Task.id),
+
+def _is_facet_tag(value):
+    """Only #tags and @mentions are facets; URLs and emails in `tags` are not."""
+    return or_(value.like("#%"), value.like("@%"))
+
+
+def tag_facets(db, owner_id, status=None, search=None, include_archived=False, limit=20):
+    """Return the `limit` most common #tags/@mentions among tasks matching the listing filter.
+
+    Counts are a grouped aggregate over the JSON `tags` array. The unfiltered
+    per-owner case reads the maintained `task_tag_counts` table instead.
+    Results are cached per owner and filter until the owner's tasks change.
+    """
+    search = (search or "").strip() or None
+    key = f"{owner_id}|{status or ''}|{search or ''}|{int(include_archived)}|{limit}"
+    if owner_id is not None:
+        cached = _facet_cache.get(key)
+        if cached is not None:
+            return cached
+
+    if owner_id is not None and not status and not search and not include_archived:
+        C = models.TaskTagCount
+        stmt = (
+            select(C.tag, C.count)
+            .where(C.owner_id == owner_id, C.count > 0, _is_facet_tag(C.tag))
+            .order_by(C.count.desc(), C.tag)
         )
     else:
-        col = getattr(models.Task, order_by, models.Task.created_at)
-        q = q.order_by(
-            desc(col) if desc_dir else asc(col),
-            desc(models.Task.id) if desc_dir else asc(models.Task.id),
+        filtered = (
+            _tasks_query(db, owner_id, status, "created_at", "desc", search, include_archived)
+            .order_by(None)
+            .subquery("filtered")
+        )
+        elements = stats.json_elements(db, filtered.c.tags)
+        n = func.count().label("count")
+        stmt = (
+            select(elements.c.value, n)
+            .select_from(filtered)
+            .join(elements, true())
+            .where(_is_facet_tag(elements.c.value))
+            .group_by(elements.c.value)
+            .order_by(n.desc(), elements.c.value)
         )
-    return q.all()
+    facets = [schemas.TagCount(tag=tag, count=count) for tag, count in db.execute(stmt.limit(limit)).all()]
+
+    if owner_id is not None:
+        # Anonymous listings span every owner, and no single key invalidates them.
+        _facet_cache.set(key, facets, tags=[invalidation.tasks_key(owner_id)])
+    return facets
+
+
+def list_tasks_for_export(
+    db, owner_id, status, order_by, order_dir, search=None, include_archived=False
+):
+    """Return every task matching the listing filters, for export.
+
+    Owner, status and search apply the same way with or without
+    `include_archived`, which only adds the owner's matching archived tasks.
+    """
+    return _tasks_query(db, owner_id, status, order_by, order_dir, search, include_archived).all()
@@ -3,14 +3,38 @@
 This module sets up the SQLAlchemy engine, declarative base, and session factory.
 It supports both persistent and in-memory SQLite databases, as well as any
 other backend configured via the `DATABASE_URL` environment variable.
+
+Pooled engines use `InstrumentedQueuePool`, sized from `Settings` and reporting
+checkout waits, timeouts, and in-use/overflow gauges to the metrics registry.
+File-backed SQLite can opt into a production profile (WAL, relaxed sync, mmap,
+larger cache, busy timeout) applied by a connect event.
+
+When `DATABASE_REPLICA_URLS` is set, `RoutingSession` sends the SELECTs of
+sessions flagged read-only to a replica (round-robin or least-loaded), keeps
+every write on the primary, and `WriteTracker` pins users to the primary for a
+short read-your-writes window after their own mutations.
+
+A `statement_timeout` (seconds) set in a session's `info`, or passed as an
+execution option, bounds how long each of its statements may run: `SET LOCAL
+statement_timeout` on PostgreSQL, a progress-handler interrupt on SQLite.
+`deps` sets it per route class; `is_statement_timeout` recognizes the error.
 """
 
+import itertools
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
-from sqlalchemy.pool import StaticPool
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from sqlalchemy.pool import Pool, QueuePool, StaticPool
 from dotenv import load_dotenv
 
+from . import metrics
+from .settings import settings
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
@@ -21,23 +45,348 @@ class Base(DeclarativeBase):
     pass
 
 
-def _make_engine(url: str):
+# -----------------------------------------------------------------------------
+# Pool metrics
+# -----------------------------------------------------------------------------
+POOL_CHECKOUT_WAIT = metrics.histogram(
+    "tasklist_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection.",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+POOL_TIMEOUTS = metrics.counter(
+    "tasklist_db_pool_timeouts",
+    "Checkouts that gave up after DB_POOL_TIMEOUT seconds.",
+    ["pool"],
+)
+POOL_IN_USE = metrics.gauge(
+    "tasklist_db_pool_in_use", "Connections currently checked out.", ["pool"]
+)
+POOL_OVERFLOW = metrics.gauge(
+    "tasklist_db_pool_overflow", "Connections open beyond DB_POOL_SIZE.", ["pool"]
+)
+POOL_SIZE = metrics.gauge(
+    "tasklist_db_pool_size", "Configured number of persistent connections.", ["pool"]
+)
+POOL_IDLE = metrics.gauge(
+    "tasklist_db_pool_idle", "Connections sitting idle in the pool.", ["pool"]
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout latency, timeouts, and occupancy gauges."""
+
+    label = "primary"
+
+    def connect(self):
+        """Check out a connection, timing the wait and counting timeouts."""
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc(pool=self.label)
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start, pool=self.label)
+
+    def recreate(self):
+        """Recreate the pool (e.g. on dispose) keeping its metrics label."""
+        new = super().recreate()
+        new.label = self.label
+        _register_pool_gauges(new)
+        return new
+
+
+def _register_pool_gauges(pool: InstrumentedQueuePool) -> None:
+    """Expose the pool's live occupancy through callback gauges."""
+    POOL_IN_USE.set_function(pool.checkedout, pool=pool.label)
+    POOL_OVERFLOW.set_function(lambda: max(pool.overflow(), 0), pool=pool.label)
+    POOL_SIZE.set_function(pool.size, pool=pool.label)
+    POOL_IDLE.set_function(pool.checkedin, pool=pool.label)
+
+
+def _pool_kwargs() -> dict:
+    """Return the pool sizing arguments configured in `Settings`."""
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+# -----------------------------------------------------------------------------
+# SQLite production profile
+# -----------------------------------------------------------------------------
+def sqlite_profile_pragmas() -> list[str]:
+    """Return the PRAGMA statements of the configured SQLite profile."""
+    return [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}",
+        f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}",
+        f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}",
+    ]
+
+
+def _apply_sqlite_profile(eng) -> None:
+    """Run the profile PRAGMAs on every new DBAPI connection of `eng`."""
+    pragmas = sqlite_profile_pragmas()
+
+    @event.listens_for(eng, "connect")
+    def _on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        try:
+            for stmt in pragmas:
+                cur.execute(stmt)
+        finally:
+            cur.close()
+
+
+def _enable_sqlite_foreign_keys(eng) -> None:
+    """Make SQLite enforce FKs so `ON DELETE CASCADE` behaves as on Postgres."""
+
+    @event.listens_for(eng, "connect")
+    def _on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        try:
+            cur.execute("PRAGMA foreign_keys=ON")
+        finally:
+            cur.close()
+
+
+def _make_engine(url: str, label: str = "primary", sqlite_profile: bool | None = None):
     """Create an SQLAlchemy engine depending on the database URL."""
     if url.startswith("sqlite"):
         connect_args = {"check_same_thread": False}
         if url.endswith(":///:memory:"):
-            return create_engine(
+            eng = create_engine(
                 url,
                 connect_args=connect_args,
                 poolclass=StaticPool,
             )
-        return create_engine(
-            url,
-            connect_args=connect_args,
-            pool_pre_ping=True,
-        )
-    return create_engine(url, pool_pre_ping=True)
+            _enable_sqlite_foreign_keys(eng)
+            return eng
+        eng = create_engine(url, connect_args=connect_args, **_pool_kwargs())
+        _enable_sqlite_foreign_keys(eng)
+        use_profile = settings.SQLITE_PERFORMANCE_PROFILE if sqlite_profile is None else sqlite_profile
+        if use_profile:
+            _apply_sqlite_profile(eng)
+    else:
+        eng = create_engine(url, **_pool_kwargs())
+    eng.pool.label = label
+    _register_pool_gauges(eng.pool)
+    return eng
+
+
+# -----------------------------------------------------------------------------
+# Statement timeouts
+# -----------------------------------------------------------------------------
+# SQLite calls the progress handler every N virtual-machine instructions.
+_SQLITE_PROGRESS_STEPS = 10_000
+
+STATEMENT_TIMEOUTS = metrics.counter(
+    "tasklist_statement_timeouts",
+    "Statements cancelled by their route class's statement timeout.",
+    ["route_class"],
+)
+
+
+@contextmanager
+def statement_timeout(session: Session, seconds: float | None):
+    """Bound every statement `session` runs inside the block to `seconds` (None/0: unbounded)."""
+    previous = session.info.get("statement_timeout")
+    session.info["statement_timeout"] = seconds
+    try:
+        yield
+    finally:
+        session.info["statement_timeout"] = previous
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _propagate_statement_timeout(orm_execute_state):
+    """Carry the session's `info["statement_timeout"]` to each statement as an execution option."""
+    seconds = orm_execute_state.session.info.get("statement_timeout")
+    if seconds and "statement_timeout" not in orm_execute_state.execution_options:
+        orm_execute_state.update_execution_options(statement_timeout=seconds)
+
+
+def _sqlite_deadline_passed(info: dict) -> int:
+    """SQLite progress handler: a non-zero return interrupts the running statement."""
+    deadline = info.get("statement_deadline")
+    return int(deadline is not None and time.monotonic() > deadline)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _arm_statement_timeout(conn, cursor, statement, parameters, context, executemany):
+    """Apply the `statement_timeout` execution option (seconds) to the statement about to run.
+
+    PostgreSQL gets `SET LOCAL statement_timeout` once per transaction and value.
+    SQLite gets a per-statement deadline checked by a progress handler, which
+    is installed once per connection and is a no-op while no deadline is set.
+    """
+    seconds = context.execution_options.get("statement_timeout") if context is not None else None
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        info = conn.info
+        if "statement_deadline" not in info:
+            conn.connection.driver_connection.set_progress_handler(
+                lambda: _sqlite_deadline_passed(info), _SQLITE_PROGRESS_STEPS
+            )
+        info["statement_deadline"] = time.monotonic() + seconds if seconds else None
+    elif dialect == "postgresql":
+        ms = max(1, int(seconds * 1000)) if seconds else 0
+        if conn.info.get("statement_timeout_ms", 0) != ms and conn.in_transaction():
+            cursor.execute(f"SET LOCAL statement_timeout = {ms}")
+            conn.info["statement_timeout_ms"] = ms
+
+
+def _disarm_statement_timeout(info: dict) -> None:
+    """Drop an armed timeout so COMMIT/ROLLBACK and the next checkout never inherit it."""
+    info.pop("statement_timeout_ms", None)  # `SET LOCAL` ends with the transaction anyway
+    if info.get("statement_deadline") is not None:
+        info["statement_deadline"] = None
+
+
+@event.listens_for(Engine, "commit")
+@event.listens_for(Engine, "rollback")
+def _disarm_on_transaction_end(conn):
+    _disarm_statement_timeout(conn.info)
+
+
+@event.listens_for(Pool, "reset")
+def _disarm_on_reset(_dbapi_conn, record, _reset_state):
+    if record is not None:
+        _disarm_statement_timeout(record.info)
+
+
+@event.listens_for(Pool, "checkin")
+def _disarm_on_checkin(_dbapi_conn, record):
+    if record is not None:
+        _disarm_statement_timeout(record.info)
+
+
+def is_statement_timeout(error: BaseException) -> bool:
+    """Return True if `error` is a statement cancelled by a statement timeout."""
+    orig = getattr(error, "orig", error)
+    if getattr(orig, "sqlstate", None) == "57014" or getattr(orig, "pgcode", None) == "57014":
+        return True  # PostgreSQL query_canceled
+    return type(orig).__name__ == "OperationalError" and "interrupted" in str(orig)
+
+
+# -----------------------------------------------------------------------------
+# Read replicas
+# -----------------------------------------------------------------------------
+class ReplicaSet:
+    """Pick a replica engine per session using round-robin or least-loaded order."""
+
+    def __init__(self, engines: list, strategy: str = "round_robin") -> None:
+        """Initialize with replica engines and a selection strategy."""
+        self.engines = list(engines)
+        self.strategy = strategy
+        self._counter = itertools.count()
+
+    def __bool__(self) -> bool:
+        """Return True when at least one replica is configured."""
+        return bool(self.engines)
+
+    def choose(self):
+        """Return the replica engine the next read-only session should use."""
+        if self.strategy == "least_loaded":
+            return min(self.engines, key=lambda e: getattr(e.pool, "checkedout", lambda: 0)())
+        return self.engines[next(self._counter) % len(self.engines)]
+
+
+class WriteTracker:
+    """Remember who wrote recently so their reads can stay on the primary."""
+
+    def __init__(self, window_seconds: float, max_entries: int = 100_000) -> None:
+        """Initialize with the read-your-writes window and a size bound."""
+        self.window = window_seconds
+        self.max_entries = max_entries
+        self._until: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, key: str) -> None:
+        """Record a write by `key`, starting its read-your-writes window."""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._until) >= self.max_entries:
+                self._until = {k: t for k, t in self._until.items() if t > now}
+            self._until[key] = now + self.window
+
+    def recently_wrote(self, key: str | None) -> bool:
+        """Return True if `key` is still inside its read-your-writes window."""
+        if not key:
+            return False
+        until = self._until.get(key)
+        return until is not None and until > time.monotonic()
+
+
+class RoutingSession(Session):
+    """Session that routes read-only SELECTs to a replica and everything else to the primary.
+
+    A session is eligible for replica reads only when `info["read_only"]` is set.
+    The replica is chosen once per session so its reads see one consistent
+    snapshot; after the session writes anything, it reads from the primary.
+    """
+
+    def __init__(self, *args, replicas: ReplicaSet | None = None, **kwargs) -> None:
+        """Initialize the session with the replica set it may read from."""
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        """Return a replica for read-only SELECTs, otherwise the primary bind."""
+        if (
+            self.replicas
+            and self.info.get("read_only")
+            and not self.info.get("wrote")
+            and not self._flushing
+            and getattr(clause, "is_select", False)
+        ):
+            bind = self.info.get("replica")
+            if bind is None:
+                bind = self.info["replica"] = self.replicas.choose()
+            return bind
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _note_orm_dml(orm_execute_state):
+    """Flag the session as written when it runs ORM-enabled INSERT/UPDATE/DELETE."""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _note_flush(session, _flush_context):
+    """Flag the session as written after any flush."""
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _track_commit(session):
+    """Open the read-your-writes window for the session's user after a write commits."""
+    if session.info.get("wrote"):
+        key = session.info.get("rw_key")
+        if key:
+            write_tracker.mark(key)
 
 
 engine = _make_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+replicas = ReplicaSet(
+    [_make_engine(url, label=f"replica{i}") for i, url in enumerate(settings.DATABASE_REPLICA_URLS)],
+    strategy=settings.REPLICA_STRATEGY,
+)
+write_tracker = WriteTracker(settings.READ_YOUR_WRITES_SECONDS)
+SessionLocal = sessionmaker(
+    bind=engine,
+    class_=RoutingSession,
+    replicas=replicas,
+    autoflush=False,
+    autocommit=False,
+)
@@ -0,0 +1,201 @@
+"""Stale-while-revalidate for task listings when the database is under pressure.
+
+A slow database or an exhausted pool makes every `/tasks` and `/tasks-ui`
+request wait for a connection and then for its query. `StaleListingMiddleware`
+gives each listing request a latency budget (`LISTING_LATENCY_BUDGET_SECONDS`):
+
+- Within the budget the response is passed through. A 200 is remembered as the
+  last good page for that caller and query, in a bounded per-worker cache.
+- Past the budget, or on a 503/504 (pool, statement timeout or admission
+  control), the last good page is served instead, marked with `Warning: 110`
+  and `Age`. The real request keeps running in the background and refreshes
+  the cache.
+- Identical requests that arrive while one is in flight wait for that one
+  rather than queueing for connections of their own.
+
+Without a remembered page the request waits and answers as it would have.
+Entries are keyed by the caller's token (bearer header or auth cookie), so a
+page is only ever served back to the session that fetched it. The token's
+signature and expiry are checked without the database, and a page is never
+replayed after its token expires. Pages are tagged with their owner's
+`user:<id>` and `tasks:<id>` keys on the invalidation bus: account deletion
+drops them, and so does the owner's next write, so a degraded response never
+hides the caller's own change. Anonymous requests and requests with an
+invalid token are passed through untouched.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from jose import JWTError, jwt
+from starlette.requests import Request
+
+from . import invalidation, metrics
+from .deps import _extract_token_from_request
+from .cache import LocalCache
+from .settings import settings
+
+STALE_RESPONSES = metrics.counter(
+    "tasklist_stale_responses",
+    "Listing responses served from the last good page (reason: slow, error).",
+    ["route", "reason"],
+)
+COALESCED_REQUESTS = metrics.counter(
+    "tasklist_coalesced_requests",
+    "Listing requests that joined an identical in-flight request.",
+    ["route"],
+)
+
+LISTING_PATHS = ("/tasks", "/tasks-ui")
+# Headers that describe one particular response, not the page it carries.
+_NOT_REPLAYED = {b"date", b"set-cookie", b"server-timing"}
+
+
+class _Captured:
+    """A buffered downstream response."""
+
+    def __init__(self) -> None:
+        """Start empty; filled by the capturing `send`."""
+        self.status = 500
+        self.headers: List[Tuple[bytes, bytes]] = []
+        self.body = b""
+        self.route: Any = None
+        self.owner_id: Optional[int] = None
+        self.stored_at = 0.0
+        self.expires_at = 0.0  # the fetching token's `exp` (epoch seconds)
+
+    async def send_to(self, send, extra_headers: List[Tuple[bytes, bytes]] = ()) -> None:
+        """Replay the response on `send`."""
+        await send({"type": "http.response.start", "status": self.status, "headers": [*self.headers, *extra_headers]})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+def listing_key(scope) -> Optional[Tuple[str, float]]:
+    """Return (cache key, token expiry) for a listing request.
+
+    The key covers the caller's token, the path and the normalized query.
+    Returns None without a token, or if it is invalid or expired.
+    """
+    request = Request(scope)
+    token = _extract_token_from_request(request, request.headers.get("authorization"))
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:  # includes an expired signature
+        return None
+    if not isinstance(payload.get("exp"), (int, float)):
+        return None
+    query = urlencode(sorted(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)))
+    key = hashlib.sha256(f"{token}\0{scope['path']}?{query}".encode()).hexdigest()
+    return key, float(payload["exp"])
+
+
+class StaleListingMiddleware:
+    """ASGI middleware serving the last good listing page when the fresh one is late."""
+
+    def __init__(self, app, paths=LISTING_PATHS) -> None:
+        """Wrap the downstream ASGI app for GET requests to `paths`."""
+        self.app = app
+        self.paths = frozenset(paths)
+        self.pages = invalidation.bus.subscribe(LocalCache(
+            "stale_listings",
+            max_entries=settings.LISTING_STALE_CACHE_SIZE,
+            ttl=settings.LISTING_STALE_MAX_SECONDS,
+        ))
+        self._inflight: Dict[str, "asyncio.Task[_Captured]"] = {}
+
+    async def __call__(self, scope, receive, send):
+        """Answer one listing request within the budget; pass everything else through."""
+        budget = settings.LISTING_LATENCY_BUDGET_SECONDS
+        keyed = None
+        if scope["type"] == "http" and scope["method"] == "GET" and scope["path"] in self.paths and budget > 0:
+            keyed = listing_key(scope)
+        if keyed is None:
+            await self.app(scope, receive, send)
+            return
+        key, expires_at = keyed
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(scope, receive, expires_at))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._finished(key, done))
+        else:
+            COALESCED_REQUESTS.inc(route=scope["path"])
+
+        # asyncio.wait never cancels the fetch: past the budget it carries on as the refresh.
+        finished, _ = await asyncio.wait({task}, timeout=budget)
+        if not finished:
+            stale = self._remembered(key)
+            if stale is not None:
+                await self._send_stale(scope, send, stale, "slow")
+                return
+            await asyncio.wait({task})
+        fresh = task.result()
+        if fresh.status in (503, 504):
+            stale = self._remembered(key)
+            if stale is not None:
+                await self._send_stale(scope, send, stale, "error")
+                return
+        if fresh.route is not None:
+            scope.setdefault("route", fresh.route)
+        await fresh.send_to(send)
+
+    def _remembered(self, key: str) -> Optional[_Captured]:
+        """The remembered page for `key`, unless its token has expired since."""
+        page = self.pages.get(key)
+        if page is not None and page.expires_at <= time.time():
+            self.pages.evict(key)
+            return None
+        return page
+
+    async def _fetch(self, scope, receive, expires_at: float) -> _Captured:
+        """Run the downstream app and buffer its response."""
+        captured = _Captured()
+        captured.expires_at = expires_at
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                captured.status = message["status"]
+                captured.headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                captured.body += message.get("body", b"")
+
+        await self.app(scope, receive, capture)
+        captured.route = scope.get("route")
+        # Set by the listing routes; a page whose owner is unknown can't be evicted, so it isn't kept.
+        captured.owner_id = scope.get("state", {}).get("listing_owner_id")
+        return captured
+
+    def _finished(self, key: str, task: "asyncio.Task[_Captured]") -> None:
+        """Forget the in-flight fetch and remember its page if it is a good one."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        page = task.result()
+        if page.status != 200 or page.owner_id is None or any(name == b"set-cookie" for name, _ in page.headers):
+            return
+        page.stored_at = time.monotonic()
+        self.pages.set(key, page, tags=[invalidation.user_key(page.owner_id), invalidation.tasks_key(page.owner_id)])
+
+    async def _send_stale(self, scope, send, page: _Captured, reason: str) -> None:
+        """Serve a remembered page, marked as stale."""
+        if page.route is not None:
+            scope.setdefault("route", page.route)
+        STALE_RESPONSES.inc(route=scope["path"], reason=reason)
+        age = int(time.monotonic() - page.stored_at)
+        replay = _Captured()
+        replay.status = page.status
+        replay.body = page.body
+        replay.headers = [(name, value) for name, value in page.headers if name.lower() not in _NOT_REPLAYED]
+        await replay.send_to(send, [
+            (b"warning", b'110 - "Response is Stale"'),
+            (b"age", str(age).encode()),
+        ])
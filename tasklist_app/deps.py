@@ -2,6 +2,8 @@
 
 Provides:
 - get_db: scoped SQLAlchemy session generator.
+- get_read_db: the same session, flagged so its SELECTs may use a read replica.
+- get_listing_db / get_export_db: read sessions with their route class's statement timeout.
 - JWT extraction/decoding helpers supporting Authorization header and HttpOnly cookie.
 - get_current_user / get_current_user_optional: user resolvers for protected routes.
 """
@@ -13,19 +15,61 @@ from jose import JWTError, ExpiredSignatureError, jwt
 from sqlalchemy.orm import Session
 
 from . import models
-from .database import SessionLocal
+from .database import SessionLocal, replicas, write_tracker
 from .settings import settings
 
 
-def get_db():
+def get_db(request: Request):
     """Yield a SQLAlchemy session and ensure it is closed afterwards."""
     db = SessionLocal()
+    if replicas:
+        db.info["rw_key"] = _read_your_writes_key(request)
     try:
         yield db
     finally:
         db.close()
 
 
+def get_read_db(request: Request, db: Session = Depends(get_db)) -> Session:
+    """Return the request session, allowing replica reads unless the caller wrote recently."""
+    if replicas and not write_tracker.recently_wrote(db.info.get("rw_key")):
+        db.info["read_only"] = True
+    return db
+
+
+def statement_timeout_for(route_class: str) -> float:
+    """Return the statement timeout in seconds of a route class (listing, search, export, admin)."""
+    return {
+        "listing": settings.STATEMENT_TIMEOUT_LISTING_SECONDS,
+        "search": settings.STATEMENT_TIMEOUT_SEARCH_SECONDS,
+        "export": settings.STATEMENT_TIMEOUT_EXPORT_SECONDS,
+        "admin": settings.ADMIN_STATEMENT_TIMEOUT_SECONDS,
+    }[route_class]
+
+
+def _with_statement_timeout(request: Request, db: Session, route_class: str) -> Session:
+    """Bound the session's statements and note the route class for the timeout handler."""
+    request.state.route_class = route_class
+    db.info["statement_timeout"] = statement_timeout_for(route_class)
+    return db
+
+
+def get_listing_db(request: Request, db: Session = Depends(get_read_db)) -> Session:
+    """Read session for listings; a free-text search (`q`) gets the longer search timeout."""
+    return _with_statement_timeout(request, db, "search" if request.query_params.get("q") else "listing")
+
+
+def get_export_db(request: Request, db: Session = Depends(get_read_db)) -> Session:
+    """Read session for tenant-wide exports, with the export statement timeout."""
+    return _with_statement_timeout(request, db, "export")
+
+
+def _read_your_writes_key(request: Request) -> Optional[str]:
+    """Return the identity used for the read-your-writes window (the token subject)."""
+    token = _extract_token_from_request(request, request.headers.get("authorization"))
+    return _decode_token(token) if token else None
+
+
 def _extract_token_from_request(request: Request, authorization: Optional[str]) -> Optional[str]:
     """Extract a bearer token from the Authorization header or the auth cookie."""
     if authorization and authorization.startswith("Bearer "):
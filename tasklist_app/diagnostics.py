@@ -0,0 +1,170 @@
+"""Memory diagnostics for long-running workers.
+
+Backs the admin-only /admin/diagnostics/memory pages: process RSS, GC generation
+counts, live ORM objects held in session identity maps, and `tracemalloc`
+control (start/stop, baseline snapshot, top allocation sites, and the diff
+against the baseline). Everything is computed on demand; nothing runs unless an
+admin asks for it, and `tracemalloc` is off until started from the page.
+"""
+
+from __future__ import annotations
+
+import collections
+import gc
+import os
+import sys
+import threading
+import tracemalloc
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+try:  # not available on Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+# Frames from these files are tracemalloc/diagnostics overhead, not the app's.
+_IGNORED_FILES = (tracemalloc.__file__, __file__, "<frozen importlib._bootstrap>", "<unknown>")
+
+
+def rss_bytes() -> Optional[int]:
+    """Return the current resident set size of this process, if known."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Return the peak resident set size of this process, if known."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def gc_summary() -> dict:
+    """Return GC generation counts, thresholds and per-generation stats."""
+    return {
+        "counts": list(gc.get_count()),
+        "thresholds": list(gc.get_threshold()),
+        "generations": gc.get_stats(),
+        "garbage": len(gc.garbage),
+    }
+
+
+def live_orm_objects() -> dict:
+    """Count live sessions and the ORM objects in their identity maps, by class."""
+    sessions = 0
+    by_class: Dict[str, int] = collections.Counter()
+    for obj in gc.get_objects():
+        if isinstance(obj, Session):
+            sessions += 1
+            for instance in obj.identity_map.values():
+                by_class[type(instance).__name__] += 1
+    return {"sessions": sessions, "objects": sum(by_class.values()), "by_class": dict(by_class)}
+
+
+def _stat_dict(stat) -> dict:
+    """Serialize one `tracemalloc.Statistic` or `StatisticDiff`."""
+    frame = stat.traceback[0]
+    row = {
+        "site": f"{frame.filename}:{frame.lineno}",
+        "size_bytes": stat.size,
+        "count": stat.count,
+        "traceback": [f"{f.filename}:{f.lineno}" for f in stat.traceback],
+    }
+    if isinstance(stat, tracemalloc.StatisticDiff):
+        row["size_diff_bytes"] = stat.size_diff
+        row["count_diff"] = stat.count_diff
+    return row
+
+
+class MemoryDiagnostics:
+    """Thread-safe `tracemalloc` controller with a single baseline snapshot."""
+
+    def __init__(self) -> None:
+        """Start with tracing in whatever state the interpreter is in and no baseline."""
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        """Whether tracemalloc is currently tracing allocations."""
+        return tracemalloc.is_tracing()
+
+    @property
+    def has_baseline(self) -> bool:
+        """Whether a baseline snapshot is available for diffs."""
+        return self._baseline is not None
+
+    def start(self, nframes: int = 10) -> None:
+        """Start tracing allocations with `nframes` frames per traceback."""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(nframes)
+
+    def stop(self) -> None:
+        """Stop tracing and drop the baseline (it cannot be diffed anymore)."""
+        with self._lock:
+            tracemalloc.stop()
+            self._baseline = None
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        """Take a snapshot without the diagnostics' own allocations."""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not tracing; start it first")
+        snap = tracemalloc.take_snapshot()
+        return snap.filter_traces([tracemalloc.Filter(False, name) for name in _IGNORED_FILES])
+
+    def take_baseline(self) -> None:
+        """Store a snapshot to diff later ones against."""
+        snap = self._snapshot()
+        with self._lock:
+            self._baseline = snap
+
+    def top(self, limit: int = 20, key_type: str = "lineno", snapshot: Optional[tracemalloc.Snapshot] = None) -> List[dict]:
+        """Return the allocation sites holding the most memory right now."""
+        snapshot = snapshot or self._snapshot()
+        return [_stat_dict(s) for s in snapshot.statistics(key_type)[:limit]]
+
+    def diff(self, limit: int = 20, key_type: str = "lineno", snapshot: Optional[tracemalloc.Snapshot] = None) -> List[dict]:
+        """Return the sites whose allocations grew the most since the baseline."""
+        with self._lock:
+            baseline = self._baseline
+        if baseline is None:
+            raise RuntimeError("no baseline snapshot; take one first")
+        snapshot = snapshot or self._snapshot()
+        return [_stat_dict(s) for s in snapshot.compare_to(baseline, key_type)[:limit]]
+
+    def report(self, limit: int = 20) -> dict:
+        """Return the full memory report shown on the admin page."""
+        traced = tracemalloc.get_traced_memory() if self.tracing else (0, 0)
+        report = {
+            "pid": os.getpid(),
+            "rss_bytes": rss_bytes(),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "gc": gc_summary(),
+            "orm": live_orm_objects(),
+            "tracemalloc": {
+                "tracing": self.tracing,
+                "has_baseline": self.has_baseline,
+                "traced_bytes": traced[0],
+                "traced_peak_bytes": traced[1],
+                "overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+            },
+            "top": [],
+            "diff": [],
+        }
+        if self.tracing:
+            snapshot = self._snapshot()
+            report["top"] = self.top(limit, snapshot=snapshot)
+            if self.has_baseline:
+                report["diff"] = self.diff(limit, snapshot=snapshot)
+        return report
+
+
+memory = MemoryDiagnostics()
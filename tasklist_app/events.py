@@ -0,0 +1,129 @@
+"""In-process task change broker for the `/tasks/stream` Server-Sent Events feed.
+
+The crud layer publishes a delta after each committed write: a task was
+created (including the copies fanned out to mentioned users), updated, or
+deleted. The delta goes to every open stream of the task's owner. Writes run in
+the threadpool while streams live on the event loop, so `publish` hands events
+over with `call_soon_threadsafe`. Each stream has a bounded queue; a client
+that falls behind gets a single `resync` event instead of an unbounded backlog.
+
+The broker is per process. With several uvicorn workers, a client only sees
+changes made by the worker it is connected to, plus `resync` events.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional, Set
+
+from . import metrics, schemas
+from .settings import settings
+
+CREATED, UPDATED, DELETED, RESYNC = "created", "updated", "deleted", "resync"
+
+SSE_CONNECTIONS = metrics.gauge("tasklist_sse_connections", "Open /tasks/stream connections.", [])
+SSE_EVENTS = metrics.counter("tasklist_sse_events", "Task change events queued to streams.", ["type"])
+
+
+class Subscription:
+    """One open stream: a bounded queue owned by the event loop that serves it."""
+
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop, maxsize: int) -> None:
+        """Create the queue on `loop` for `user_id`'s stream."""
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        """Queue an event (runs on the loop); on overflow replace the backlog with `resync`."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": RESYNC})
+
+
+class TaskEventBroker:
+    """Fan task change events out to the subscribed streams of each user."""
+
+    def __init__(self, queue_size: int = 100) -> None:
+        """Initialize with the per-stream queue size."""
+        self.queue_size = queue_size
+        self._subs: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """Register a stream for `user_id` on the running event loop."""
+        sub = Subscription(user_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subs[user_id].add(sub)
+        SSE_CONNECTIONS.inc()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        """Remove a stream (idempotent)."""
+        with self._lock:
+            subs = self._subs.get(sub.user_id)
+            if not subs or sub not in subs:
+                return
+            subs.discard(sub)
+            if not subs:
+                del self._subs[sub.user_id]
+        SSE_CONNECTIONS.dec()
+
+    def has_subscribers(self, user_id: int) -> bool:
+        """Return True if `user_id` has at least one open stream."""
+        return bool(self._subs.get(user_id))
+
+    def publish(self, user_id: int, event: Dict[str, Any]) -> None:
+        """Send an event to every stream of `user_id`; safe to call from any thread."""
+        with self._lock:
+            subs = list(self._subs.get(user_id, ()))
+        if not subs:
+            return
+        event = {"id": next(self._ids), **event}
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, event)
+            except RuntimeError:  # the loop serving this stream is gone
+                self.unsubscribe(sub)
+                continue
+            SSE_EVENTS.inc(type=event["type"])
+
+
+broker = TaskEventBroker(queue_size=settings.SSE_QUEUE_SIZE)
+
+
+def publish_task(kind: str, task) -> None:
+    """Publish a created/updated delta for an ORM task to its owner's streams."""
+    if task is None or not broker.has_subscribers(task.owner_id):
+        return
+    payload = schemas.TaskOut.model_validate(task).model_dump(mode="json")
+    broker.publish(task.owner_id, {"type": kind, "task": payload})
+
+
+def publish_deleted(owner_id: Optional[int], task_id: int) -> None:
+    """Publish a deletion to the owner's streams."""
+    if owner_id is not None:
+        broker.publish(owner_id, {"type": DELETED, "task_id": task_id})
+
+
+def publish_resync(owner_id: int) -> None:
+    """Tell the owner's streams to reload (used after bulk changes)."""
+    broker.publish(owner_id, {"type": RESYNC})
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Encode one event in the `text/event-stream` wire format."""
+    lines = []
+    if "id" in event:
+        lines.append(f"id: {event['id']}")
+    lines.append("event: task")
+    lines.append(f"data: {json.dumps(event, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
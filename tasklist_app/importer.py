@@ -0,0 +1,312 @@
+"""Streaming bulk import of tasks from CSV, NDJSON and XLSX.
+
+Accepts the column layout produced by the export endpoints (`ID, Text, Status,
+Tags, Created At`) or, for NDJSON, objects shaped like `TaskOut`. Uploads are
+parsed row by row. Valid rows are buffered up to `batch_size`; tags are then
+extracted for the whole batch and the batch goes in with one executemany INSERT
+and one commit. Peak memory is therefore one batch plus the error list, which
+is capped.
+
+`ID` and `Tags` are ignored: imported tasks get new ids, and their tags are
+recomputed from the text, as `POST /tasks` does. Mentions are not fanned out,
+since teammates are expected to import their own tasks. Open `/tasks/stream`
+connections of the importer receive one `resync` event instead of per-row deltas.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import datetime as dt
+import json
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from . import events, invalidation, models, utils
+
+FORMATS = ("csv", "ndjson", "xlsx")
+TEXT_MAX_LENGTH = 10_000
+STATUSES = ("pending", "done")
+
+_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".xlsx": "xlsx"}
+_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
+}
+
+
+class ImportFormatError(ValueError):
+    """The upload cannot be parsed at all (unknown format, bad header, corrupt file)."""
+
+
+@dataclass
+class ImportResult:
+    """Outcome of one import."""
+
+    imported: int = 0
+    failed: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    errors_truncated: bool = False
+
+    def add_error(self, row: int, message: str, max_errors: int) -> None:
+        """Count a rejected row, keeping at most `max_errors` messages."""
+        self.failed += 1
+        if len(self.errors) < max_errors:
+            self.errors.append({"row": row, "error": message})
+        else:
+            self.errors_truncated = True
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str], explicit: Optional[str] = None) -> str:
+    """Pick the parser from an explicit `format`, the file extension, or the content type."""
+    if explicit:
+        fmt = explicit.lower()
+        if fmt not in FORMATS:
+            raise ImportFormatError(f"unsupported format {explicit!r}; use one of {', '.join(FORMATS)}")
+        return fmt
+    name = (filename or "").lower()
+    for ext, fmt in _EXTENSIONS.items():
+        if name.endswith(ext):
+            return fmt
+    ctype = (content_type or "").split(";", 1)[0].strip().lower()
+    if ctype in _CONTENT_TYPES:
+        return _CONTENT_TYPES[ctype]
+    raise ImportFormatError("cannot tell the file format; pass ?format=csv|ndjson|xlsx")
+
+
+def _key(name: Any) -> str:
+    """Normalize a header/field name: `Created At` -> `created_at`."""
+    return str(name or "").strip().lower().replace(" ", "_")
+
+
+# -----------------------------------------------------------------------------
+# Parsers: yield (row_number, {normalized_key: value})
+# -----------------------------------------------------------------------------
+def _decoded_lines(raw: IO[bytes]) -> Iterator[Tuple[Optional[str], Optional[UnicodeDecodeError]]]:
+    """Yield each line of a binary upload decoded as UTF-8 on its own (BOM tolerated).
+
+    A line that is not valid UTF-8 comes out as `(None, error)`; the lines
+    around it are unaffected.
+    """
+    for n, line in enumerate(iter(raw.readline, b"")):
+        if n == 0 and line.startswith(codecs.BOM_UTF8):
+            line = line[len(codecs.BOM_UTF8):]
+        try:
+            yield line.decode("utf-8"), None
+        except UnicodeDecodeError as e:
+            yield None, e
+
+
+class _CSVLines:
+    """Feed `csv.reader` decoded lines, standing in a blank line for an undecodable one.
+
+    The blank line keeps the reader's record count right; `error` tells the
+    caller to reject the record that contained it.
+    """
+
+    def __init__(self, raw: IO[bytes]) -> None:
+        """Read `raw` line by line."""
+        self._lines = _decoded_lines(raw)
+        self.error: Optional[UnicodeDecodeError] = None
+
+    def __iter__(self) -> "_CSVLines":
+        """Iterate over the decoded lines."""
+        return self
+
+    def __next__(self) -> str:
+        """Return the next line, or a blank one in place of an undecodable line."""
+        text, error = next(self._lines)
+        if error is not None:
+            self.error = error
+            return "\n"
+        return text
+
+
+def iter_csv(raw: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Parse a CSV upload with a header row."""
+    lines = _CSVLines(raw)
+    reader = csv.reader(lines)
+    try:
+        header = [_key(h) for h in next(reader)]
+    except StopIteration:
+        return
+    except csv.Error as e:
+        raise ImportFormatError(f"unreadable CSV header: {e}") from e
+    if lines.error is not None:
+        raise ImportFormatError(f"unreadable CSV header: {lines.error}")
+    if "text" not in header:
+        raise ImportFormatError("CSV header must include a Text column")
+    row_no = 1
+    while True:
+        row_no += 1
+        try:
+            values = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            lines.error = None
+            yield row_no, {"_error": f"unreadable CSV row: {e}"}
+            continue
+        if lines.error is not None:
+            yield row_no, {"_error": f"unreadable CSV row: {lines.error}"}
+            lines.error = None
+            continue
+        if not any(v.strip() for v in values):
+            continue
+        yield row_no, dict(zip(header, values))
+
+
+def iter_ndjson(raw: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Parse one JSON object per line; blank lines are skipped."""
+    for row_no, (line, error) in enumerate(_decoded_lines(raw), start=1):
+        if error is not None:
+            yield row_no, {"_error": f"line is not valid UTF-8: {error}"}
+            continue
+        yield from _ndjson_line(row_no, line)
+
+
+def _ndjson_line(row_no: int, line: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Decode one NDJSON line."""
+    if not line.strip():
+        return
+    try:
+        obj = json.loads(line)
+    except ValueError as e:
+        yield row_no, {"_error": f"invalid JSON: {e.msg}"}
+        return
+    if not isinstance(obj, dict):
+        yield row_no, {"_error": "each line must be a JSON object"}
+        return
+    yield row_no, {_key(k): v for k, v in obj.items()}
+
+
+def iter_xlsx(raw: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Parse the first worksheet of an XLSX upload in openpyxl's streaming read-only mode."""
+    from openpyxl import load_workbook
+
+    try:
+        wb = load_workbook(raw, read_only=True, data_only=True)
+    except Exception as e:  # zipfile/openpyxl raise a variety of errors for corrupt files
+        raise ImportFormatError(f"unreadable XLSX file: {e}") from e
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header_row = next(rows, None)
+        if header_row is None:
+            return
+        header = [_key(h) for h in header_row]
+        if "text" not in header:
+            raise ImportFormatError("XLSX header must include a Text column")
+        for row_no, values in enumerate(rows, start=2):
+            if all(v is None or str(v).strip() == "" for v in values):
+                continue
+            yield row_no, dict(zip(header, values))
+    finally:
+        wb.close()
+
+
+PARSERS = {"csv": iter_csv, "ndjson": iter_ndjson, "xlsx": iter_xlsx}
+
+
+# -----------------------------------------------------------------------------
+# Validation and insertion
+# -----------------------------------------------------------------------------
+def _parse_created_at(value: Any, now: dt.datetime) -> dt.datetime:
+    """Accept a datetime or ISO-8601 string (naive values are UTC); default to now."""
+    if value is None or value == "":
+        return now
+    if isinstance(value, dt.datetime):
+        stamp = value
+    else:
+        stamp = dt.datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=dt.timezone.utc)
+    return stamp
+
+
+def validate_row(data: Dict[str, Any], now: dt.datetime) -> Tuple[Optional[dict], Optional[str]]:
+    """Turn one parsed row into insert values, or return the reason it is rejected."""
+    if "_error" in data:
+        return None, data["_error"]
+    text = data.get("text")
+    text = "" if text is None else str(text)
+    if not text.strip():
+        return None, "text is required"
+    if len(text) > TEXT_MAX_LENGTH:
+        return None, f"text longer than {TEXT_MAX_LENGTH} characters"
+    status = str(data.get("status") or "pending").strip().lower()
+    if status not in STATUSES:
+        return None, f"status must be one of {', '.join(STATUSES)}"
+    try:
+        created_at = _parse_created_at(data.get("created_at"), now)
+    except ValueError:
+        return None, f"invalid created_at {data.get('created_at')!r}"
+    completed_at = created_at if status in models.DONE_STATUSES else None
+    return {
+        "text": text,
+        "status": status,
+        "created_at": created_at,
+        "updated_at": created_at,
+        "completed_at": completed_at,
+    }, None
+
+
+def _flush(db: Session, owner_id: int, batch: List[dict]) -> None:
+    """Extract tags for a whole batch and insert it in one executemany."""
+    for values, tags in zip(batch, [utils.extract_tags(v["text"]) for v in batch]):
+        values["tags"] = tags
+        values["owner_id"] = owner_id
+    db.execute(insert(models.Task), batch)
+    db.commit()
+
+
+def import_tasks(
+    db: Session,
+    owner_id: int,
+    raw: IO[bytes],
+    fmt: str,
+    batch_size: int = 1000,
+    max_errors: int = 100,
+    now: Optional[dt.datetime] = None,
+) -> ImportResult:
+    """Import every valid row of `raw` for `owner_id`, committing one batch at a time.
+
+    An ImportFormatError before the first row (bad header, unreadable file) is
+    raised. One raised further in (a corrupt XLSX row) ends the import: the
+    rows read so far are kept and the failure is reported as a row error.
+    Caches and open streams are told about whatever was committed, even if the
+    import stops on an exception.
+    """
+    now = now or dt.datetime.now(dt.timezone.utc)
+    result = ImportResult()
+    batch: List[dict] = []
+    last_row = 0
+    try:
+        try:
+            for row_no, data in PARSERS[fmt](raw):
+                last_row = row_no
+                values, error = validate_row(data, now)
+                if error:
+                    result.add_error(row_no, error, max_errors)
+                    continue
+                batch.append(values)
+                if len(batch) >= batch_size:
+                    _flush(db, owner_id, batch)
+                    result.imported += len(batch)
+                    batch = []
+        except ImportFormatError as e:
+            if not last_row:
+                raise
+            result.add_error(last_row + 1, f"import stopped: {e}", max_errors)
+        if batch:
+            _flush(db, owner_id, batch)
+            result.imported += len(batch)
+    finally:
+        if result.imported:
+            invalidation.publish(invalidation.tasks_key(owner_id))
+            events.publish_resync(owner_id)
+    return result
@@ -0,0 +1,179 @@
+"""Per-request SQL instrumentation.
+
+Engine-wide cursor events count queries and time spent in the database for the
+request being served (tracked through a context variable). The ASGI middleware
+reports the totals in a `Server-Timing` header and a structured log line, warns
+about slow statements and likely N+1 patterns, and `assert_max_queries` lets
+tests pin query budgets per endpoint.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import Counter as _TallyCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .settings import settings
+
+logger = logging.getLogger("tasklist.sql")
+request_logger = logging.getLogger("tasklist.requests")
+
+
+class QueryStats:
+    """Query count, DB time, and statement tally for one request (or capture block)."""
+
+    def __init__(self) -> None:
+        """Initialize empty counters."""
+        self.count = 0
+        self.total_seconds = 0.0
+        self.statements: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float) -> None:
+        """Add one executed statement."""
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.statements.append(statement)
+
+    @property
+    def total_ms(self) -> float:
+        """Total DB time in milliseconds."""
+        return self.total_seconds * 1000.0
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Return statements executed at least `threshold` times (N+1 suspects)."""
+        with self._lock:
+            tally = _TallyCounter(self.statements)
+        return [(stmt, n) for stmt, n in tally.most_common() if n >= threshold]
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("tasklist_query_stats", default=None)
+_collectors: list[QueryStats] = []
+_collectors_lock = threading.Lock()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Push the statement start time on the connection."""
+    conn.info.setdefault("tasklist_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Record the statement on the active request stats and any capture blocks."""
+    starts = conn.info.get("tasklist_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if _collectors:
+        for collector in list(_collectors):
+            collector.record(statement, elapsed)
+    if elapsed * 1000.0 >= settings.SLOW_QUERY_MS:
+        logger.warning(json.dumps({
+            "event": "slow_query",
+            "duration_ms": round(elapsed * 1000.0, 2),
+            "statement": " ".join(statement.split())[:2000],
+        }))
+
+
+# -----------------------------------------------------------------------------
+# Middleware
+# -----------------------------------------------------------------------------
+class SQLInstrumentationMiddleware:
+    """ASGI middleware adding per-request query counts to `Server-Timing` and logs."""
+
+    def __init__(self, app) -> None:
+        """Wrap the downstream ASGI app."""
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        """Track queries for HTTP requests; pass everything else through."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries"'.encode("latin-1"),
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._report(scope, stats, status_code, time.perf_counter() - start)
+
+    @staticmethod
+    def _report(scope, stats: QueryStats, status_code: int, elapsed: float) -> None:
+        """Emit the structured request log and the N+1 warning if needed."""
+        route = scope.get("route")
+        path = getattr(route, "path", None) or scope.get("path", "")
+        suspects = stats.repeated(settings.N_PLUS_ONE_THRESHOLD)
+        if request_logger.isEnabledFor(logging.INFO):
+            request_logger.info(json.dumps({
+                "event": "request",
+                "method": scope.get("method"),
+                "path": path,
+                "status": status_code,
+                "duration_ms": round(elapsed * 1000.0, 2),
+                "db_queries": stats.count,
+                "db_ms": round(stats.total_ms, 2),
+            }))
+        for statement, times in suspects:
+            logger.warning(json.dumps({
+                "event": "n_plus_one",
+                "method": scope.get("method"),
+                "path": path,
+                "times": times,
+                "statement": " ".join(statement.split())[:2000],
+            }))
+
+
+# -----------------------------------------------------------------------------
+# Test helpers
+# -----------------------------------------------------------------------------
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """Collect every statement executed by any engine while the block runs."""
+    stats = QueryStats()
+    with _collectors_lock:
+        _collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        with _collectors_lock:
+            _collectors.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(limit: int, label: str = "block") -> Iterator[QueryStats]:
+    """Fail with the executed statements if the block runs more than `limit` queries."""
+    with capture_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        listing = "\n".join(f"  {i + 1}. {' '.join(s.split())}" for i, s in enumerate(stats.statements))
+        raise AssertionError(f"{label} ran {stats.count} queries (max {limit}):\n{listing}")
@@ -0,0 +1,396 @@
+"""Cross-worker cache invalidation bus.
+
+The crud layer calls `publish(*keys)` after each committed write, with keys
+such as `user:<id>` or `tasks:<owner_id>`, or with `ALL`. The bus evicts
+those keys from this worker's registered caches (see `cache.LocalCache`)
+right away. It also hands them to a backend so every other worker evicts them
+as well:
+
+- `memory`: one process, nothing to send (the default).
+- `file`: an append-only log on a shared disk. Every worker tails it, which
+  suits several uvicorn workers on one host.
+- `postgres`: `NOTIFY` on a channel, received over a dedicated `LISTEN`
+  connection.
+
+Delivery is at least once: eviction is idempotent, so duplicates are
+harmless. When a backend may have dropped messages (the log was rotated, or
+the LISTEN connection was re-established), it raises `BackendReset` and every
+cache is cleared. Staleness is bounded by `max_staleness`, in three ways:
+registered caches never keep an entry longer than that, a worker whose
+listener has not completed a poll within that window stops serving cached
+reads, and reads that race a write settle by TTL.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+from . import metrics
+from .cache import LocalCache
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+ALL = "*"
+_KEYS_PER_MESSAGE = 200  # keeps NOTIFY payloads well under PostgreSQL's 8000-byte limit
+
+INVALIDATION_MESSAGES = metrics.counter(
+    "tasklist_invalidation_messages", "Invalidation messages sent and received.", ["direction"]
+)
+INVALIDATION_RESETS = metrics.counter(
+    "tasklist_invalidation_resets", "Full cache clears after a possible message loss.", []
+)
+INVALIDATION_ERRORS = metrics.counter(
+    "tasklist_invalidation_errors", "Backend failures while sending or polling.", ["op"]
+)
+
+
+def user_key(user_id: int) -> str:
+    """Invalidation key for a user's row."""
+    return f"user:{user_id}"
+
+
+def tasks_key(owner_id: int) -> str:
+    """Invalidation key for anything derived from a user's tasks."""
+    return f"tasks:{owner_id}"
+
+
+class BackendReset(Exception):
+    """Messages may have been lost; receivers must drop everything they cache."""
+
+
+# -----------------------------------------------------------------------------
+# Backends: send(payload) and poll(timeout) -> payloads
+# -----------------------------------------------------------------------------
+class MemoryBackend:
+    """Single process: local eviction is all there is."""
+
+    local = True
+
+    def send(self, payload: str) -> None:
+        """Nothing to do."""
+
+    def poll(self, timeout: float) -> List[str]:
+        """Nothing ever arrives."""
+        time.sleep(timeout)
+        return []
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+class FileBackend:
+    """Append-only invalidation log shared by the workers of one host.
+
+    Each message is one line, written with a single `O_APPEND` write. Readers
+    tail the file from where they stopped. Once the log grows past `max_bytes`
+    it is renamed aside and started afresh; readers notice the new inode and
+    reset.
+    """
+
+    local = False
+
+    def __init__(self, path: str, max_bytes: int = 1 << 20) -> None:
+        """Initialize with the log path and its rotation size."""
+        self.path = path
+        self.max_bytes = max_bytes
+        self._file = None
+        self._inode: Optional[int] = None
+        self._buf = b""
+
+    def send(self, payload: str) -> None:
+        """Append one message line, rotating the log when it grows too large."""
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, payload.encode("utf-8") + b"\n")
+            too_big = os.fstat(fd).st_size > self.max_bytes
+        finally:
+            os.close(fd)
+        if too_big:
+            try:
+                os.replace(self.path, self.path + ".1")
+            except FileNotFoundError:  # another worker rotated it first
+                pass
+
+    def poll(self, timeout: float) -> List[str]:
+        """Return the lines appended since the last poll, or sleep `timeout` if none."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            st = None
+        if self._file is None or st is None or st.st_ino != self._inode or st.st_size < self._file.tell():
+            first = self._file is None and self._inode is None
+            self._open(at_end=first)
+            if not first:
+                raise BackendReset(f"invalidation log {self.path} was rotated")
+        chunk = self._file.read()
+        if not chunk:
+            time.sleep(timeout)
+            return []
+        *lines, self._buf = (self._buf + chunk).split(b"\n")
+        return [line.decode("utf-8", "replace") for line in lines if line]
+
+    def _open(self, at_end: bool) -> None:
+        """(Re)open the log, creating it if needed; a fresh worker starts at the end."""
+        self.close()
+        fd = os.open(self.path, os.O_RDONLY | os.O_CREAT, 0o600)
+        self._file = os.fdopen(fd, "rb")
+        self._inode = os.fstat(fd).st_ino
+        self._buf = b""
+        if at_end:
+            self._file.seek(0, os.SEEK_END)
+
+    def close(self) -> None:
+        """Close the reader."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class PostgresBackend:
+    """`NOTIFY` on `channel`, received over a dedicated `LISTEN` connection.
+
+    Both connections are detached from the engine's pool, so they never
+    count against it. Works with psycopg2 and psycopg 3. A notification sent
+    while the listener was disconnected is lost, so every reconnect raises
+    `BackendReset`.
+    """
+
+    local = False
+
+    def __init__(self, engine, channel: str) -> None:
+        """Initialize with the primary engine and the channel name (an identifier)."""
+        self.engine = engine
+        self.channel = channel
+        self._listen_conn = None
+        self._send_conn = None
+        self._send_lock = threading.Lock()
+        self._connected_once = False
+
+    def _connect(self):
+        """Take a raw DBAPI connection out of the pool, in autocommit mode."""
+        fairy = self.engine.raw_connection()
+        fairy.detach()
+        conn = fairy.driver_connection
+        conn.autocommit = True
+        return conn
+
+    def send(self, payload: str) -> None:
+        """Publish one notification, reconnecting once on failure."""
+        with self._send_lock:
+            for attempt in (1, 2):
+                try:
+                    if self._send_conn is None:
+                        self._send_conn = self._connect()
+                    with self._send_conn.cursor() as cur:
+                        cur.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+                    return
+                except Exception:
+                    self._close_quietly(self._send_conn)
+                    self._send_conn = None
+                    if attempt == 2:
+                        raise
+
+    def poll(self, timeout: float) -> List[str]:
+        """Wait up to `timeout` for notifications and return their payloads."""
+        if self._listen_conn is None:
+            conn = self._connect()
+            with conn.cursor() as cur:
+                cur.execute(f'LISTEN "{self.channel}"')
+            self._listen_conn = conn
+            if self._connected_once:
+                raise BackendReset("LISTEN connection re-established")
+            self._connected_once = True
+        conn = self._listen_conn
+        try:
+            if not hasattr(conn, "poll"):  # psycopg 3
+                return [n.payload for n in conn.notifies(timeout=timeout)]
+            if select.select([conn], [], [], timeout) != ([], [], []):
+                conn.poll()
+            payloads = [n.payload for n in conn.notifies]
+            conn.notifies.clear()
+            return payloads
+        except Exception:
+            self._close_quietly(conn)
+            self._listen_conn = None
+            raise
+
+    @staticmethod
+    def _close_quietly(conn) -> None:
+        """Close a DBAPI connection, ignoring errors from an already broken one."""
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def close(self) -> None:
+        """Close both connections."""
+        self._close_quietly(self._listen_conn)
+        self._close_quietly(self._send_conn)
+        self._listen_conn = self._send_conn = None
+
+
+# -----------------------------------------------------------------------------
+# Bus
+# -----------------------------------------------------------------------------
+class InvalidationBus:
+    """Evict keys locally and broadcast them to the other workers."""
+
+    def __init__(self, backend, max_staleness: float = 30.0, poll_interval: float = 0.5) -> None:
+        """Initialize with a backend, the staleness bound, and the listener poll interval."""
+        self.backend = backend
+        self.max_staleness = max_staleness
+        self.poll_interval = poll_interval
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.caches: List[LocalCache] = []
+        self._last_ok = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+
+    def register(self, cache: LocalCache) -> LocalCache:
+        """Subject `cache` to cross-worker invalidation and the staleness bound."""
+        cache.ttl = min(cache.ttl, self.max_staleness)
+        cache.is_fresh = self.healthy
+        self.caches.append(cache)
+        return cache
+
+    def subscribe(self, cache: LocalCache) -> LocalCache:
+        """Evict from `cache` on published keys, without the staleness bound.
+
+        For caches whose entries are only ever served marked as stale (see
+        `degraded`): they keep their own TTL and stay readable while the
+        listener is down.
+        """
+        self.caches.append(cache)
+        return cache
+
+    def healthy(self) -> bool:
+        """Return True if cached reads can be trusted (listener alive and recent)."""
+        if self.backend.local:
+            return True
+        running = self._thread is not None and self._thread_pid == os.getpid() and self._thread.is_alive()
+        return running and time.monotonic() - self._last_ok <= self.max_staleness
+
+    def publish(self, *keys: str) -> None:
+        """Evict `keys` here and broadcast them; backend errors are logged, not raised."""
+        keys = tuple(dict.fromkeys(k for k in keys if k))
+        if not keys:
+            return
+        self._evict(keys)
+        if self.backend.local:
+            return
+        for i in range(0, len(keys), _KEYS_PER_MESSAGE):
+            payload = json.dumps({"o": self.origin, "k": keys[i:i + _KEYS_PER_MESSAGE]}, separators=(",", ":"))
+            try:
+                self.backend.send(payload)
+                INVALIDATION_MESSAGES.inc(direction="sent")
+            except Exception:
+                # Other workers will miss this one; their entries still expire within max_staleness.
+                INVALIDATION_ERRORS.inc(op="send")
+                logger.warning("invalidation send failed for %d key(s)", len(keys), exc_info=True)
+
+    def deliver(self, payload: str) -> None:
+        """Apply one message received from the backend."""
+        try:
+            message = json.loads(payload)
+            origin, keys = message["o"], message["k"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("ignoring malformed invalidation message %r", payload[:200])
+            return
+        INVALIDATION_MESSAGES.inc(direction="received")
+        if origin != self.origin:
+            self._evict(keys)
+
+    def _evict(self, keys) -> None:
+        """Evict keys from every registered cache (`ALL` clears them)."""
+        for cache in self.caches:
+            if ALL in keys:
+                cache.clear()
+            else:
+                cache.evict(*keys)
+
+    def reset(self) -> None:
+        """Clear every registered cache after a possible message loss."""
+        INVALIDATION_RESETS.inc()
+        for cache in self.caches:
+            cache.clear()
+
+    def run_once(self) -> None:
+        """Poll the backend once and apply what arrived (one listener iteration)."""
+        try:
+            payloads = self.backend.poll(self.poll_interval)
+        except BackendReset as e:
+            logger.info("invalidation reset: %s", e)
+            self.reset()
+            self._last_ok = time.monotonic()
+            return
+        for payload in payloads:
+            self.deliver(payload)
+        self._last_ok = time.monotonic()
+
+    def _listen_forever(self) -> None:
+        """Listener thread body: poll, back off on errors, stop when asked."""
+        backoff = self.poll_interval
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                backoff = self.poll_interval
+            except Exception:
+                INVALIDATION_ERRORS.inc(op="poll")
+                logger.warning("invalidation listener error; retrying in %.1fs", backoff, exc_info=True)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, max(self.max_staleness, self.poll_interval))
+
+    def start(self) -> None:
+        """Start this worker's listener thread (no-op for local backends or if already running)."""
+        if self.backend.local or self._thread_pid == os.getpid():
+            return
+        self._stop.clear()
+        self._thread_pid = os.getpid()
+        self._last_ok = time.monotonic()
+        self._thread = threading.Thread(target=self._listen_forever, name="cache-invalidation", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the listener and release the backend."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.poll_interval * 2 + 1)
+        self._thread = None
+        self._thread_pid = None
+        self.backend.close()
+
+
+def build_backend(name: str):
+    """Create the backend selected by `INVALIDATION_BACKEND`."""
+    if name == "file":
+        return FileBackend(settings.INVALIDATION_FILE)
+    if name == "postgres":
+        from .database import engine
+
+        if engine.dialect.name != "postgresql":
+            raise ValueError("INVALIDATION_BACKEND=postgres requires a PostgreSQL DATABASE_URL")
+        return PostgresBackend(engine, settings.INVALIDATION_CHANNEL)
+    return MemoryBackend()
+
+
+bus = InvalidationBus(
+    build_backend(settings.INVALIDATION_BACKEND),
+    max_staleness=settings.CACHE_MAX_STALENESS_SECONDS,
+    poll_interval=settings.INVALIDATION_POLL_SECONDS,
+)
+
+
+def publish(*keys: str) -> None:
+    """Invalidate `keys` in every worker (see `InvalidationBus.publish`)."""
+    bus.publish(*keys)
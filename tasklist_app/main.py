@@ -5,36 +5,57 @@ initializes the SQLAdmin UI, defines cookie/JWT helpers, and exposes:
 - Auth API endpoints (/auth/*)
 - Task API endpoints (/tasks*)
 - HTML views (/app/*)
-- Export endpoints for CSV/XLSX
+- Export endpoints for CSV/XLSX and bulk import (CSV/NDJSON/XLSX)
+- Health and Prometheus metrics endpoints (/health, /metrics)
 """
 
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
 from datetime import timedelta, datetime
 from io import BytesIO, StringIO
 import os
+import asyncio
 import csv
+import time
 
-from fastapi import FastAPI, Depends, HTTPException, Query, Request, Form
+from fastapi import FastAPI, Depends, File, HTTPException, Query, Request, Form, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import JSONResponse, RedirectResponse, HTMLResponse, StreamingResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
+from markupsafe import Markup
 from starlette.middleware.sessions import SessionMiddleware
 
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError, OperationalError, TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import Session
 
-from sqladmin import Admin, ModelView
+from sqladmin import Admin, BaseView, action, expose
 
 from .settings import settings
-from . import deps, schemas, models, crud, utils
-from .database import engine, SessionLocal
+from . import deps, schemas, models, crud, utils, metrics, profiling, diagnostics, importer, events, invalidation, stats, autocomplete, admin_views, degraded, admission
+from .database import STATEMENT_TIMEOUTS, engine, SessionLocal, is_statement_timeout
 from .admin_auth import AdminAuth
+from .admin_views import ScalableModelView
+from .cache import LocalCache
+from .instrumentation import SQLInstrumentationMiddleware
 
 # -----------------------------------------------------------------------------
 # App & CORS
 # -----------------------------------------------------------------------------
-app = FastAPI(title="Tasklist")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Run this worker's cache invalidation listener for the app's lifetime."""
+    invalidation.bus.start()
+    try:
+        yield
+    finally:
+        invalidation.bus.stop()
+
+
+app = FastAPI(title="Tasklist", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -44,19 +65,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(SQLInstrumentationMiddleware)
+# Admits each request through its route class's gate; shed requests never reach a
+# route. Inside the stale-listing middleware so queueing counts against its budget.
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(admission.AdmissionMiddleware)
+# Listings past their latency budget get the caller's last good page (see degraded).
+app.add_middleware(degraded.StaleListingMiddleware)
+
 ADMIN_SESSION_SECRET = os.getenv("ADMIN_SESSION_SECRET", settings.SECRET_KEY)
+authentication_backend = AdminAuth(secret_key=ADMIN_SESSION_SECRET)
+
+# Installed only when enabled (zero overhead otherwise); added before the session
+# middleware so it can see the /admin session.
+if settings.PROFILING_ENABLED:
+    app.router.route_class = profiling.ProfiledRoute  # set before any route is declared
+    app.add_middleware(
+        profiling.ProfilingMiddleware,
+        admin_emails=authentication_backend.admin_emails,
+        interval=settings.PROFILE_SAMPLE_INTERVAL_MS / 1000.0,
+    )
 app.add_middleware(SessionMiddleware, secret_key=ADMIN_SESSION_SECRET, same_site="lax")
 
+# Outermost middleware: times the whole request, including the ones above.
+app.add_middleware(metrics.MetricsMiddleware, multiproc_dir=settings.METRICS_MULTIPROC_DIR)
+
 app.mount("/static", StaticFiles(directory="tasklist_app/static"), name="static")
 
 # -----------------------------------------------------------------------------
 # Admin UI (/admin) con sqladmin + autenticación
 # -----------------------------------------------------------------------------
-authentication_backend = AdminAuth(secret_key=ADMIN_SESSION_SECRET)
-admin = Admin(app, engine, authentication_backend=authentication_backend)
+admin = Admin(
+    app,
+    engine,
+    authentication_backend=authentication_backend,
+    templates_dir="tasklist_app/templates",
+)
 
-class UserAdmin(ModelView, model=models.User):
-    """Admin view configuration for users."""
+class UserAdmin(ScalableModelView, model=models.User):
+    """Admin view configuration for users (keyset-paged, see admin_views)."""
 
     column_list = [
         models.User.id,
@@ -65,13 +112,50 @@ class UserAdmin(ModelView, model=models.User):
         models.User.updated_at,
     ]
     column_searchable_list = [models.User.email]
-    column_sortable_list = [models.User.id, models.User.created_at, models.User.updated_at]
+    # Only indexed columns: each page is a range scan on (column, id).
+    column_sortable_list = [models.User.id, models.User.email]
     name = "Usuario"
     name_plural = "Usuarios"
     icon = "fa-solid fa-user"
 
-class TaskAdmin(ModelView, model=models.Task):
-    """Admin view configuration for tasks."""
+    def _delete_accounts(self, pks: list[str]) -> list[dict]:
+        """Delete the given accounts with batched, DB-side cascades."""
+        summaries = []
+        with SessionLocal() as db:
+            for pk in pks:
+                summary = crud.delete_user(db, int(pk), batch_size=settings.ACCOUNT_DELETE_BATCH_SIZE)
+                if summary:
+                    summaries.append(summary)
+        return summaries
+
+    async def delete_model(self, request: Request, pk) -> None:
+        """Delete one account without loading its tasks (used by the delete button)."""
+        await run_in_threadpool(self._delete_accounts, [str(pk)])
+
+    @action(
+        name="delete_account",
+        label="Eliminar cuenta (por lotes)",
+        confirmation_message="¿Eliminar las cuentas seleccionadas y todas sus tareas?",
+    )
+    async def delete_account_action(self, request: Request):
+        """Admin action: batched deletion of the selected accounts."""
+        pks = [pk for pk in request.query_params.get("pks", "").split(",") if pk]
+        await run_in_threadpool(self._delete_accounts, pks)
+        return RedirectResponse(request.url_for("admin:list", identity=self.identity), status_code=302)
+
+    def search_placeholder(self) -> str:
+        """Describe the search syntax in the list page's search box."""
+        return "id or email prefix"
+
+    def search_query(self, stmt, term: str):
+        """Exact id, or email prefix (served by the email indexes)."""
+        term = term.strip().lower()
+        if term.isdigit():
+            return stmt.where(models.User.id == int(term))
+        return stmt.where(admin_views.prefix_filter(self.session_maker, models.User.email, term))
+
+class TaskAdmin(ScalableModelView, model=models.Task):
+    """Admin view configuration for tasks (keyset-paged, see admin_views)."""
 
     column_list = [
         models.Task.id,
@@ -83,16 +167,213 @@ class TaskAdmin(ModelView, model=models.Task):
         models.Task.updated_at,
     ]
     column_searchable_list = [models.Task.text, models.Task.status]
-    column_sortable_list = [models.Task.id, models.Task.created_at, models.Task.updated_at]
+    # Only indexed columns: each page is a range scan on (column, id).
+    column_sortable_list = [models.Task.id, models.Task.created_at]
     name = "Tarea"
     name_plural = "Tareas"
     icon = "fa-solid fa-list-check"
 
+    def search_placeholder(self) -> str:
+        """Describe the search syntax in the list page's search box."""
+        return "id, owner:<id|email>, status:<status> or text"
+
+    def search_query(self, stmt, term: str):
+        """Exact id, owner or status lookups; anything else searches the text.
+
+        Text search is `ILIKE '%term%'`. On PostgreSQL the trigram index created by
+        the migration serves it; elsewhere the statement timeout bounds it.
+        """
+        term = term.strip()
+        T = models.Task
+        if term.isdigit():
+            return stmt.where(T.id == int(term))
+        key, sep, value = term.partition(":")
+        value = value.strip()
+        if sep and key == "owner" and value:
+            if value.isdigit():
+                return stmt.where(T.owner_id == int(value))
+            owner_ids = select(models.User.id).where(models.User.email == value.lower())
+            return stmt.where(T.owner_id.in_(owner_ids))
+        if sep and key == "status" and value:
+            return stmt.where(T.status == value)
+        return stmt.where(T.text.ilike(f"%{term}%"))
+
+class ProfilesAdmin(BaseView):
+    """Admin pages listing the recent on-demand request profiles.
+
+    sqladmin links the menu entry to the identity of the first exposed method
+    in the class body, which is `profiles_list`.
+    """
+
+    name = "Perfiles"
+    icon = "fa-solid fa-fire"
+
+    @expose("/profiles", methods=["GET"], identity="profiles")
+    async def profiles_list(self, request: Request):
+        """List stored profiles, newest first."""
+        return await self.templates.TemplateResponse(
+            request,
+            "admin/profiles.html",
+            {"profiles": profiling.store.all(), "enabled": settings.PROFILING_ENABLED},
+        )
+
+    def _record(self, request: Request) -> profiling.ProfileRecord:
+        """The profile named in the path; 400 for a malformed id, 404 if it is gone."""
+        record = profiling.store.get(_positive_int_param(request.path_params["profile_id"], None, "profile_id"))
+        if record is None:
+            raise HTTPException(status_code=404, detail="Not found")
+        return record
+
+    @expose("/profiles/{profile_id}", methods=["GET"], identity="profile-detail")
+    async def profile_detail(self, request: Request):
+        """Show the hottest frames of one profile."""
+        record = self._record(request)
+        return await self.templates.TemplateResponse(
+            request, "admin/profile_detail.html", {"profile": record}
+        )
+
+    @expose("/profiles/{profile_id}/folded", methods=["GET"], identity="profile-folded")
+    async def profile_folded(self, request: Request):
+        """Download one profile as folded stacks (flamegraph.pl / speedscope)."""
+        record = self._record(request)
+        return PlainTextResponse(
+            record.folded,
+            headers={"Content-Disposition": f'attachment; filename="profile-{record.id}.folded"'},
+        )
+
+def _positive_int_param(value, default: Optional[int], name: str) -> Optional[int]:
+    """Parse a positive integer query or form field of an admin page; 400 if it isn't one."""
+    if value is None or value == "":
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise HTTPException(status_code=400, detail=f"{name} must be a positive integer")
+    return number
+
+class MemoryDiagnosticsAdmin(BaseView):
+    """Admin pages with this worker's memory report and tracemalloc controls.
+
+    The menu entry links to `memory_report`, the first exposed method.
+    """
+
+    name = "Memoria"
+    icon = "fa-solid fa-memory"
+
+    @expose("/diagnostics/memory", methods=["GET"], identity="memory")
+    async def memory_report(self, request: Request):
+        """Show RSS, GC counts, live ORM objects and tracemalloc top/diff sites."""
+        limit = _positive_int_param(request.query_params.get("limit"), 20, "limit")
+        report = await run_in_threadpool(diagnostics.memory.report, limit)
+        return await self.templates.TemplateResponse(request, "admin/memory.html", {"report": report})
+
+    @expose("/diagnostics/memory/tracemalloc", methods=["POST"], identity="memory-control")
+    async def memory_control(self, request: Request):
+        """Start/stop tracemalloc or take the baseline snapshot, then go back to the report."""
+        form = await request.form()
+        op = form.get("op")
+        if op == "start":
+            diagnostics.memory.start(_positive_int_param(form.get("nframes"), 10, "nframes"))
+        elif op == "stop":
+            diagnostics.memory.stop()
+        elif op == "baseline":
+            try:
+                diagnostics.memory.take_baseline()
+            except RuntimeError as e:
+                raise HTTPException(status_code=409, detail=str(e))
+        else:
+            raise HTTPException(status_code=400, detail="op must be start, stop or baseline")
+        return RedirectResponse(request.url_for("admin:view-memory"), status_code=303)
+
+    @expose("/diagnostics/memory.json", methods=["GET"], identity="memory-json")
+    async def memory_json(self, request: Request):
+        """Return the memory report as JSON (for scripts polling a worker)."""
+        limit = _positive_int_param(request.query_params.get("limit"), 20, "limit")
+        return JSONResponse(await run_in_threadpool(diagnostics.memory.report, limit))
+
+class StatsAdmin(BaseView):
+    """Admin page with the task counters of the busiest users or of one user.
+
+    The menu entry links to `stats_report`, the first exposed method.
+    """
+
+    name = "Estadísticas"
+    icon = "fa-solid fa-chart-column"
+
+    @staticmethod
+    def _report(user_ref: Optional[str], days: int) -> dict:
+        """Build the page data: one user's stats if `user_ref` (id or email) is given, else the top users."""
+        with SessionLocal() as db:
+            if user_ref:
+                query = db.query(models.User)
+                user = (query.filter(models.User.id == int(user_ref)) if user_ref.isdigit()
+                        else query.filter(models.User.email == user_ref.strip())).first()
+                if user is None:
+                    return {"user_ref": user_ref, "user": None, "stats": None, "top_users": []}
+                return {"user_ref": user_ref, "user": user.email, "user_id": user.id,
+                        "stats": stats.user_stats(db, user.id, days=days), "top_users": []}
+            total = func.sum(models.TaskStatusCount.count)
+            top_users = db.execute(
+                select(models.User.id, models.User.email, total.label("tasks"))
+                .join(models.TaskStatusCount, models.TaskStatusCount.owner_id == models.User.id)
+                .group_by(models.User.id, models.User.email)
+                .order_by(total.desc())
+                .limit(20)
+            ).all()
+            return {"user_ref": "", "user": None, "stats": None, "top_users": top_users}
+
+    @expose("/stats", methods=["GET"], identity="stats")
+    async def stats_report(self, request: Request):
+        """Show the top users by task count, or one user's statistics (`?user=<id|email>`)."""
+        days = min(366, _positive_int_param(request.query_params.get("days"), 30, "days"))
+        report = await run_in_threadpool(self._report, request.query_params.get("user"), days)
+        return await self.templates.TemplateResponse(request, "admin/stats.html", {"report": report, "days": days})
+
+    @expose("/stats/rebuild", methods=["POST"], identity="stats-rebuild")
+    async def stats_rebuild(self, request: Request):
+        """Recompute the counters from the task tables (all users, or the one in the form)."""
+        form = await request.form()
+        user_id = _positive_int_param(form.get("user_id"), None, "user_id")
+
+        def _rebuild():
+            with SessionLocal() as db:
+                return stats.rebuild(db, owner_id=user_id)
+
+        await run_in_threadpool(_rebuild)
+        url = request.url_for("admin:view-stats")
+        return RedirectResponse(f"{url}?user={user_id}" if user_id else url, status_code=303)
+
 admin.add_view(UserAdmin)
 admin.add_view(TaskAdmin)
+admin.add_base_view(StatsAdmin)
+admin.add_base_view(ProfilesAdmin)
+admin.add_base_view(MemoryDiagnosticsAdmin)
 
 templates = Jinja2Templates(directory="tasklist_app/templates")
 
+# -----------------------------------------------------------------------------
+# Fragmentos HTML cacheados
+# -----------------------------------------------------------------------------
+# A row depends only on its task, so (id, updated_at) identifies its HTML and a
+# write never needs to evict anything: the new updated_at just misses.
+row_fragments = LocalCache("task_rows", max_entries=settings.ROW_FRAGMENT_CACHE_SIZE, ttl=3600.0)
+
+
+def render_task_rows(tasks) -> Markup:
+    """Render task rows with `partials/task_row.html`, reusing cached fragments."""
+    template = templates.get_template("partials/task_row.html")
+    parts = []
+    for t in tasks:
+        key = f"{t.id}:{t.updated_at.isoformat()}"
+        html = row_fragments.get(key)
+        if html is None:
+            html = template.render(t=t)
+            row_fragments.set(key, html)
+        parts.append(html)
+    return Markup("".join(parts))
+
 # -----------------------------------------------------------------------------
 # Helpers de cookies (JWT)
 # -----------------------------------------------------------------------------
@@ -143,14 +424,11 @@ def current_user_from_cookie(request: Request, db: Session) -> Optional[models.U
 @app.post("/auth/register", response_model=schemas.UserOut, status_code=201)
 def register(user_in: schemas.UserCreate, db: Session = Depends(deps.get_db)):
     """Register a new user and return the public user model."""
-    exists = db.query(models.User).filter(models.User.email == user_in.email).first()
-    if exists:
+    # The unique index on email is the existence check: one INSERT, no SELECT first.
+    try:
+        return crud.add_user(db, user_in.email, utils.hash_password(user_in.password))
+    except IntegrityError:
         raise HTTPException(status_code=400, detail="Email already registered")
-    user = models.User(email=user_in.email, password_hash=utils.hash_password(user_in.password))
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
 
 @app.post("/auth/login", response_model=schemas.Token)
 def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(deps.get_db)):
@@ -161,6 +439,43 @@ def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(dep
     token = utils.create_access_token({"sub": user.email})
     return {"access_token": token, "token_type": "bearer"}
 
+@app.delete("/auth/me", response_model=schemas.AccountDeletionOut)
+def delete_account(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user),
+):
+    """Delete the authenticated account and all of its tasks in batches."""
+    summary = crud.delete_user(db, current_user.id, batch_size=settings.ACCOUNT_DELETE_BATCH_SIZE)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    resp = JSONResponse(summary)
+    clear_auth_cookie(resp)
+    return resp
+
+# -----------------------------------------------------------------------------
+# Timeouts de BD -> 503/504
+# -----------------------------------------------------------------------------
+@app.exception_handler(OperationalError)
+async def statement_timeout_handler(request: Request, exc: OperationalError):
+    """A statement cancelled by its route class's timeout is a 504, not a 500."""
+    if not is_statement_timeout(exc):
+        raise exc
+    route_class = getattr(request.state, "route_class", "other")
+    STATEMENT_TIMEOUTS.inc(route_class=route_class)
+    return JSONResponse(
+        status_code=504,
+        content={"detail": f"Query exceeded the {route_class} time budget; narrow the filter and retry."},
+    )
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    """No pooled connection within DB_POOL_TIMEOUT: the database is saturated, retry shortly."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database busy, retry shortly."},
+        headers={"Retry-After": "1"},
+    )
+
 # -----------------------------------------------------------------------------
 # Rutas de SALUD
 # -----------------------------------------------------------------------------
@@ -169,6 +484,11 @@ def health():
     """Health check endpoint."""
     return {"status": "ok"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics_endpoint():
+    """Expose metrics (HTTP, DB pool, exports, bcrypt) in the Prometheus text format."""
+    return PlainTextResponse(metrics.render_latest(), media_type="text/plain; version=0.0.4")
+
 # -----------------------------------------------------------------------------
 # Rutas de TASKS (API)
 # -----------------------------------------------------------------------------
@@ -181,8 +501,62 @@ def create_task(
     """Create a task for the authenticated user."""
     return crud.create_task(db=db, task_in=task_in, owner_id=current_user.id)
 
+@app.get("/tasks/stats", response_model=schemas.TaskStatsOut)
+def task_stats(
+    days: int = Query(30, ge=1, le=366, description="days of completions, ending today (UTC)"),
+    top: int = Query(50, ge=1, le=500, description="number of tags to return"),
+    db: Session = Depends(deps.get_listing_db),
+    current_user: models.User = Depends(deps.get_current_user),
+):
+    """Totals by status, top tags and daily completions from the maintained counters."""
+    return stats.user_stats(db, current_user.id, days=days, top_tags=top)
+
+@app.get("/autocomplete", response_model=schemas.AutocompleteOut)
+def autocomplete_prefix(
+    prefix: str = Query(..., min_length=1, max_length=64, description="@handle, #tag, or bare text for both"),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user),
+):
+    """Suggest @handles and the caller's own #tags from the in-memory prefix indexes."""
+    return autocomplete.suggest(db, current_user.id, prefix, limit)
+
+@app.get("/tasks/stream", include_in_schema=True)
+async def task_stream(
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user),
+):
+    """Server-Sent Events feed of the current user's task changes (created/updated/deleted/resync)."""
+    user_id = current_user.id
+    # Idle streams must not pin a pooled connection: release it before streaming.
+    await run_in_threadpool(db.close)
+
+    async def stream():
+        # Subscribing inside the generator ties the subscription to the body's lifetime.
+        sub = events.broker.subscribe(user_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                yield events.format_sse(event)
+        finally:
+            events.broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/tasks/{task_id}", response_model=schemas.TaskOut)
-def get_task(task_id: int, db: Session = Depends(deps.get_db)):
+def get_task(task_id: int, db: Session = Depends(deps.get_listing_db)):
     """Return a task by ID or raise 404."""
     t = crud.get_task(db, task_id)
     if not t:
@@ -197,6 +571,14 @@ def update_task(task_id: int, task_in: schemas.TaskUpdate, db: Session = Depends
         raise HTTPException(status_code=404, detail="Not found")
     return t
 
+@app.patch("/tasks/{task_id}", response_model=schemas.TaskOut)
+def patch_task(task_id: int, task_in: schemas.TaskPatch, db: Session = Depends(deps.get_db)):
+    """Partially update a task (only the fields sent) or raise 404."""
+    t = crud.patch_task(db, task_id, task_in.model_dump(exclude_unset=True))
+    if not t:
+        raise HTTPException(status_code=404, detail="Not found")
+    return t
+
 @app.delete("/tasks/{task_id}", status_code=204)
 def delete_task(task_id: int, db: Session = Depends(deps.get_db)):
     """Delete a task by ID. Returns 404 if it does not exist."""
@@ -205,22 +587,27 @@ def delete_task(task_id: int, db: Session = Depends(deps.get_db)):
         raise HTTPException(status_code=404, detail="Not found")
     return {"detail": "deleted"}
 
-@app.get("/tasks", response_model=schemas.PageTasks)
+@app.get("/tasks", response_model=schemas.PageTasks, response_model_exclude_none=True)
 def list_tasks(
+    request: Request,
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
     status: Optional[str] = None,
     q: Optional[str] = Query(None, description="free-text over task text"),
     sort: Optional[str] = Query("date", description="date | done"),
     dir: Optional[str] = Query("desc", description="asc | desc"),
-    db: Session = Depends(deps.get_db),
+    include_archived: bool = Query(False, description="also read tasks_archive"),
+    facets: Optional[Literal["tags"]] = Query(None, description="tags: add top tag counts for this filter"),
+    facet_limit: int = Query(20, ge=1, le=100, description="number of tags in the facet"),
+    db: Session = Depends(deps.get_listing_db),
     current_user: Optional[models.User] = Depends(deps.get_current_user_optional),
 ):
     """List tasks with pagination and optional owner filter inferred from auth."""
     owner_id = current_user.id if current_user else None
+    request.state.listing_owner_id = owner_id  # lets degraded evict this page with its owner
     order_by = "done" if (sort or "").lower() == "done" else "created_at"
     order_dir = (dir or "desc")
-    return crud.list_tasks_page(
+    page = crud.list_tasks_page(
         db=db,
         owner_id=owner_id,
         limit=limit,
@@ -229,21 +616,30 @@ def list_tasks(
         order_by=order_by,
         order_dir=order_dir,
         search=q,
+        include_archived=include_archived,
     )
+    if facets == "tags":
+        page.facets = {"tags": crud.tag_facets(
+            db, owner_id, status=status, search=q, include_archived=include_archived, limit=facet_limit,
+        )}
+    return page
 
-@app.get("/tasks-ui", response_model=schemas.PageTasks)
+@app.get("/tasks-ui", response_model=schemas.PageTasks, response_model_exclude_none=True)
 def list_tasks_ui(
+    request: Request,
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
     status: Optional[str] = None,
     q: Optional[str] = Query(None),
     sort: Optional[str] = Query("date"),
     dir: Optional[str] = Query("desc"),
-    db: Session = Depends(deps.get_db),
+    include_archived: bool = Query(False),
+    db: Session = Depends(deps.get_listing_db),
     current_user: Optional[models.User] = Depends(deps.get_current_user_optional),
 ):
     """List tasks for the UI with the same shape as the API endpoint."""
     owner_id = current_user.id if current_user else None
+    request.state.listing_owner_id = owner_id  # lets degraded evict this page with its owner
     order_by = "done" if (sort or "").lower() == "done" else "created_at"
     order_dir = (dir or "desc")
     return crud.list_tasks_page(
@@ -255,6 +651,7 @@ def list_tasks_ui(
         order_by=order_by,
         order_dir=order_dir,
         search=q,
+        include_archived=include_archived,
     )
 
 # -----------------------------------------------------------------------------
@@ -313,7 +710,26 @@ def tasks_page(request: Request, db: Session = Depends(deps.get_db)):
         resp = RedirectResponse(url="/app/login", status_code=302)
         clear_auth_cookie(resp)
         return resp
-    return templates.TemplateResponse("tasks.html", {"request": request, "user_email": user.email})
+    # First page rendered in this response (no /tasks-ui round trip); the page's JS takes over afterwards.
+    page = crud.list_tasks_page(
+        db=db,
+        owner_id=user.id,
+        limit=settings.TASKS_FIRST_PAGE_SIZE,
+        offset=0,
+        status=None,
+        order_by="created_at",
+        order_dir="desc",
+    )
+    return templates.TemplateResponse(
+        request,
+        "tasks.html",
+        {
+            "user_email": user.email,
+            "page_size": settings.TASKS_FIRST_PAGE_SIZE,
+            "rows_html": render_task_rows(page.items),
+            "initial_tasks": [t.model_dump(mode="json") for t in page.items],
+        },
+    )
 
 @app.get("/app/register", response_class=HTMLResponse, include_in_schema=False)
 def register_page(request: Request):
@@ -365,16 +781,26 @@ def register_submit(
 # -----------------------------------------------------------------------------
 # Export: Excel y CSV
 # -----------------------------------------------------------------------------
+EXPORT_DURATION = metrics.histogram(
+    "tasklist_export_duration_seconds",
+    "Time to query and serialize an export.",
+    ["format"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+EXPORT_ROWS = metrics.counter("tasklist_export_rows", "Rows written to exports.", ["format"])
+
 @app.get("/tasks-export.xlsx", include_in_schema=True)
 def export_tasks_xlsx(
     status: Optional[str] = None,
     q: Optional[str] = Query(None, description="free-text search"),
     sort: Optional[str] = Query("date", description="date | done"),
     dir: Optional[str] = Query("desc", description="asc | desc"),
-    db: Session = Depends(deps.get_db),
+    include_archived: bool = Query(False, description="also read tasks_archive"),
+    db: Session = Depends(deps.get_export_db),
     current_user: models.User = Depends(deps.get_current_user),
 ):
     """Export tasks to XLSX, applying the same filters and sorting as the API."""
+    started = time.perf_counter()
     owner_id = current_user.id if current_user else None
     order_by = "done" if (sort or "").lower() == "done" else "created_at"
     order_dir = (dir or "desc")
@@ -386,6 +812,7 @@ def export_tasks_xlsx(
         order_by=order_by,
         order_dir=order_dir,
         search=q,
+        include_archived=include_archived,
     )
 
     from openpyxl import Workbook
@@ -413,6 +840,8 @@ def export_tasks_xlsx(
     buf = BytesIO()
     wb.save(buf)
     buf.seek(0)
+    EXPORT_DURATION.observe(time.perf_counter() - started, format="xlsx")
+    EXPORT_ROWS.inc(len(items), format="xlsx")
 
     ts = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
     filename = f"tasks-{ts}.xlsx"
@@ -428,10 +857,12 @@ def export_tasks_csv(
     q: Optional[str] = Query(None),
     sort: Optional[str] = Query("date"),
     dir: Optional[str] = Query("desc"),
-    db: Session = Depends(deps.get_db),
+    include_archived: bool = Query(False),
+    db: Session = Depends(deps.get_export_db),
     current_user: models.User = Depends(deps.get_current_user),
 ):
     """Export tasks to CSV, applying the same filters and sorting as the API."""
+    started = time.perf_counter()
     owner_id = current_user.id if current_user else None
     order_by = "done" if (sort or "").lower() == "done" else "created_at"
     order_dir = (dir or "desc")
@@ -443,6 +874,7 @@ def export_tasks_csv(
         order_by=order_by,
         order_dir=order_dir,
         search=q,
+        include_archived=include_archived,
     )
 
     output = StringIO()
@@ -456,9 +888,46 @@ def export_tasks_csv(
             tags_str = str(tags or "")
         writer.writerow([t.id, t.text, t.status, tags_str, t.created_at.isoformat() if t.created_at else ""])
 
+    EXPORT_DURATION.observe(time.perf_counter() - started, format="csv")
+    EXPORT_ROWS.inc(len(items), format="csv")
     headers = {
         "Content-Disposition": f'attachment; filename="tasks-{datetime.utcnow().strftime("%Y%m%d-%H%M%S")}.csv"'
     }
     return PlainTextResponse(content=output.getvalue(), headers=headers, media_type="text/csv; charset=utf-8")
 
+# -----------------------------------------------------------------------------
+# Import: CSV, NDJSON y XLSX
+# -----------------------------------------------------------------------------
+IMPORT_DURATION = metrics.histogram(
+    "tasklist_import_duration_seconds",
+    "Time to parse and insert a bulk import.",
+    ["format"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+IMPORT_ROWS = metrics.counter("tasklist_import_rows", "Rows processed by bulk imports.", ["format", "result"])
 
+@app.post("/tasks-import", response_model=schemas.ImportResultOut)
+def import_tasks(
+    file: UploadFile = File(..., description="CSV, NDJSON or XLSX with the export column layout"),
+    format: Optional[str] = Query(None, description="csv | ndjson | xlsx (default: from file name)"),
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user),
+):
+    """Bulk-import tasks for the current user, streaming the upload and inserting in batches."""
+    started = time.perf_counter()
+    try:
+        fmt = importer.detect_format(file.filename, file.content_type, format)
+        result = importer.import_tasks(
+            db,
+            current_user.id,
+            file.file,
+            fmt,
+            batch_size=settings.IMPORT_BATCH_SIZE,
+            max_errors=settings.IMPORT_MAX_ERRORS,
+        )
+    except importer.ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    IMPORT_DURATION.observe(time.perf_counter() - started, format=fmt)
+    IMPORT_ROWS.inc(result.imported, format=fmt, result="imported")
+    IMPORT_ROWS.inc(result.failed, format=fmt, result="failed")
+    return result
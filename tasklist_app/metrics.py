@@ -0,0 +1,463 @@
+"""Minimal in-process metrics registry with Prometheus text exposition.
+
+Provides:
+- Counter / Gauge / Histogram: labeled metric families.
+- REGISTRY: the default registry used by the application.
+- render_latest: serialize every registered metric in the Prometheus text format.
+- MetricsMiddleware: ASGI middleware recording per-route HTTP metrics.
+
+Recording takes one short lock per family, so it stays in the low microseconds.
+With several uvicorn workers, set `METRICS_MULTIPROC_DIR` to a directory shared
+by all of them: each worker periodically writes a JSON snapshot there, and
+`/metrics` merges the snapshots of every worker (counters and histograms are
+summed, gauges of dead workers are dropped).
+"""
+
+from __future__ import annotations
+
+import bisect
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS: Tuple[float, ...] = (
+    256, 1024, 4096, 16_384, 65_536, 262_144, 1_048_576, 4_194_304, 16_777_216,
+)
+
+
+def _fmt(value: float) -> str:
+    """Format a sample value the way Prometheus expects it."""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Render a `{name="value",...}` label block (empty string when no labels)."""
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric(ABC):
+    """Common state for a metric family: name, help text, and label names."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        """Initialize the family; values are keyed by a tuple of label values."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        """Return the label-value tuple for the given keyword labels."""
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        """Return the HELP/TYPE lines for this family."""
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    @abstractmethod
+    def snapshot(self) -> Dict[LabelValues, object]:
+        """Return a copy of the current values keyed by label tuple."""
+
+    @abstractmethod
+    def render(self, values: Dict[LabelValues, object]) -> Iterable[str]:
+        """Yield exposition lines for the given values."""
+
+    def samples(self) -> Iterable[str]:
+        """Yield exposition lines for every labeled child."""
+        return self.render(self.snapshot())
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        """Initialize an empty counter family."""
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increment the counter for the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Return the current value for the given labels (0 if never incremented)."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def snapshot(self) -> Dict[LabelValues, object]:
+        """Return a copy of the counter values."""
+        with self._lock:
+            return dict(self._values)
+
+    def render(self, values: Dict[LabelValues, object]) -> Iterable[str]:
+        """Yield one `<name>_total` line per labeled child."""
+        for key, val in values.items():
+            yield f"{self.name}_total{_labels(self.labelnames, key)} {_fmt(val)}"
+
+    @staticmethod
+    def merge(acc: Dict[LabelValues, object], values: Dict[LabelValues, object]) -> None:
+        """Sum `values` into `acc`."""
+        for key, val in values.items():
+            acc[key] = acc.get(key, 0.0) + val
+
+
+class Gauge(_Metric):
+    """Gauge that can go up and down, or be computed at collection time."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        """Initialize an empty gauge family."""
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the gauge for the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increment the gauge for the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        """Decrement the gauge for the given labels."""
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float], **labels: str) -> None:
+        """Compute the gauge value by calling `fn` whenever metrics are collected."""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = fn
+
+    def value(self, **labels: str) -> float:
+        """Return the current value for the given labels."""
+        key = self._key(labels)
+        fn = self._functions.get(key)
+        if fn is not None:
+            return float(fn())
+        return self._values.get(key, 0.0)
+
+    def snapshot(self) -> Dict[LabelValues, object]:
+        """Return current values, evaluating callback gauges."""
+        with self._lock:
+            items = dict(self._values)
+            functions = list(self._functions.items())
+        for key, fn in functions:
+            try:
+                items[key] = float(fn())
+            except Exception:
+                continue
+        return items
+
+    def render(self, values: Dict[LabelValues, object]) -> Iterable[str]:
+        """Yield one line per labeled child."""
+        for key, val in values.items():
+            yield f"{self.name}{_labels(self.labelnames, key)} {_fmt(val)}"
+
+    merge = Counter.merge
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed upper bounds."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Initialize the family with sorted bucket bounds (+Inf is implicit)."""
+        super().__init__(name, documentation, labelnames)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        # per child: [bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation for the given labels."""
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._values.get(key)
+            if child is None:
+                child = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            child[idx] += 1
+            child[-1] += value
+
+    def count(self, **labels: str) -> int:
+        """Return the number of observations recorded for the given labels."""
+        child = self._values.get(self._key(labels))
+        return int(sum(child[:-1])) if child else 0
+
+    def snapshot(self) -> Dict[LabelValues, object]:
+        """Return a copy of the per-bucket counts and sums."""
+        with self._lock:
+            return {k: list(v) for k, v in self._values.items()}
+
+    def render(self, values: Dict[LabelValues, object]) -> Iterable[str]:
+        """Yield cumulative `_bucket` lines plus `_sum` and `_count` per child."""
+        for key, child in values.items():
+            cumulative = 0.0
+            for bound, n in zip(self.buckets + (float("inf"),), child[:-1]):
+                cumulative += n
+                le = f'le="{_fmt(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {_fmt(cumulative)}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(child[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {_fmt(cumulative)}"
+
+    @staticmethod
+    def merge(acc: Dict[LabelValues, object], values: Dict[LabelValues, object]) -> None:
+        """Sum bucket counts and sums of `values` into `acc`."""
+        for key, child in values.items():
+            current = acc.get(key)
+            if current is None:
+                acc[key] = list(child)
+            else:
+                acc[key] = [a + b for a, b in zip(current, child)]
+
+
+class Registry:
+    """Ordered collection of metric families."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.multiproc_dir: Optional[str] = None
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Register a family, returning the existing one if the name is taken."""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Return a registered family by name."""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Serialize all families in the Prometheus text exposition format."""
+        if self.multiproc_dir:
+            return self._render_multiprocess()
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    # --- multi-worker aggregation ---------------------------------------------
+    def _snapshot_path(self, pid: int) -> str:
+        """Return the snapshot file of worker `pid`."""
+        return os.path.join(self.multiproc_dir or "", f"metrics-{pid}.json")
+
+    def write_snapshot(self) -> None:
+        """Atomically write this worker's values to the shared directory."""
+        if not self.multiproc_dir:
+            return
+        data = {
+            "pid": os.getpid(),
+            "metrics": {
+                name: [[list(k), v] for k, v in metric.snapshot().items()]
+                for name, metric in list(self._metrics.items())
+            },
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.multiproc_dir, prefix=".metrics-")
+        with os.fdopen(fd, "w") as fh:
+            json.dump(data, fh)
+        os.replace(tmp, self._snapshot_path(os.getpid()))
+
+    def _render_multiprocess(self) -> str:
+        """Merge the snapshots of every worker and render them."""
+        self.write_snapshot()
+        merged: Dict[str, Dict[LabelValues, object]] = {name: {} for name in self._metrics}
+        for path in glob.glob(os.path.join(self.multiproc_dir or "", "metrics-*.json")):
+            try:
+                with open(path) as fh:
+                    data = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            alive = _pid_alive(int(data.get("pid", 0)))
+            for name, items in data.get("metrics", {}).items():
+                metric = self._metrics.get(name)
+                if metric is None or (isinstance(metric, Gauge) and not alive):
+                    continue
+                type(metric).merge(merged[name], {tuple(k): v for k, v in items})
+        lines: List[str] = []
+        for name, metric in list(self._metrics.items()):
+            lines.extend(metric.header())
+            lines.extend(metric.render(merged.get(name, {})))
+        return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: int) -> bool:
+    """Return True if a process with `pid` exists."""
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Create (or fetch) a counter in the default registry."""
+    return REGISTRY.register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    """Create (or fetch) a gauge in the default registry."""
+    return REGISTRY.register(Gauge(name, documentation, labelnames))  # type: ignore[return-value]
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """Create (or fetch) a histogram in the default registry."""
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+
+def render_latest() -> str:
+    """Return the exposition text for the default registry."""
+    return REGISTRY.render()
+
+
+_flusher_pid: Optional[int] = None
+
+
+def enable_multiprocess(directory: str, interval: float = 5.0) -> None:
+    """Share this worker's metrics through `directory`, flushing every `interval` seconds."""
+    global _flusher_pid
+    os.makedirs(directory, exist_ok=True)
+    REGISTRY.multiproc_dir = directory
+    if _flusher_pid == os.getpid():
+        return
+    _flusher_pid = os.getpid()
+
+    def _flush_forever() -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                REGISTRY.write_snapshot()
+            except OSError:
+                pass
+
+    threading.Thread(target=_flush_forever, name="metrics-flusher", daemon=True).start()
+
+
+# -----------------------------------------------------------------------------
+# HTTP metrics
+# -----------------------------------------------------------------------------
+HTTP_LATENCY = histogram(
+    "tasklist_http_request_duration_seconds",
+    "Request latency by route template.",
+    ["method", "route"],
+)
+HTTP_REQUESTS = counter(
+    "tasklist_http_requests", "Requests served by route template and status.", ["method", "route", "status"]
+)
+HTTP_ERRORS = counter(
+    "tasklist_http_request_errors", "Requests that ended in a 5xx or an exception.", ["method", "route"]
+)
+HTTP_IN_FLIGHT = gauge("tasklist_http_requests_in_flight", "Requests currently being served.")
+HTTP_RESPONSE_SIZE = histogram(
+    "tasklist_http_response_size_bytes", "Response body size by route template.", ["route"], buckets=SIZE_BUCKETS
+)
+
+
+def route_template(scope) -> str:
+    """Return the matched route template (e.g. `/tasks/{task_id}`), never the raw path."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path else "<unmatched>"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status, size and in-flight gauges per route."""
+
+    def __init__(self, app, multiproc_dir: Optional[str] = None) -> None:
+        """Wrap the downstream ASGI app, optionally sharing metrics across workers."""
+        self.app = app
+        self.multiproc_dir = multiproc_dir
+
+    async def __call__(self, scope, receive, send):
+        """Record one HTTP request; pass other scope types through."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.multiproc_dir and _flusher_pid != os.getpid():
+            enable_multiprocess(self.multiproc_dir)
+
+        start = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            record_request(scope, status_code, size, time.perf_counter() - start)
+
+
+def record_request(scope, status_code: int, size: int, elapsed: float) -> None:
+    """Record the metrics of one finished request."""
+    method = scope.get("method", "")
+    route = route_template(scope)
+    HTTP_LATENCY.observe(elapsed, method=method, route=route)
+    HTTP_REQUESTS.inc(method=method, route=route, status=str(status_code))
+    HTTP_RESPONSE_SIZE.observe(size, route=route)
+    if status_code >= 500:
+        HTTP_ERRORS.inc(method=method, route=route)
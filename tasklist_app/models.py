@@ -1,14 +1,17 @@
 """SQLAlchemy ORM models for users and tasks.
 
-Defines two tables:
+Defines:
 - User: accounts with email credentials and timestamps.
 - Task: task entries owned by users, with status and tag list.
+- TaskArchive: long-done tasks moved out of the hot `tasks` table.
+- TaskStatusCount / TaskTagCount / TaskDailyCompletion: per-user counters kept
+  current by triggers on `tasks` and `tasks_archive` (see `STATS_TRIGGERS`).
 """
 
-from datetime import datetime
-from typing import List
+from datetime import date, datetime
+from typing import List, Optional
 
-from sqlalchemy import Integer, String, DateTime, func, ForeignKey
+from sqlalchemy import DDL, Date, Index, Integer, String, DateTime, event, func, ForeignKey
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -19,6 +22,11 @@ class User(Base):
     """User account table."""
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Admin email search is a prefix LIKE; PostgreSQL needs pattern ops to use an index for it.
+        Index("ix_users_email_pattern", "email", postgresql_ops={"email": "text_pattern_ops"})
+        .ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
@@ -30,8 +38,10 @@ class User(Base):
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
     )
 
+    # passive_deletes: deleting a user never loads its tasks; the FK's
+    # ON DELETE CASCADE removes them (see crud.delete_user for batching).
     tasks: Mapped[List["Task"]] = relationship(
-        back_populates="owner", cascade="all, delete-orphan"
+        back_populates="owner", cascade="all, delete-orphan", passive_deletes=True
     )
 
 
@@ -39,6 +49,8 @@ class Task(Base):
     """Task table storing text, status, tags, and ownership."""
 
     __tablename__ = "tasks"
+    # Keyset paging of the admin list by creation time (see admin_views.ScalableModelView).
+    __table_args__ = (Index("ix_tasks_created_at_id", "created_at", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     text: Mapped[str] = mapped_column(String, nullable=False)
@@ -51,8 +63,168 @@ class Task(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
     )
+    # Set when the status becomes done and cleared when it is reopened; other edits leave it alone.
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     owner_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     owner: Mapped["User"] = relationship(back_populates="tasks")
+
+
+class TaskArchive(Base):
+    """Archive table for tasks done long ago, moved out of `tasks` by `archive.py`.
+
+    Columns mirror `Task` (ids are preserved) plus the time the row was archived.
+    """
+
+    __tablename__ = "tasks_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    text: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    tags: Mapped[list] = mapped_column(JSON, default=list, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    owner_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+
+
+# -----------------------------------------------------------------------------
+# Maintained counters (GET /tasks/stats)
+# -----------------------------------------------------------------------------
+class TaskStatusCount(Base):
+    """Number of a user's tasks (in `tasks`) per status."""
+
+    __tablename__ = "task_status_counts"
+
+    owner_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class TaskTagCount(Base):
+    """Number of a user's tasks (in `tasks`) carrying each tag or mention."""
+
+    __tablename__ = "task_tag_counts"
+
+    owner_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    tag: Mapped[str] = mapped_column(String, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class TaskDailyCompletion(Base):
+    """Done tasks per UTC day of their `completed_at`, archived ones included."""
+
+    __tablename__ = "task_daily_completions"
+
+    owner_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+DONE_STATUSES = ("done", "DONE")
+_DONE_SQL = ", ".join(f"'{s}'" for s in DONE_STATUSES)
+# A done row written without `completed_at` (e.g. raw SQL) counts on the day it was last updated.
+_COMPLETED_SQL = "COALESCE({row}.completed_at, {row}.updated_at)"
+
+
+def _sqlite_apply(row: str, sign: int, hot: bool) -> str:
+    """Trigger body statements adding `sign` for the OLD/NEW `row` (SQLite)."""
+    stmts = []
+    if hot:
+        stmts.append(
+            f"INSERT INTO task_status_counts (owner_id, status, count) VALUES ({row}.owner_id, {row}.status, {sign}) "
+            "ON CONFLICT (owner_id, status) DO UPDATE SET count = count + excluded.count;"
+        )
+        stmts.append(
+            f"INSERT INTO task_tag_counts (owner_id, tag, count) "
+            f"SELECT {row}.owner_id, value, {sign} FROM json_each({row}.tags) WHERE true "
+            "ON CONFLICT (owner_id, tag) DO UPDATE SET count = count + excluded.count;"
+        )
+    stmts.append(
+        f"INSERT INTO task_daily_completions (owner_id, day, count) "
+        f"SELECT {row}.owner_id, date({_COMPLETED_SQL.format(row=row)}), {sign} WHERE {row}.status IN ({_DONE_SQL}) "
+        "ON CONFLICT (owner_id, day) DO UPDATE SET count = count + excluded.count;"
+    )
+    return "\n  ".join(stmts)
+
+
+def _sqlite_triggers(table: str, hot: bool) -> List[str]:
+    """AFTER INSERT/UPDATE/DELETE triggers on `table` (SQLite)."""
+    columns = "status, owner_id, updated_at, completed_at"
+    if hot:
+        columns = "status, tags, owner_id, updated_at, completed_at"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_stats_ai AFTER INSERT ON {table} BEGIN\n  "
+        f"{_sqlite_apply('NEW', 1, hot)}\nEND",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_stats_au AFTER UPDATE OF {columns} ON {table} BEGIN\n  "
+        f"{_sqlite_apply('OLD', -1, hot)}\n  {_sqlite_apply('NEW', 1, hot)}\nEND",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_stats_ad AFTER DELETE ON {table} BEGIN\n  "
+        f"{_sqlite_apply('OLD', -1, hot)}\nEND",
+    ]
+
+
+_PG_APPLY = f"""
+CREATE OR REPLACE FUNCTION task_stats_apply(p_owner integer, p_status text, p_tags json,
+                                            p_completed timestamptz, p_sign integer, p_hot boolean)
+RETURNS void AS $$
+BEGIN
+  IF p_hot THEN
+    INSERT INTO task_status_counts (owner_id, status, count) VALUES (p_owner, p_status, p_sign)
+      ON CONFLICT (owner_id, status) DO UPDATE SET count = task_status_counts.count + excluded.count;
+    INSERT INTO task_tag_counts (owner_id, tag, count)
+      SELECT p_owner, t, p_sign FROM json_array_elements_text(COALESCE(p_tags, '[]'::json)) AS t
+      ON CONFLICT (owner_id, tag) DO UPDATE SET count = task_tag_counts.count + excluded.count;
+  END IF;
+  IF p_status IN ({_DONE_SQL}) THEN
+    INSERT INTO task_daily_completions (owner_id, day, count)
+      VALUES (p_owner, (p_completed AT TIME ZONE 'UTC')::date, p_sign)
+      ON CONFLICT (owner_id, day) DO UPDATE SET count = task_daily_completions.count + excluded.count;
+  END IF;
+END $$ LANGUAGE plpgsql
+"""
+
+_PG_TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION {table}_stats_trigger() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM task_stats_apply(OLD.owner_id, OLD.status, OLD.tags,
+                             COALESCE(OLD.completed_at, OLD.updated_at), -1, {hot});
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM task_stats_apply(NEW.owner_id, NEW.status, NEW.tags,
+                             COALESCE(NEW.completed_at, NEW.updated_at), 1, {hot});
+  END IF;
+  RETURN NULL;
+END $$ LANGUAGE plpgsql
+"""
+
+
+def _pg_triggers(table: str, hot: bool) -> List[str]:
+    """Trigger function and AFTER ROW trigger on `table` (PostgreSQL)."""
+    return [
+        _PG_TRIGGER_FN.format(table=table, hot="true" if hot else "false"),
+        f"DROP TRIGGER IF EXISTS {table}_stats ON {table}",
+        f"CREATE TRIGGER {table}_stats AFTER INSERT OR UPDATE OR DELETE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {table}_stats_trigger()",
+    ]
+
+
+# The counters move in the same transaction as every write to the task tables,
+# whichever path makes it (crud, bulk import, seed COPY, archival, cascades).
+STATS_TRIGGERS = {
+    "sqlite": _sqlite_triggers("tasks", hot=True) + _sqlite_triggers("tasks_archive", hot=False),
+    "postgresql": [_PG_APPLY] + _pg_triggers("tasks", hot=True) + _pg_triggers("tasks_archive", hot=False),
+}
+
+for _dialect, _statements in STATS_TRIGGERS.items():
+    for _sql in _statements:
+        event.listen(Base.metadata, "after_create", DDL(_sql).execute_if(dialect=_dialect))
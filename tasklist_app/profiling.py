@@ -0,0 +1,258 @@
+"""On-demand request profiling for whitelisted admins.
+
+When `PROFILING_ENABLED` is set, `ProfilingMiddleware` is installed and an admin
+(an email in `AdminAuth.admin_emails`, authenticated through the /admin session
+or a bearer token) can send `X-Profile: 1` or `?__profile=1` to run that one
+request under a stack-sampling profiler. Samples are stored as folded stacks
+(`frame;frame;frame count`), ready for flamegraph.pl or speedscope, in a
+bounded in-memory store browsable at /admin/profiles. With the feature off the
+middleware is not installed at all.
+
+Only the threads working for the profiled request are sampled: the event loop
+thread that runs the middleware and async code, and the worker thread running
+a sync endpoint (reported by `ProfiledRoute`). Concurrent async requests share
+the event loop thread and can still appear in its samples.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import functools
+import itertools
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Deque, Dict, Iterable, List, Optional, Set
+from urllib.parse import parse_qs
+
+from fastapi.routing import APIRoute
+
+from .admin_auth import admin_email_for
+from .settings import settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_FLAG = "__profile"
+
+# Idents of the threads working for the profiled request (None outside one).
+_profiled_threads: ContextVar[Optional[Set[int]]] = ContextVar("tasklist_profiled_threads", default=None)
+
+# Leaf frames that mean "this thread is idle", not working for a request.
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("base_events.py", "_run_once"),
+}
+
+
+def _frame_label(frame) -> str:
+    """Return `module.py:function` for one frame."""
+    code = frame.f_code
+    return f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}"
+
+
+def _is_idle(frame) -> bool:
+    """Return True if the thread's innermost frame is a known idle wait."""
+    code = frame.f_code
+    return (code.co_filename.rsplit("/", 1)[-1], code.co_name) in _IDLE_LEAVES
+
+
+class StackSampler:
+    """Sample the Python stacks of other threads at a fixed interval."""
+
+    def __init__(self, interval: float = 0.001, threads: Optional[Set[int]] = None) -> None:
+        """Initialize with the sampling interval in seconds and the thread idents to sample (None: all)."""
+        self.interval = interval
+        self.threads = threads
+        self.counts: Dict[str, int] = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample_once(self, own_ident: int) -> None:
+        """Take one sample of the selected non-idle threads."""
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident or (self.threads is not None and ident not in self.threads) or _is_idle(frame):
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.counts[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        """Sampling loop executed in the sampler thread."""
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self._sample_once(own)
+
+    def start(self) -> None:
+        """Start sampling in a daemon thread."""
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def folded(self) -> str:
+        """Return the samples in folded-stack format (one `stack count` per line)."""
+        return "".join(f"{stack} {n}\n" for stack, n in sorted(self.counts.items()))
+
+
+def _reporting_thread(endpoint):
+    """Wrap a sync endpoint so its worker thread is sampled while it runs for a profiled request."""
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        threads = _profiled_threads.get()
+        if threads is None:
+            return endpoint(*args, **kwargs)
+        ident = threading.get_ident()
+        threads.add(ident)
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            threads.discard(ident)
+
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose sync endpoint reports its worker thread to an active profile."""
+
+    def __init__(self, path: str, endpoint, **kwargs) -> None:
+        """Wrap sync endpoints; async ones already run on the sampled event loop thread."""
+        if not asyncio.iscoroutinefunction(endpoint):
+            endpoint = _reporting_thread(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+@dataclass
+class ProfileRecord:
+    """One profiled request."""
+
+    id: int
+    method: str
+    path: str
+    admin_email: str
+    status: int
+    duration_ms: float
+    samples: int
+    folded: str
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def top_frames(self, limit: int = 15) -> list[tuple[str, int]]:
+        """Return the innermost frames that appear in the most samples."""
+        tally: Dict[str, int] = collections.Counter()
+        for line in self.folded.splitlines():
+            stack, _, n = line.rpartition(" ")
+            tally[stack.rsplit(";", 1)[-1]] += int(n)
+        return tally.most_common(limit)
+
+
+class ProfileStore:
+    """Bounded, thread-safe store of the most recent profiles."""
+
+    def __init__(self, maxlen: int = 20) -> None:
+        """Keep at most `maxlen` profiles."""
+        self._items: Deque[ProfileRecord] = collections.deque(maxlen=maxlen)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        """Return a new profile id."""
+        return next(self._ids)
+
+    def add(self, record: ProfileRecord) -> None:
+        """Store a profile, evicting the oldest when full."""
+        with self._lock:
+            self._items.appendleft(record)
+
+    def get(self, profile_id: int) -> Optional[ProfileRecord]:
+        """Return a stored profile by id."""
+        with self._lock:
+            return next((r for r in self._items if r.id == profile_id), None)
+
+    def all(self) -> Iterable[ProfileRecord]:
+        """Return stored profiles, newest first."""
+        with self._lock:
+            return list(self._items)
+
+
+store = ProfileStore(maxlen=settings.PROFILE_STORE_SIZE)
+
+
+def _wants_profile(scope) -> bool:
+    """Return True if the request carries the profiling header or query flag."""
+    for name, value in scope.get("headers", []):
+        if name == PROFILE_HEADER and value not in (b"", b"0"):
+            return True
+    query = scope.get("query_string", b"").decode("latin-1")
+    if PROFILE_QUERY_FLAG not in query:
+        return False
+    values = parse_qs(query, keep_blank_values=True).get(PROFILE_QUERY_FLAG, [])
+    return any(v not in ("0", "false") for v in values)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles flagged requests from whitelisted admins."""
+
+    def __init__(self, app, admin_emails: set[str], interval: float = 0.001, profile_store: ProfileStore = store) -> None:
+        """Wrap the app with the admin whitelist, sampling interval and store."""
+        self.app = app
+        self.admin_emails = admin_emails
+        self.interval = interval
+        self.store = profile_store
+
+    async def __call__(self, scope, receive, send):
+        """Profile the request when asked by an admin; otherwise pass through."""
+        if scope["type"] != "http" or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        email = admin_email_for(scope, self.admin_emails)
+        if not email:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = self.store.next_id()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", [])) + [(b"x-profile-id", str(profile_id).encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        threads = {threading.get_ident()}  # the event loop thread; ProfiledRoute adds worker threads
+        token = _profiled_threads.set(threads)
+        sampler = StackSampler(self.interval, threads=threads)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            _profiled_threads.reset(token)
+            self.store.add(ProfileRecord(
+                id=profile_id,
+                method=scope.get("method", ""),
+                path=scope.get("path", ""),
+                admin_email=email,
+                status=status_code,
+                duration_ms=(time.perf_counter() - start) * 1000.0,
+                samples=sampler.samples,
+                folded=sampler.folded(),
+            ))
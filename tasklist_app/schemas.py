@@ -1,14 +1,17 @@
 """Pydantic schemas for users, authentication, and tasks.
 
 These classes define request and response models used by the FastAPI endpoints:
-- UserBase / UserCreate / UserOut
+- UserBase / UserCreate / UserOut / AccountDeletionOut
 - Token / TokenData
-- TaskBase / TaskCreate / TaskUpdate / TaskOut
-- PageMeta / PageTasks
+- TaskBase / TaskCreate / TaskUpdate / TaskPatch / TaskOut
+- ImportRowError / ImportResultOut
+- TagCount / PageMeta / PageTasks
+- DayCount / TaskStatsOut
+- AutocompleteOut
 """
 
-from datetime import datetime
-from typing import Optional, Literal, List
+from datetime import date, datetime
+from typing import Dict, Optional, Literal, List
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -34,6 +37,13 @@ class UserOut(UserBase):
         from_attributes = True
 
 
+class AccountDeletionOut(BaseModel):
+    """Summary of a completed account deletion."""
+    user_id: int
+    tasks_deleted: int
+    batches: int
+
+
 # ---------- Auth ----------
 class Token(BaseModel):
     """Bearer token returned after successful authentication."""
@@ -66,6 +76,12 @@ class TaskUpdate(TaskBase):
     pass
 
 
+class TaskPatch(BaseModel):
+    """Partial update payload: only the fields sent are applied."""
+    text: Optional[str] = Field(default=None, min_length=1, max_length=10_000)
+    status: Optional[TaskStatus] = None
+
+
 class TaskOut(BaseModel):
     """Representation of a task returned by the API."""
     id: int
@@ -79,7 +95,28 @@ class TaskOut(BaseModel):
         from_attributes = True
 
 
+# ---------- Bulk import ----------
+class ImportRowError(BaseModel):
+    """A rejected row of an import (1-based, header is row 1 for CSV/XLSX)."""
+    row: int
+    error: str
+
+
+class ImportResultOut(BaseModel):
+    """Summary of a bulk import."""
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool = False
+
+
 # ---------- Pagination ----------
+class TagCount(BaseModel):
+    """Number of tasks carrying a tag or mention."""
+    tag: str
+    count: int
+
+
 class PageMeta(BaseModel):
     """Pagination metadata."""
     total: int
@@ -88,6 +125,29 @@ class PageMeta(BaseModel):
 
 
 class PageTasks(BaseModel):
-    """Paginated list of tasks with metadata."""
+    """Paginated list of tasks with metadata (and tag facets when requested)."""
     items: list[TaskOut]
     meta: PageMeta
+    facets: Optional[Dict[str, List[TagCount]]] = None
+
+
+# ---------- Statistics ----------
+class DayCount(BaseModel):
+    """Tasks completed on one UTC day."""
+    day: date
+    count: int
+
+
+class TaskStatsOut(BaseModel):
+    """Per-user totals read from the maintained counters."""
+    total: int
+    by_status: Dict[str, int]
+    by_tag: List[TagCount]
+    completions: List[DayCount]
+
+
+# ---------- Autocomplete ----------
+class AutocompleteOut(BaseModel):
+    """Suggestions for a typed prefix: @handles of users and the caller's own #tags."""
+    handles: List[str]
+    tags: List[str]
@@ -0,0 +1,202 @@
+"""Bulk synthetic data generator.
+
+Creates users and tasks that look like production data. Task texts vary in
+length, carry `#tags` and `@mentions` of other seeded users, follow a
+pending/done mix, and have timestamps spread over the last year. Tasks that
+mention someone are fanned out to the mentioned users, as `POST /tasks` does.
+For a given `--seed` the data is always the same; only the timestamps move,
+because they are relative to the time of the run.
+
+Rows bypass the ORM. On PostgreSQL they are streamed with `COPY ... FROM STDIN`;
+on other backends (SQLite) they go in as DBAPI `executemany` batches. Every user
+shares a single bcrypt hash, so no time is spent hashing.
+
+Usage:
+    python -m tasklist_app.seed --users 1000 --tasks 1000000 --seed 42
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime as dt
+import io
+import json
+import random
+import sys
+import time
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+
+from . import models, utils
+
+DEFAULT_PASSWORD = "password123"
+DEFAULT_DOMAIN = "seed.example"
+
+WORDS = (
+    "review deploy write fix update plan call email draft test refactor migrate invoice "
+    "report meeting backlog release docs budget client design sprint bug server cache "
+    "index query export import schedule follow-up onboarding renew contract order buy "
+    "groceries book flight prepare slides interview candidate backup laptop clean garage "
+    "pay rent water plants read chapter send feedback sync team roadmap estimate ticket"
+).split()
+_TAGS = ["#work", "#home", "#urgent", "#later", "#ops", "#finance", "#docs", "#q3",
+         "#health", "#travel", "#errands", "#reading", "#family", "#infra", "#sales"]
+# Word counts: mostly short to-dos, some notes, a long tail of pasted paragraphs.
+_LENGTHS = [3] * 3 + [5] * 5 + [8] * 5 + [12] * 3 + [20] * 2 + [40, 80]
+_TAG_COUNTS = (0, 0, 1, 1, 1, 2, 2, 3)
+_MENTION_COUNTS = (0,) * 8 + (1, 1, 2)
+
+# `completed_at` is written from the row: a done task was completed at its `updated_at`.
+_TASK_COLUMNS = ("text", "status", "tags", "owner_id", "created_at", "updated_at", "completed_at")
+
+TaskRow = Tuple[str, str, str, int, dt.datetime, dt.datetime]
+
+
+def user_email(i: int, domain: str = DEFAULT_DOMAIN) -> str:
+    """Email of the i-th seeded user; its @handle is `user<i>`."""
+    return f"user{i}@{domain}"
+
+
+def generate_tasks(
+    rnd: random.Random,
+    user_ids: Sequence[int],
+    count: int,
+    done_ratio: float = 0.3,
+    now: Optional[dt.datetime] = None,
+) -> Iterator[TaskRow]:
+    """Yield `count` task rows, including the copies fanned out to mentioned users."""
+    now = (now or dt.datetime.now(dt.timezone.utc)).replace(tzinfo=None)
+    year = 365 * 86400
+    n_users = len(user_ids)
+    produced = 0
+    while produced < count:
+        owner = rnd.randrange(n_users)
+        words = rnd.choices(WORDS, k=rnd.choice(_LENGTHS))
+        tags = rnd.sample(_TAGS, k=rnd.choice(_TAG_COUNTS))
+        mentioned = {rnd.randrange(n_users) for _ in range(rnd.choice(_MENTION_COUNTS))} - {owner}
+        handles = [f"@user{m}" for m in sorted(mentioned)]
+        text = " ".join(words + tags + handles)
+        # Same order as utils.extract_tags: hashtags first, then mentions.
+        tags_json = json.dumps(tags + handles)
+        status = "done" if rnd.random() < done_ratio else "pending"
+        created = now - dt.timedelta(seconds=rnd.randrange(year))
+        updated = created + dt.timedelta(seconds=rnd.randrange(86400)) if status == "done" else created
+        for idx in [owner, *sorted(mentioned)]:
+            if produced == count:
+                break
+            yield (text, status, tags_json, user_ids[idx], created, updated)
+            produced += 1
+
+
+def _batches(rows: Iterator[TaskRow], size: int) -> Iterator[List[TaskRow]]:
+    """Group rows into lists of at most `size`."""
+    batch: List[TaskRow] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _copy_tasks(dbapi_conn, rows: Iterator[TaskRow], batch_size: int) -> None:
+    """Stream rows into `tasks` with PostgreSQL COPY, one CSV buffer per batch."""
+    sql = f"COPY tasks ({', '.join(_TASK_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    with dbapi_conn.cursor() as cur:
+        for batch in _batches(rows, batch_size):
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            for text, status, tags, owner_id, created, updated in batch:
+                completed = updated.isoformat() + "+00:00" if status == "done" else ""  # empty is NULL
+                writer.writerow((text, status, tags, owner_id,
+                                 created.isoformat() + "+00:00", updated.isoformat() + "+00:00", completed))
+            buf.seek(0)
+            cur.copy_expert(sql, buf)
+
+
+def _executemany_tasks(dbapi_conn, rows: Iterator[TaskRow], batch_size: int) -> None:
+    """Insert rows into `tasks` with DBAPI executemany, one call per batch."""
+    sql = (f"INSERT INTO tasks ({', '.join(_TASK_COLUMNS)}) "
+           f"VALUES ({', '.join('?' for _ in _TASK_COLUMNS)})")
+    fmt = "%Y-%m-%d %H:%M:%S.%f"  # SQLAlchemy's SQLite DateTime storage format
+    cur = dbapi_conn.cursor()
+    try:
+        for batch in _batches(rows, batch_size):
+            cur.executemany(sql, [
+                (text, status, tags, owner_id, created.strftime(fmt), updated.strftime(fmt),
+                 updated.strftime(fmt) if status == "done" else None)
+                for text, status, tags, owner_id, created, updated in batch
+            ])
+    finally:
+        cur.close()
+
+
+def seed_database(
+    engine: Engine,
+    users: int,
+    tasks: int,
+    seed: int = 0,
+    done_ratio: float = 0.3,
+    password: str = DEFAULT_PASSWORD,
+    email_domain: str = DEFAULT_DOMAIN,
+    batch_size: int = 10_000,
+    now: Optional[dt.datetime] = None,
+) -> dict:
+    """Create `users` users and `tasks` tasks on `engine`; return counts and timing."""
+    if users < 1:
+        raise ValueError("users must be >= 1")
+    start = time.perf_counter()
+    rnd = random.Random(seed)
+    password_hash = utils.hash_password(password)
+    emails = [user_email(i, email_domain) for i in range(users)]
+
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"email": e, "password_hash": password_hash} for e in emails])
+        by_email = dict(conn.execute(
+            select(models.User.email, models.User.id).where(models.User.email.like(f"%@{email_domain}"))
+        ).all())
+    user_ids = [by_email[e] for e in emails]
+
+    rows = generate_tasks(rnd, user_ids, tasks, done_ratio=done_ratio, now=now)
+    raw = engine.raw_connection()
+    try:
+        if engine.dialect.name == "postgresql":
+            _copy_tasks(raw.driver_connection, rows, batch_size)
+        else:
+            _executemany_tasks(raw.driver_connection, rows, batch_size)
+        raw.commit()
+    finally:
+        raw.close()
+
+    return {"users": users, "tasks": tasks, "seconds": round(time.perf_counter() - start, 2)}
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic users and tasks.")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0, help="same seed, same data")
+    parser.add_argument("--done-ratio", type=float, default=0.3)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="password shared by every seeded user")
+    parser.add_argument("--email-domain", default=DEFAULT_DOMAIN)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    from .database import engine
+
+    result = seed_database(
+        engine, args.users, args.tasks, seed=args.seed, done_ratio=args.done_ratio,
+        password=args.password, email_domain=args.email_domain, batch_size=args.batch_size,
+    )
+    print(f"seeded {result['users']} user(s) and {result['tasks']} task(s) in {result['seconds']}s "
+          f"(login as {user_email(0, args.email_domain)} / {args.password})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,20 @@
 """Application settings using pydantic-settings.
 
 Loads configuration from environment variables or a `.env` file.
-Includes database URL, JWT configuration, and CORS origins.
+Includes database URLs (primary and replicas) and pool sizing, cache invalidation,
+JWT configuration, and CORS origins.
 """
 
 from __future__ import annotations
 
 import json
-from typing import List, Optional
+import re
+import tempfile
+from pathlib import Path
+from typing import Annotated, List, Optional
 
 from pydantic import Field, field_validator
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -26,6 +30,102 @@ class Settings(BaseSettings):
     # --- Database ---
     DATABASE_URL: str
 
+    # --- Read replicas (optional) ---
+    # Comma-separated or JSON list of replica URLs used by read-only routes.
+    DATABASE_REPLICA_URLS: Annotated[List[str], NoDecode] = Field(default_factory=list)
+    REPLICA_STRATEGY: str = Field(default="round_robin")  # round_robin | least_loaded
+    READ_YOUR_WRITES_SECONDS: float = Field(default=5.0)
+
+    # --- Connection pool (non-memory databases) ---
+    DB_POOL_SIZE: int = Field(default=5)
+    DB_MAX_OVERFLOW: int = Field(default=10)
+    DB_POOL_TIMEOUT: float = Field(default=30.0)
+    DB_POOL_RECYCLE: int = Field(default=1800)
+    DB_POOL_PRE_PING: bool = Field(default=True)
+
+    # --- Metrics ---
+    # Directory shared by all uvicorn workers; enables cross-worker aggregation.
+    METRICS_MULTIPROC_DIR: Optional[str] = Field(default=None)
+
+    # --- On-demand profiling (admins only) ---
+    PROFILING_ENABLED: bool = Field(default=False)
+    PROFILE_SAMPLE_INTERVAL_MS: float = Field(default=1.0)
+    PROFILE_STORE_SIZE: int = Field(default=20)
+
+    # --- SQL instrumentation ---
+    SLOW_QUERY_MS: float = Field(default=200.0)
+    N_PLUS_ONE_THRESHOLD: int = Field(default=10)
+
+    # --- Archival of done tasks ---
+    ARCHIVE_AFTER_DAYS: int = Field(default=90)
+    ARCHIVE_BATCH_SIZE: int = Field(default=1000)
+
+    # --- Account deletion ---
+    ACCOUNT_DELETE_BATCH_SIZE: int = Field(default=5000)
+
+    # --- Live updates (GET /tasks/stream) ---
+    SSE_HEARTBEAT_SECONDS: float = Field(default=15.0)
+    SSE_QUEUE_SIZE: int = Field(default=100)  # per stream; overflow sends one "resync"
+
+    # --- Server-rendered task list (/app/tasks) ---
+    TASKS_FIRST_PAGE_SIZE: int = Field(default=50)
+    ROW_FRAGMENT_CACHE_SIZE: int = Field(default=10_000)  # cached row fragments per worker
+
+    # --- Tag facets (/tasks?facets=tags) ---
+    FACET_CACHE_SIZE: int = Field(default=5_000)  # cached facet lists per worker
+    FACET_CACHE_TTL_SECONDS: float = Field(default=300.0)
+
+    # --- Autocomplete (/autocomplete) ---
+    AUTOCOMPLETE_TAG_INDEXES: int = Field(default=5_000)  # per-user tag indexes kept per worker
+
+    # --- Statement timeouts per route class (seconds, 0 disables; see deps) ---
+    STATEMENT_TIMEOUT_LISTING_SECONDS: float = Field(default=2.0)
+    STATEMENT_TIMEOUT_SEARCH_SECONDS: float = Field(default=5.0)
+    STATEMENT_TIMEOUT_EXPORT_SECONDS: float = Field(default=60.0)
+
+    # --- Stale listings under database pressure (/tasks, /tasks-ui; see degraded) ---
+    LISTING_LATENCY_BUDGET_SECONDS: float = Field(default=1.0)  # 0 disables
+    LISTING_STALE_MAX_SECONDS: float = Field(default=300.0)
+    LISTING_STALE_CACHE_SIZE: int = Field(default=10_000)
+
+    # --- Admission control per route class (per worker; see admission) ---
+    ADMISSION_ENABLED: bool = Field(default=True)
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = Field(default=5.0)
+    ADMISSION_READ_CONCURRENCY: int = Field(default=16)
+    ADMISSION_READ_QUEUE: int = Field(default=256)
+    ADMISSION_WRITE_CONCURRENCY: int = Field(default=8)
+    ADMISSION_WRITE_QUEUE: int = Field(default=128)
+    ADMISSION_AUTH_CONCURRENCY: int = Field(default=4)  # bcrypt is CPU-bound: about one per core
+    ADMISSION_AUTH_QUEUE: int = Field(default=32)
+    ADMISSION_ADMIN_CONCURRENCY: int = Field(default=4)
+    ADMISSION_ADMIN_QUEUE: int = Field(default=16)
+    ADMISSION_EXPORT_CONCURRENCY: int = Field(default=2)
+    ADMISSION_EXPORT_QUEUE: int = Field(default=4)
+
+    # --- Admin list views (/admin/*/list) ---
+    ADMIN_STATEMENT_TIMEOUT_SECONDS: float = Field(default=5.0)  # 0 disables
+    ADMIN_COUNT_CAP: int = Field(default=10_000)  # search results are counted up to this many
+
+    # --- Cross-worker cache invalidation ---
+    INVALIDATION_BACKEND: str = Field(default="memory")  # memory | file | postgres
+    INVALIDATION_FILE: str = Field(default=str(Path(tempfile.gettempdir()) / "tasklist-invalidation.log"))
+    INVALIDATION_CHANNEL: str = Field(default="tasklist_invalidate")  # postgres backend
+    INVALIDATION_POLL_SECONDS: float = Field(default=0.5)
+    CACHE_MAX_STALENESS_SECONDS: float = Field(default=30.0)
+
+    # --- Bulk import (POST /tasks-import) ---
+    IMPORT_BATCH_SIZE: int = Field(default=1000)
+    IMPORT_MAX_ERRORS: int = Field(default=100)  # per-row errors listed in the response
+
+    # --- SQLite production profile (file-backed SQLite only, opt-in) ---
+    SQLITE_PERFORMANCE_PROFILE: bool = Field(default=False)
+    SQLITE_JOURNAL_MODE: str = Field(default="WAL")
+    SQLITE_SYNCHRONOUS: str = Field(default="NORMAL")
+    SQLITE_MMAP_SIZE: int = Field(default=268_435_456)
+    SQLITE_CACHE_SIZE: int = Field(default=-65_536)
+    SQLITE_BUSY_TIMEOUT_MS: int = Field(default=5_000)
+    SQLITE_TEMP_STORE: str = Field(default="MEMORY")
+
     # --- App / JWT ---
     SECRET_KEY: str = Field(default="change_me")
     ALGORITHM: str = Field(default="HS256")
@@ -39,6 +139,64 @@ class Settings(BaseSettings):
     # --- Optional ---
     APP_ENV: Optional[str] = Field(default="prod")
 
+    @field_validator("SQLITE_JOURNAL_MODE", "SQLITE_SYNCHRONOUS", "SQLITE_TEMP_STORE")
+    @classmethod
+    def check_sqlite_pragma(cls, v, info):
+        """Restrict SQLite PRAGMA keywords to the values SQLite accepts."""
+        allowed = {
+            "SQLITE_JOURNAL_MODE": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+            "SQLITE_SYNCHRONOUS": {"OFF", "NORMAL", "FULL", "EXTRA"},
+            "SQLITE_TEMP_STORE": {"DEFAULT", "FILE", "MEMORY"},
+        }[info.field_name]
+        value = str(v).strip().upper()
+        if value not in allowed:
+            raise ValueError(f"{info.field_name} must be one of {sorted(allowed)}.")
+        return value
+
+    @field_validator("DATABASE_REPLICA_URLS", mode="before")
+    @classmethod
+    def parse_replica_urls(cls, v):
+        """Parse replica URLs from JSON or a comma-separated list."""
+        if v is None:
+            return []
+        if isinstance(v, str):
+            s = v.strip()
+            if s.startswith("["):
+                try:
+                    return json.loads(s)
+                except json.JSONDecodeError:
+                    raise ValueError(
+                        "DATABASE_REPLICA_URLS must be valid JSON or a comma-separated list."
+                    )
+            return [part.strip() for part in s.split(",") if part.strip()]
+        return v
+
+    @field_validator("REPLICA_STRATEGY")
+    @classmethod
+    def check_replica_strategy(cls, v):
+        """Accept only the supported replica selection strategies."""
+        value = str(v).strip().lower()
+        if value not in {"round_robin", "least_loaded"}:
+            raise ValueError("REPLICA_STRATEGY must be 'round_robin' or 'least_loaded'.")
+        return value
+
+    @field_validator("INVALIDATION_BACKEND")
+    @classmethod
+    def check_invalidation_backend(cls, v):
+        """Accept only the supported invalidation backends."""
+        value = str(v).strip().lower()
+        if value not in {"memory", "file", "postgres"}:
+            raise ValueError("INVALIDATION_BACKEND must be 'memory', 'file' or 'postgres'.")
+        return value
+
+    @field_validator("INVALIDATION_CHANNEL")
+    @classmethod
+    def check_invalidation_channel(cls, v):
+        """Require a plain identifier, since the channel is interpolated into LISTEN."""
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]{0,62}", str(v)):
+            raise ValueError("INVALIDATION_CHANNEL must be a plain SQL identifier.")
+        return str(v)
+
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
     def parse_cors(cls, v):
@@ -0,0 +1,147 @@
+"""Per-user task statistics read from the maintained counter tables.
+
+`task_status_counts`, `task_tag_counts` and `task_daily_completions` are kept
+current by the triggers declared in `models.STATS_TRIGGERS`, in the same
+transaction as each write to `tasks` or `tasks_archive`. Reading a user's
+stats is therefore three primary-key range scans, however many tasks the user
+has. `rebuild` recomputes the counters from the task tables to fix any drift,
+for example after a manual SQL edit made with the triggers disabled.
+
+Usage:
+    python -m tasklist_app.stats --rebuild            # every user
+    python -m tasklist_app.stats --rebuild --user 42  # one user
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import sys
+from typing import Optional
+
+from sqlalchemy import Date, cast, delete, func, insert, select, text, true, union_all
+from sqlalchemy.orm import Session
+
+from . import models
+
+TaskStatusCount = models.TaskStatusCount
+TaskTagCount = models.TaskTagCount
+TaskDailyCompletion = models.TaskDailyCompletion
+
+
+def json_elements(db: Session, column):
+    """Table-valued function yielding one `value` row per element of a JSON array column."""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.json_array_elements_text(column).table_valued("value")
+    return func.json_each(column).table_valued("value")
+
+
+def _utc_day(db: Session, column):
+    """SQL expression for the UTC calendar day of a timestamp column (as the triggers compute it)."""
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.timezone("UTC", column), Date)
+    return func.date(column)
+
+
+def user_stats(
+    db: Session,
+    owner_id: int,
+    days: int = 30,
+    top_tags: int = 50,
+    today: Optional[dt.date] = None,
+) -> dict:
+    """Return totals by status, the `top_tags` most used tags, and daily completions for `days` days."""
+    today = today or dt.datetime.now(dt.timezone.utc).date()
+    since = today - dt.timedelta(days=days - 1)
+
+    by_status = dict(db.execute(
+        select(TaskStatusCount.status, TaskStatusCount.count)
+        .where(TaskStatusCount.owner_id == owner_id, TaskStatusCount.count > 0)
+        .order_by(TaskStatusCount.status)
+    ).all())
+    by_tag = db.execute(
+        select(TaskTagCount.tag, TaskTagCount.count)
+        .where(TaskTagCount.owner_id == owner_id, TaskTagCount.count > 0)
+        .order_by(TaskTagCount.count.desc(), TaskTagCount.tag)
+        .limit(top_tags)
+    ).all()
+    done_by_day = dict(db.execute(
+        select(TaskDailyCompletion.day, TaskDailyCompletion.count)
+        .where(TaskDailyCompletion.owner_id == owner_id, TaskDailyCompletion.day >= since)
+    ).all())
+
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_tag": [{"tag": tag, "count": count} for tag, count in by_tag],
+        "completions": [
+            {"day": day, "count": max(0, done_by_day.get(day, 0))}
+            for day in (since + dt.timedelta(days=i) for i in range(days))
+        ],
+    }
+
+
+def rebuild(db: Session, owner_id: Optional[int] = None) -> dict:
+    """Recompute the counters (for one user or everyone) from the task tables in one transaction."""
+    task = models.Task.__table__
+    archive = models.TaskArchive.__table__
+
+    def scoped(stmt, table):
+        return stmt.where(table.c.owner_id == owner_id) if owner_id is not None else stmt
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Writers wait until the rebuild commits, so no trigger delta is lost in between.
+        db.execute(text("LOCK TABLE tasks, tasks_archive IN SHARE MODE"))
+    for model in (TaskStatusCount, TaskTagCount, TaskDailyCompletion):
+        db.execute(scoped(delete(model), model.__table__))
+
+    status_rows = db.execute(insert(TaskStatusCount).from_select(
+        ["owner_id", "status", "count"],
+        scoped(select(task.c.owner_id, task.c.status, func.count()), task).group_by(task.c.owner_id, task.c.status),
+    )).rowcount
+
+    elements = json_elements(db, task.c.tags)
+    tag_rows = db.execute(insert(TaskTagCount).from_select(
+        ["owner_id", "tag", "count"],
+        scoped(select(task.c.owner_id, elements.c.value, func.count()).select_from(task).join(elements, true()), task)
+        .group_by(task.c.owner_id, elements.c.value),
+    )).rowcount
+
+    done = union_all(*[
+        scoped(
+            select(t.c.owner_id, _utc_day(db, func.coalesce(t.c.completed_at, t.c.updated_at)).label("day"))
+            .where(t.c.status.in_(models.DONE_STATUSES)),
+            t,
+        )
+        for t in (task, archive)
+    ]).subquery("done")
+    completion_rows = db.execute(insert(TaskDailyCompletion).from_select(
+        ["owner_id", "day", "count"],
+        select(done.c.owner_id, done.c.day, func.count()).group_by(done.c.owner_id, done.c.day),
+    )).rowcount
+
+    db.commit()
+    return {"status_rows": status_rows, "tag_rows": tag_rows, "completion_rows": completion_rows}
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Task statistics counters.")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the counters from the task tables")
+    parser.add_argument("--user", type=int, help="only this user id")
+    args = parser.parse_args(argv)
+    if not args.rebuild:
+        parser.error("nothing to do; pass --rebuild")
+
+    from .database import SessionLocal
+
+    with SessionLocal() as db:
+        result = rebuild(db, owner_id=args.user)
+    scope = f"user {args.user}" if args.user is not None else "all users"
+    print(f"rebuilt counters for {scope}: {result['status_rows']} status, "
+          f"{result['tag_rows']} tag and {result['completion_rows']} completion row(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,44 +1,93 @@
 """Utility functions for password hashing, JWT handling, and text tag extraction."""
 
 import re
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+from typing import Any, Dict, NamedTuple
 
 from jose import jwt
 from passlib.context import CryptContext
 
+from . import metrics
 from .settings import settings
 
 _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# Patterns for detecting tags, mentions, URLs, and emails
-TAG_PATTERNS = [
-    r"(?<!\w)(#[\w-]+)",
-    r"(?<!\w)(@[\w.-]+)",
-    r"(https?://[^\s]+)",
-    r"([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[A-Za-z]{2,})",
-]
+BCRYPT_DURATION = metrics.histogram(
+    "tasklist_bcrypt_duration_seconds",
+    "Time spent hashing or verifying passwords.",
+    ["op"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0),
+)
+
+# ---------- Tags and mentions ----------
+HASHTAG, MENTION, URL, EMAIL = "hashtag", "mention", "url", "email"
+# Stored tag order: all hashtags, then mentions, URLs and emails (each in text order).
+TAG_KINDS = (HASHTAG, MENTION, URL, EMAIL)
+
+
+class Token(NamedTuple):
+    """A tag-like token found in task text."""
+    kind: str
+    value: str
+    start: int
+
+
+# One alternation, scanned once. URLs and emails come first so that `#frag`
+# or `@user` inside them are not also reported as hashtags/mentions. The email
+# lookbehind only lets a match start at the beginning of a run of local-part
+# characters, which keeps long words from being rescanned at every offset.
+_TOKEN_RE = re.compile(
+    r"(?P<url>https?://[^\s]+)"
+    r"|(?P<email>(?<![a-zA-Z0-9._%+-])[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[A-Za-z]{2,})"
+    r"|(?P<hashtag>(?<!\w)#[\w-]+)"
+    r"|(?P<mention>(?<!\w)@[\w.-]+)"
+)
+
+
+def scan_tokens(text: str) -> list[Token]:
+    """Return the unique hashtags, mentions, URLs and emails in `text`, in text order."""
+    seen: dict[str, Token] = {}
+    for m in _TOKEN_RE.finditer(text or ""):
+        value = m.group()
+        if value not in seen:
+            seen[value] = Token(m.lastgroup, value, m.start())
+    return list(seen.values())
+
+
+def tags_from_tokens(tokens: list[Token]) -> list[str]:
+    """Return the stored tag list for scanned tokens (grouped by kind, see TAG_KINDS)."""
+    return [t.value for kind in TAG_KINDS for t in tokens if t.kind == kind]
+
+
+def mention_handles(tokens: list[Token]) -> list[str]:
+    """Return the lower-cased @handles mentioned, without trailing punctuation."""
+    handles = (t.value[1:].rstrip(".-").lower() for t in tokens if t.kind == MENTION)
+    return list(dict.fromkeys(h for h in handles if h))
 
 
 def extract_tags(text: str) -> list[str]:
     """Return a list of unique tags, mentions, URLs, and emails found in the text."""
-    tags: list[str] = []
-    for pat in TAG_PATTERNS:
-        for m in re.findall(pat, text or ""):
-            if m not in tags:
-                tags.append(m)
-    return tags
+    return tags_from_tokens(scan_tokens(text))
 
 
 # ---------- Password hashing ----------
 def hash_password(plain: str) -> str:
     """Hash a plaintext password using bcrypt."""
-    return _pwd_context.hash(plain)
+    start = time.perf_counter()
+    try:
+        return _pwd_context.hash(plain)
+    finally:
+        BCRYPT_DURATION.observe(time.perf_counter() - start, op="hash")
 
 
 def verify_password(plain: str, hashed: str) -> bool:
     """Verify a plaintext password against its bcrypt hash."""
-    return _pwd_context.verify(plain, hashed)
+    start = time.perf_counter()
+    try:
+        return _pwd_context.verify(plain, hashed)
+    finally:
+        BCRYPT_DURATION.observe(time.perf_counter() - start, op="verify")
 
 
 # ---------- JWT ----------
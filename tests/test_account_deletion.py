@@ -0,0 +1,43 @@
+# test_account_deletion.py
+import uuid
+
+from tasklist_app import crud, models
+
+
+def _user_with_tasks(db, n):
+    u = models.User(email=f"borrar_{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(u)
+    db.commit()
+    db.add_all([models.Task(text=f"t{i}", status="pending", tags=[], owner_id=u.id) for i in range(n)])
+    db.commit()
+    return u.id
+
+
+def test_delete_user_in_batches_reports_progress(db):
+    uid = _user_with_tasks(db, 7)
+    calls = []
+    summary = crud.delete_user(db, uid, batch_size=3, progress=lambda done, total: calls.append((done, total)))
+
+    assert summary == {"user_id": uid, "tasks_deleted": 7, "batches": 3}
+    assert calls == [(3, 7), (6, 7), (7, 7)]
+    assert db.get(models.User, uid) is None
+    assert db.query(models.Task).filter(models.Task.owner_id == uid).count() == 0
+
+
+def test_delete_user_unknown_returns_none(db):
+    assert crud.delete_user(db, 10_000_000) is None
+
+
+def test_delete_account_endpoint(client, db, test_user):
+    uid = test_user.id
+    client.post("/tasks", json={"text": "mía", "status": "pending"})
+    r = client.delete("/auth/me")
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["user_id"] == uid
+    assert body["tasks_deleted"] >= 1
+    assert db.query(models.User).filter(models.User.id == body["user_id"]).count() == 0
+
+
+def test_user_tasks_relationship_uses_passive_deletes():
+    assert models.User.tasks.property.passive_deletes is True
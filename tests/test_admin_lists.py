@@ -0,0 +1,84 @@
+# test_admin_lists.py
+import re
+import uuid
+
+from sqlalchemy import text
+
+from tasklist_app import admin_views, main
+from tasklist_app.database import is_statement_timeout, statement_timeout
+
+
+def _admin_login(client, monkeypatch):
+    email = f"admin_{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/auth/register", json={"email": email, "password": "12345678"})
+    monkeypatch.setattr(main.authentication_backend, "admin_emails", {email})
+    r = client.post("/admin/login", data={"username": email, "password": "12345678"}, follow_redirects=False)
+    assert r.status_code in (302, 303), r.text
+    return email
+
+
+def _ids(html):
+    return [int(i) for i in re.findall(r"/admin/task/details/(\d+)", html)]
+
+
+def _link(html, label):
+    m = re.search(r'<a class="page-link" href="([^"#]+)">\s*(?:<i[^>]*></i>\s*)?' + label, html)
+    return m and m.group(1).replace("&amp;", "&")
+
+
+def test_task_list_keyset_pages(client, api_create, monkeypatch):
+    tag = uuid.uuid4().hex[:8]
+    created = [api_create(f"admin {tag} {i}")["id"] for i in range(7)]
+    _admin_login(client, monkeypatch)
+
+    r = client.get("/admin/task/list", params={"search": tag, "pageSize": 10})
+    assert r.status_code == 200
+    assert sorted(set(_ids(r.text))) == sorted(created)
+
+    seen, url = [], f"/admin/task/list?search={tag}&sortBy=created_at&sort=desc&pageSize=3"
+    monkeypatch.setattr(main.TaskAdmin, "page_size_options", [3, 10, 25, 50, 100])
+    while url:
+        r = client.get(url)
+        assert r.status_code == 200, r.text
+        seen.extend(dict.fromkeys(_ids(r.text)))
+        url = _link(r.text, "next")
+        assert url is None or f"after={seen[-1]}" in url  # cursor, no número de página que saltar
+    assert seen == sorted(created, reverse=True)
+
+    back = _link(r.text, "prev")
+    r = client.get(back)
+    assert list(dict.fromkeys(_ids(r.text))) == seen[3:6]
+    assert "Showing 4 to 6 of 7" in r.text
+
+
+def test_task_search_syntax_and_user_prefix(client, api_create, test_user, monkeypatch):
+    t = api_create(f"sintaxis {uuid.uuid4().hex[:6]}", status="done")
+    _admin_login(client, monkeypatch)
+    assert t["id"] in _ids(client.get("/admin/task/list", params={"search": str(t["id"])}).text)
+    r = client.get("/admin/task/list", params={"search": f"owner:{test_user.email}", "pageSize": 100})
+    assert t["id"] in _ids(r.text)
+    r = client.get("/admin/task/list", params={"search": "status:pending", "pageSize": 100})
+    assert t["id"] not in _ids(r.text)
+
+    prefix = test_user.email[:10]
+    r = client.get("/admin/user/list", params={"search": prefix.upper()})
+    assert f"/admin/user/details/{test_user.id}" in r.text
+    assert client.get("/admin/user/list", params={"sortBy": "created_at"}).status_code == 400
+
+
+def test_statement_timeout_interrupts_and_maps_to_504(client, db, monkeypatch):
+    slow = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+    try:
+        with statement_timeout(db, 0.05):
+            db.execute(text(slow))
+        raise AssertionError("no timeout")
+    except Exception as e:  # noqa: BLE001
+        assert is_statement_timeout(e)
+    db.rollback()
+    assert db.execute(text("SELECT 1")).scalar() == 1  # la conexión sigue usable
+
+    _admin_login(client, monkeypatch)
+    monkeypatch.setattr(main.TaskAdmin, "search_query", lambda self, stmt, term: stmt.where(text(f"({slow}) > 0")))
+    monkeypatch.setattr(admin_views.settings, "ADMIN_STATEMENT_TIMEOUT_SECONDS", 0.05)
+    r = client.get("/admin/task/list", params={"search": "x"})
+    assert r.status_code == 504
@@ -0,0 +1,70 @@
+# test_admission.py
+import asyncio
+
+import pytest
+
+from tasklist_app import admission, main
+
+
+def _gates():
+    stack = main.app.middleware_stack
+    while not isinstance(stack, admission.AdmissionMiddleware):
+        stack = stack.app
+    return stack.gates
+
+
+def test_route_classes():
+    def cls(method, path):
+        return admission.route_class({"method": method, "path": path})
+
+    assert cls("GET", "/health") is None and cls("GET", "/tasks/stream") is None
+    assert cls("GET", "/static/app.css") is None and cls("GET", "/admin/statics/css/main.css") is None
+    assert cls("GET", "/tasks") == "read" and cls("GET", "/app/tasks") == "read"
+    assert cls("POST", "/tasks") == "write" and cls("DELETE", "/tasks/3") == "write"
+    assert cls("POST", "/auth/login") == "auth" and cls("POST", "/app/register") == "auth"
+    assert cls("GET", "/tasks-export.csv") == "export" and cls("POST", "/tasks-import") == "export"
+    assert cls("GET", "/admin/task/list") == "admin"
+
+
+def test_gate_queues_fifo_and_sheds():
+    async def scenario():
+        gate = admission.Gate("read", concurrency=1, queue=1)
+        assert await gate.acquire(1.0) == 0.0
+        waiting = asyncio.ensure_future(gate.acquire(1.0))
+        await asyncio.sleep(0)
+        assert gate.queued == 1
+        with pytest.raises(admission.Shed, match="queue_full"):
+            await gate.acquire(1.0)
+        gate.release()  # el hueco pasa al que espera, sin liberarse
+        assert await waiting >= 0 and gate.active == 1
+        with pytest.raises(admission.Shed, match="queue_timeout"):
+            await gate.acquire(0.01)
+        assert gate.queued == 0
+        gate.release()
+        assert gate.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_saturated_export_is_shed_while_reads_stay_up(client, monkeypatch):
+    export = _gates()["export"]
+    monkeypatch.setattr(export, "active", export.concurrency)
+    monkeypatch.setattr(export, "queue", 0)
+    before = admission.SHED.value(route_class="export", reason="queue_full")
+
+    r = client.get("/tasks-export.csv")
+    assert r.status_code == 503 and r.headers["retry-after"] == "10"
+    assert admission.SHED.value(route_class="export", reason="queue_full") == before + 1
+    assert client.get("/tasks").status_code == 200
+    assert client.get("/health").status_code == 200
+
+
+def test_low_priority_is_shed_while_reads_queue(client, monkeypatch):
+    read = _gates()["read"]
+    monkeypatch.setattr(read, "_waiters", admission.deque([object()]))  # una lectura esperando
+    before = admission.SHED.value(route_class="auth", reason="priority")
+
+    r = client.post("/auth/login", data={"username": "x@example.com", "password": "12345678"})
+    assert r.status_code == 503 and r.headers["retry-after"] == "2"
+    assert admission.SHED.value(route_class="auth", reason="priority") == before + 1
+    assert client.post("/tasks", json={"text": "escritura con lecturas en cola"}).status_code == 201
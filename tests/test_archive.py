@@ -0,0 +1,100 @@
+# test_archive.py
+import datetime as dt
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import update
+
+from tasklist_app import models
+from tasklist_app.archive import archive_done_tasks
+
+
+def _old_task(db, owner_id, text, status, days_ago):
+    ts = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=days_ago)
+    t = models.Task(text=text, status=status, tags=[], owner_id=owner_id, created_at=ts, updated_at=ts)
+    db.add(t)
+    db.commit()
+    return t.id
+
+
+def test_archive_moves_only_old_done_tasks_in_batches(db, test_user):
+    old_ids = [_old_task(db, test_user.id, f"viejo {i}", "done", 120) for i in range(5)]
+    recent_done = _old_task(db, test_user.id, "reciente", "done", 1)
+    old_pending = _old_task(db, test_user.id, "pendiente", "pending", 120)
+
+    moved = archive_done_tasks(db, older_than_days=90, batch_size=2)
+    assert moved >= 5
+
+    hot_ids = {t.id for t in db.query(models.Task).filter(models.Task.owner_id == test_user.id)}
+    cold_ids = {t.id for t in db.query(models.TaskArchive).filter(models.TaskArchive.owner_id == test_user.id)}
+    assert set(old_ids) <= cold_ids
+    assert not (set(old_ids) & hot_ids)
+    assert {recent_done, old_pending} <= hot_ids
+
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_archive_skips_tasks_changed_after_selection(db, test_user, monkeypatch, returning):
+    monkeypatch.setattr(db.get_bind().dialect, "delete_returning", returning)
+    kept = _old_task(db, test_user.id, "archivada", "done", 120)
+    reopened = _old_task(db, test_user.id, "reabierta", "done", 120)
+    edited = _old_task(db, test_user.id, "editada", "done", 120)
+    real_scalars = db.scalars
+    raced = []
+
+    def racing_scalars(*args, **kwargs):
+        ids = real_scalars(*args, **kwargs).all()
+        if not raced:
+            # otra escritura reabre una tarea y edita otra entre la selección de ids y el traslado
+            raced.append(True)
+            db.execute(update(models.Task).where(models.Task.id == reopened).values(status="pending"))
+            db.execute(update(models.Task).where(models.Task.id == edited).values(updated_at=dt.datetime.now(dt.timezone.utc)))
+        return SimpleNamespace(all=lambda: ids)
+
+    monkeypatch.setattr(db, "scalars", racing_scalars)
+    archive_done_tasks(db, older_than_days=90)
+
+    hot_ids = {t.id for t in db.query(models.Task).filter(models.Task.owner_id == test_user.id)}
+    cold_ids = {t.id for t in db.query(models.TaskArchive).filter(models.TaskArchive.owner_id == test_user.id)}
+    assert {reopened, edited} <= hot_ids and not ({reopened, edited} & cold_ids)
+    assert kept in cold_ids and kept not in hot_ids
+
+
+def test_dry_run_moves_nothing(db, test_user):
+    tid = _old_task(db, test_user.id, "viejo dry", "done", 200)
+    assert archive_done_tasks(db, older_than_days=90, dry_run=True) >= 1
+    assert db.get(models.Task, tid) is not None
+
+
+def test_include_archived_reads_through(client, db, test_user):
+    other = models.User(email=f"otro_{uuid.uuid4().hex[:8]}@example.com", password_hash="hash-no-usado")
+    db.add(other)
+    db.commit()
+    _old_task(db, test_user.id, "archivable zeta", "done", 365)
+    _old_task(db, test_user.id, "archivable omega", "done", 365)
+    _old_task(db, other.id, "archivable zeta ajena", "done", 365)
+    archive_done_tasks(db, older_than_days=90)
+
+    r = client.get("/tasks?q=archivable zeta")
+    assert r.status_code == 200
+    assert r.json()["meta"]["total"] == 0
+
+    r = client.get("/tasks?q=archivable zeta&include_archived=true")
+    assert r.status_code == 200
+    assert [it["text"] for it in r.json()["items"]] == ["archivable zeta"]
+
+    r = client.get("/tasks-export.csv?q=archivable zeta&include_archived=true")
+    assert r.status_code == 200
+    assert "archivable zeta" in r.text
+    # el filtro y el dueño se aplican: ni la tarea que no coincide ni la archivada de otro usuario
+    assert "archivable omega" not in r.text
+    assert "archivable zeta ajena" not in r.text
+
+    # el archivo solo añade filas: las vivas que coinciden son las mismas con y sin la opción
+    _old_task(db, test_user.id, "archivable zeta viva", "pending", 1)
+    live = client.get("/tasks-export.csv?q=archivable zeta").text
+    both = client.get("/tasks-export.csv?q=archivable zeta&include_archived=true").text
+    assert "archivable zeta viva" in live and "archivable zeta viva" in both
+    assert "archivable zeta ajena" not in live
+    assert len(both.splitlines()) == len(live.splitlines()) + 1
@@ -0,0 +1,66 @@
+# test_autocomplete.py
+import time
+import uuid
+
+from tasklist_app import autocomplete, crud
+from tasklist_app.autocomplete import PrefixIndex
+from tasklist_app.instrumentation import assert_max_queries
+
+
+def _suggest(client, prefix, **params):
+    r = client.get("/autocomplete", params={"prefix": prefix, **params})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _register(client, handle):
+    r = client.post("/auth/register", json={"email": f"{handle}@example.com", "password": "12345678"})
+    assert r.status_code in (200, 201), r.text
+    return r.json()
+
+
+def test_handles_and_own_tags(client, api_create):
+    p = "ac" + uuid.uuid4().hex[:6]
+    autocomplete.handles.clear()
+    _register(client, f"{p}.uno")
+    _register(client, f"{p}.dos")
+    api_create(f"algo #{p.upper()}x #{p}a")
+
+    assert _suggest(client, f"@{p}") == {"handles": [f"@{p}.dos", f"@{p}.uno"], "tags": []}
+    # tags sin distinguir mayúsculas, devueltos tal como se escribieron
+    assert _suggest(client, f"#{p}")["tags"] == [f"#{p}a", f"#{p.upper()}x"]
+    both = _suggest(client, p, limit=1)
+    assert both == {"handles": [f"@{p}.dos"], "tags": [f"#{p}a"]}
+    assert client.get("/autocomplete", params={"prefix": ""}).status_code == 422
+
+
+def test_indexes_follow_registration_and_writes(client, api_create, db):
+    p = "ad" + uuid.uuid4().hex[:6]
+    autocomplete.handles.clear()
+    _suggest(client, f"@{p}")  # carga perezosa del índice completo
+
+    user = _register(client, f"{p}.nuevo")
+    # solo se relee el usuario pendiente, por clave primaria
+    with assert_max_queries(3, "GET /autocomplete after registration"):
+        assert _suggest(client, f"@{p}")["handles"] == [f"@{p}.nuevo"]
+    crud.delete_user(db, user["id"])
+    assert _suggest(client, f"@{p}")["handles"] == []
+
+    t = api_create(f"tarea #{p}uno")
+    assert _suggest(client, f"#{p}")["tags"] == [f"#{p}uno"]
+    client.patch(f"/tasks/{t['id']}", json={"text": f"tarea #{p}dos"})
+    assert _suggest(client, f"#{p}")["tags"] == [f"#{p}dos"]
+
+
+def test_prefix_index_is_sub_millisecond_at_100k():
+    index = PrefixIndex(f"user{i:06d}" for i in range(100_000))
+    index.add("user000001")
+    index.discard("user000001")
+    assert index.complete("user00000", 3) == ["user000000", "user000001", "user000002"]
+    index.discard("user000001")
+    assert index.complete("user00000", 2) == ["user000000", "user000002"]
+
+    start = time.perf_counter()
+    for i in range(1000):
+        index.complete(f"user{i:03d}", 10)
+    assert (time.perf_counter() - start) / 1000 < 0.001
@@ -0,0 +1,39 @@
+# test_db_pool.py
+import pytest
+from sqlalchemy import exc
+
+from tasklist_app import database
+from tasklist_app.settings import settings
+
+
+def test_pool_settings_timeout_and_gauges(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 0.05)
+    eng = database._make_engine(f"sqlite:///{tmp_path / 'pool.db'}", label="pool_test")
+    try:
+        assert isinstance(eng.pool, database.InstrumentedQueuePool)
+        assert eng.pool.size() == 1
+
+        before = database.POOL_TIMEOUTS.value(pool="pool_test")
+        conn = eng.connect()
+        assert database.POOL_IN_USE.value(pool="pool_test") == 1
+        # Pool agotado: el segundo checkout debe expirar y contarse
+        with pytest.raises(exc.TimeoutError):
+            eng.connect()
+        conn.close()
+
+        assert database.POOL_TIMEOUTS.value(pool="pool_test") == before + 1
+        assert database.POOL_IN_USE.value(pool="pool_test") == 0
+        assert database.POOL_CHECKOUT_WAIT.count(pool="pool_test") >= 2
+    finally:
+        eng.dispose()
+
+
+def test_metrics_endpoint_exposes_pool(client):
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    body = r.text
+    assert "# TYPE tasklist_db_pool_checkout_wait_seconds histogram" in body
+    assert 'tasklist_db_pool_in_use{pool="primary"}' in body
+    assert "tasklist_db_pool_timeouts" in body
@@ -3,9 +3,9 @@ import csv
 import io
 
 def _seed(client):
-    client.post("/tasks", json={"text": "deploy backend", "status": "DONE"})
+    client.post("/tasks", json={"text": "deploy backend", "status": "done"})
     client.post("/tasks", json={"text": "revisar docs", "status": "pending"})
-    client.post("/tasks", json={"text": "deploy frontend", "status": "DONE"})
+    client.post("/tasks", json={"text": "deploy frontend", "status": "done"})
 
 def test_export_csv_basic(client):
     _seed(client)
@@ -0,0 +1,30 @@
+# test_http_benchmarks.py
+from benchmarks import http_suite
+
+
+def test_percentile_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert http_suite.percentile(values, 50) == 50.0
+    assert http_suite.percentile(values, 99) == 99.0
+    assert http_suite.percentile([], 95) == 0.0
+
+
+def test_compare_flags_regressions_only_past_threshold():
+    base = {"results": {"a": {"p95_ms": 10.0, "rps": 100.0, "errors": 0}}}
+    ok = {"results": {"a": {"p95_ms": 11.0, "rps": 95.0, "errors": 0}}}
+    bad = {"results": {"a": {"p95_ms": 15.0, "rps": 60.0, "errors": 1}, "nuevo": {"p95_ms": 1, "rps": 1, "errors": 0}}}
+    assert http_suite.compare(ok, base, 0.2) == []
+    problems = http_suite.compare(bad, base, 0.2)
+    assert len(problems) == 3 and all(p.startswith("a:") for p in problems)
+
+
+def test_suite_smoke(tmp_path):
+    # Sin overrides del fixture `client`: la suite usa tokens reales
+    results = http_suite.run_dataset(300, 3, requests=6, heavy_requests=1, concurrency=2, workdir=tmp_path)
+    assert set(results) == {
+        "tasks_deep_page", "tasks_search", "tasks_sort_done", "create_with_mentions",
+        "export_csv", "export_xlsx", "login",
+    }
+    for name, r in results.items():
+        assert r["errors"] == 0, name
+        assert r["p50_ms"] <= r["p95_ms"] <= r["p99_ms"]
@@ -0,0 +1,139 @@
+# test_import.py
+import io
+import json
+from unittest import mock
+
+import pytest
+from openpyxl import Workbook
+
+from tasklist_app import events, importer, invalidation, models
+
+
+def _tasks(db, user):
+    db.expire_all()
+    return db.query(models.Task).filter(models.Task.owner_id == user.id).order_by(models.Task.id).all()
+
+
+def test_import_csv_roundtrip_from_export(client, db, test_user, api_create):
+    api_create("exportada #uno @alguien")
+    api_create("otra exportada", status="done")
+    exported = client.get("/tasks-export.csv").content
+
+    r = client.post("/tasks-import", files={"file": ("tasks.csv", exported, "text/csv")})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["failed"] == 0 and body["imported"] >= 2
+
+    texts = [t.text for t in _tasks(db, test_user)]
+    assert texts.count("exportada #uno @alguien") == 2
+    imported = _tasks(db, test_user)[-body["imported"]:]
+    assert any(t.tags == ["#uno", "@alguien"] for t in imported)
+
+
+def test_import_ndjson_reports_row_errors(client, db, test_user):
+    lines = [
+        json.dumps({"text": "desde ndjson #ok", "status": "done", "created_at": "2023-01-02T03:04:05Z"}),
+        "",
+        "{no es json",
+        json.dumps({"text": "", "status": "pending"}),
+        json.dumps({"text": "estado raro", "status": "blocked"}),
+        json.dumps(["lista"]),
+        json.dumps({"Text": "cabecera estilo export", "Created At": "fecha"}),
+        json.dumps({"text": "sin estado"}),
+    ]
+    payload = "\n".join(lines).encode()
+    r = client.post("/tasks-import", files={"file": ("tasks.ndjson", payload, "application/x-ndjson")})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["imported"] == 2
+    assert [e["row"] for e in body["errors"]] == [3, 4, 5, 6, 7]
+    assert "created_at" in body["errors"][-1]["error"]
+
+    tasks = {t.text: t for t in _tasks(db, test_user)}
+    assert tasks["desde ndjson #ok"].status == "done"
+    assert tasks["desde ndjson #ok"].created_at.year == 2023
+    assert tasks["sin estado"].status == "pending"
+
+
+def test_import_xlsx(client, db, test_user):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["ID", "Text", "Status", "Tags", "Created At"])
+    ws.append([1, "desde excel #xl", "pending", "#viejo", "2024-05-06T07:08:09+00:00"])
+    ws.append([None, None, None, None, None])
+    ws.append([2, "excel hecha", "done", "", None])
+    buf = io.BytesIO()
+    wb.save(buf)
+
+    r = client.post("/tasks-import", files={"file": ("tasks.xlsx", buf.getvalue(), "application/octet-stream")})
+    assert r.status_code == 200, r.text
+    assert r.json() == {"imported": 2, "failed": 0, "errors": [], "errors_truncated": False}
+    tasks = {t.text: t for t in _tasks(db, test_user)}
+    assert tasks["desde excel #xl"].tags == ["#xl"]  # las etiquetas se recalculan
+    assert tasks["excel hecha"].status == "done"
+
+
+def test_import_rejects_unknown_format_and_bad_header(client):
+    r = client.post("/tasks-import", files={"file": ("tasks.bin", b"x", "application/octet-stream")})
+    assert r.status_code == 400
+    r = client.post("/tasks-import", files={"file": ("tasks.csv", b"foo,bar\n1,2\n", "text/csv")})
+    assert r.status_code == 400
+    assert "Text" in r.json()["detail"]
+
+
+def test_import_batches_and_caps_errors(db, test_user):
+    rows = ["Text,Status"] + [f"fila {i},{'pending' if i % 3 else 'mal'}" for i in range(1, 26)]
+    raw = io.BytesIO("\n".join(rows).encode())
+    result = importer.import_tasks(db, test_user.id, raw, "csv", batch_size=4, max_errors=3)
+    assert result.imported == 17 and result.failed == 8
+    assert len(result.errors) == 3 and result.errors_truncated
+
+
+def test_import_csv_rejects_only_the_row_with_bad_utf8(db, test_user):
+    rows = ["Text,Status"] + [f"fila {i},pending" for i in range(1, 4001)]
+    payload = "\n".join(rows).encode().replace(b"fila 1489,", b"fila 1489\xff,")
+    result = importer.import_tasks(db, test_user.id, io.BytesIO(payload), "csv", batch_size=500)
+    assert result.imported == 3999 and result.failed == 1
+    assert result.errors[0]["row"] == 1490 and "unreadable CSV row" in result.errors[0]["error"]
+    texts = {t.text for t in _tasks(db, test_user)}
+    assert {"fila 1488", "fila 1490", "fila 4000"} <= texts and "fila 1489" not in texts
+
+    small = importer.import_tasks(db, test_user.id, io.BytesIO(b"\xef\xbb\xbfText\nuna\n\xffmala\notra\n"), "csv")
+    assert small.imported == 2 and [e["row"] for e in small.errors] == [3]
+
+
+def test_import_ndjson_rejects_only_the_line_with_bad_utf8(db, test_user):
+    payload = b'{"text": "antes"}\n{"text": "mal\xff"}\n{"text": "despu\xc3\xa9s"}\n'
+    result = importer.import_tasks(db, test_user.id, io.BytesIO(payload), "ndjson")
+    assert result.imported == 2 and [e["row"] for e in result.errors] == [2]
+    assert {"antes", "después"} <= {t.text for t in _tasks(db, test_user)}
+
+
+def test_import_stopped_midway_keeps_rows_and_publishes(db, test_user, monkeypatch):
+    def corrupt(raw):
+        for i in range(2, 5):
+            yield i, {"text": f"antes del fallo {i}"}
+        raise importer.ImportFormatError("unreadable XLSX row")
+
+    monkeypatch.setitem(importer.PARSERS, "xlsx", corrupt)
+    with mock.patch.object(invalidation, "publish") as publish, mock.patch.object(events, "publish_resync") as resync:
+        result = importer.import_tasks(db, test_user.id, io.BytesIO(), "xlsx", batch_size=2)
+    assert result.imported == 3
+    assert result.errors == [{"row": 5, "error": "import stopped: unreadable XLSX row"}]
+    publish.assert_called_once_with(invalidation.tasks_key(test_user.id))
+    resync.assert_called_once_with(test_user.id)
+
+    # un fallo tras un lote ya confirmado también avisa antes de propagarse
+    real_flush = importer._flush
+    calls = []
+
+    def flaky(*args):
+        calls.append(1)
+        if len(calls) > 1:
+            raise RuntimeError("db caída")
+        real_flush(*args)
+
+    monkeypatch.setattr(importer, "_flush", flaky)
+    with mock.patch.object(events, "publish_resync") as resync, pytest.raises(RuntimeError):
+        importer.import_tasks(db, test_user.id, io.BytesIO(b"Text\nuno\ndos\ntres\n"), "csv", batch_size=2)
+    resync.assert_called_once_with(test_user.id)
@@ -0,0 +1,105 @@
+# test_invalidation.py
+import time
+
+import pytest
+
+from tasklist_app import invalidation
+from tasklist_app.cache import LocalCache
+from tasklist_app.invalidation import FileBackend, InvalidationBus
+
+
+def test_local_cache_tags_ttl_and_lru():
+    c = LocalCache("t", max_entries=2, ttl=60)
+    c.set("page:1", "a", tags=["tasks:1"])
+    c.set("page:2", "b", tags=["tasks:2"])
+    assert c.evict("tasks:1") == 1
+    assert c.get("page:1") is None and c.get("page:2") == "b"
+
+    c.set("x", 1)
+    c.set("y", 2)  # supera max_entries: sale la menos usada ("page:2")
+    assert c.get("page:2") is None and len(c) == 2
+
+    c.set("short", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert c.get("short", "miss") == "miss"
+
+    c.set("capped", 1, ttl=10_000)  # el TTL nunca supera el máximo de la caché
+    assert c._entries["capped"][0] <= time.monotonic() + 60
+
+    c.is_fresh = lambda: False
+    assert c.get("x") is None  # bus no fiable: no se sirve nada
+
+
+def _pair(tmp_path):
+    path = str(tmp_path / "inval.log")
+    a = InvalidationBus(FileBackend(path), max_staleness=5, poll_interval=0.01)
+    b = InvalidationBus(FileBackend(path), max_staleness=5, poll_interval=0.01)
+    ca, cb = a.register(LocalCache("a")), b.register(LocalCache("b"))
+    a.run_once()
+    b.run_once()  # abren el log desde el final
+    return a, b, ca, cb
+
+
+def test_file_backend_evicts_in_other_worker(tmp_path):
+    a, b, ca, cb = _pair(tmp_path)
+    for c in (ca, cb):
+        c.set("tasks:1:first", "old", tags=["tasks:1"])
+        c.set("user:2", "u")
+
+    a.publish("tasks:1", "tasks:1")
+    assert ca.get("tasks:1:first") is None  # local: inmediato
+    assert "tasks:1:first" in cb._entries  # el otro worker aún no ha leído el log
+
+    b.run_once()
+    assert cb._entries.keys() == {"user:2"}
+    a.run_once()  # su propio mensaje se ignora sin error
+
+    a.publish(invalidation.ALL)
+    b.run_once()
+    assert len(cb) == 0
+
+
+def test_file_backend_rotation_resets(tmp_path):
+    a, b, ca, cb = _pair(tmp_path)
+    a.backend.max_bytes = 1
+    cb.set("user:9", "u")
+    a.publish("tasks:7")  # supera max_bytes: el log rota
+    b.run_once()
+    assert len(cb) == 0  # posible pérdida de mensajes: se vacía todo
+
+
+def test_unstarted_remote_bus_is_not_trusted(tmp_path):
+    bus = InvalidationBus(FileBackend(str(tmp_path / "x.log")), max_staleness=5)
+    cache = bus.register(LocalCache("c", ttl=600))
+    assert cache.ttl == 5
+    cache.set("k", 1)
+    assert cache.get("k") is None
+    bus.start()
+    try:
+        assert cache.get("k") == 1
+    finally:
+        bus.stop()
+    assert not bus.healthy()
+
+
+@pytest.fixture()
+def registered_cache():
+    cache = invalidation.bus.register(LocalCache("test"))
+    yield cache
+    invalidation.bus.caches.remove(cache)
+
+
+def test_crud_writes_publish_owner_keys(client, api_create, test_user, registered_cache):
+    key = invalidation.tasks_key(test_user.id)
+    registered_cache.set("page", "cached", tags=[key])
+    t = api_create("invalida #cache")
+    assert registered_cache.get("page") is None
+
+    for call in (
+        lambda: client.patch(f"/tasks/{t['id']}", json={"status": "done"}),
+        lambda: client.put(f"/tasks/{t['id']}", json={"text": "otra", "status": "pending"}),
+        lambda: client.delete(f"/tasks/{t['id']}"),
+    ):
+        registered_cache.set("page", "cached", tags=[key])
+        assert call().status_code in (200, 204)
+        assert registered_cache.get("page") is None
@@ -0,0 +1,70 @@
+# test_memory_diagnostics.py
+import uuid
+
+from tasklist_app import diagnostics, main, models
+
+
+def _admin_login(client, monkeypatch):
+    email = f"admin_{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/auth/register", json={"email": email, "password": "12345678"})
+    monkeypatch.setattr(main.authentication_backend, "admin_emails", {email})
+    r = client.post("/admin/login", data={"username": email, "password": "12345678"}, follow_redirects=False)
+    assert r.status_code in (302, 303), r.text
+
+
+def test_tracemalloc_top_and_diff():
+    mem = diagnostics.MemoryDiagnostics()
+    mem.start(5)
+    try:
+        mem.take_baseline()
+        leak = [bytearray(4096) for _ in range(200)]  # ~800 KiB retenidos
+        diff = mem.diff(limit=10)
+        assert any("test_memory_diagnostics.py" in row["site"] and row["size_diff_bytes"] > 500_000 for row in diff)
+        assert mem.top(limit=50)
+        del leak
+    finally:
+        mem.stop()
+    assert not mem.tracing and not mem.has_baseline
+
+
+def test_report_counts_orm_objects_in_sessions(db, test_user):
+    db.add(models.Task(text="memoria", status="pending", tags=[], owner_id=test_user.id))
+    db.commit()
+    tasks = db.query(models.Task).all()  # el identity map es débil: mantener referencias
+    report = diagnostics.memory.report()
+    assert report["orm"]["sessions"] >= 1
+    assert report["orm"]["by_class"].get("Task", 0) >= 1
+    assert len(report["gc"]["counts"]) == 3
+    assert report["rss_bytes"] is None or report["rss_bytes"] > 0
+    assert report["tracemalloc"]["tracing"] is False
+    assert tasks
+
+
+def test_memory_admin_pages_require_admin(client, monkeypatch):
+    r = client.get("/admin/diagnostics/memory.json", follow_redirects=False)
+    assert r.status_code in (302, 303)  # sin sesión admin -> login
+
+    _admin_login(client, monkeypatch)
+    r = client.get("/admin/diagnostics/memory")
+    assert r.status_code == 200, r.text
+    assert "/admin/diagnostics/memory\"" in r.text  # entrada del menú
+    try:
+        r = client.post("/admin/diagnostics/memory/tracemalloc", data={"op": "start", "nframes": "5"})
+        assert r.status_code == 200
+        assert "Detener tracemalloc" in r.text
+        client.post("/admin/diagnostics/memory/tracemalloc", data={"op": "baseline"})
+        data = client.get("/admin/diagnostics/memory.json?limit=5").json()
+        assert data["tracemalloc"]["tracing"] and data["tracemalloc"]["has_baseline"]
+        assert len(data["top"]) <= 5
+    finally:
+        client.post("/admin/diagnostics/memory/tracemalloc", data={"op": "stop"})
+    assert diagnostics.memory.tracing is False
+
+
+def test_memory_admin_rejects_bad_numbers(client, monkeypatch):
+    _admin_login(client, monkeypatch)
+    for path in ("/admin/diagnostics/memory?limit=abc", "/admin/diagnostics/memory.json?limit=0"):
+        assert client.get(path).status_code == 400
+    r = client.post("/admin/diagnostics/memory/tracemalloc", data={"op": "start", "nframes": "x"})
+    assert r.status_code == 400
+    assert diagnostics.memory.tracing is False
@@ -0,0 +1,68 @@
+# test_metrics.py
+import json
+import os
+import time
+
+from tasklist_app import metrics
+
+
+def test_route_template_labels_and_counters(client, api_create):
+    t = api_create("métricas #m")
+    client.get(f"/tasks/{t['id']}")
+    client.get("/tasks/999999999")
+
+    body = client.get("/metrics").text
+    assert 'tasklist_http_requests_total{method="GET",route="/tasks/{task_id}",status="200"}' in body
+    assert 'tasklist_http_requests_total{method="GET",route="/tasks/{task_id}",status="404"}' in body
+    assert 'tasklist_http_request_duration_seconds_bucket{method="POST",route="/tasks",le="+Inf"}' in body
+    assert 'tasklist_http_response_size_bytes_count{route="/tasks/{task_id}"}' in body
+    assert "tasklist_http_requests_in_flight" in body
+    # Nunca se usa la ruta cruda como etiqueta
+    assert f'route="/tasks/{t["id"]}"' not in body
+
+
+def test_export_and_bcrypt_metrics(client):
+    client.get("/tasks-export.csv")
+    client.post("/auth/register", json={"email": f"m{time.time_ns()}@example.com", "password": "12345678"})
+    body = client.get("/metrics").text
+    assert 'tasklist_export_duration_seconds_count{format="csv"}' in body
+    assert 'tasklist_bcrypt_duration_seconds_count{op="hash"}' in body
+
+
+def test_recording_is_cheap():
+    scope = {"method": "GET", "route": None}
+    n = 5000
+    start = time.perf_counter()
+    for _ in range(n):
+        metrics.HTTP_IN_FLIGHT.inc()
+        metrics.HTTP_IN_FLIGHT.dec()
+        metrics.record_request(scope, 200, 512, 0.003)
+    per_request = (time.perf_counter() - start) / n
+    assert per_request < 50e-6, f"{per_request * 1e6:.1f}µs por request"
+
+
+def test_multiprocess_snapshots_are_merged(tmp_path):
+    reg = metrics.Registry()
+    c = reg.register(metrics.Counter("demo", "demo counter", ["k"]))
+    h = reg.register(metrics.Histogram("demo_seconds", "demo hist", buckets=(0.1, 1.0)))
+    g = reg.register(metrics.Gauge("demo_gauge", "demo gauge"))
+    reg.multiproc_dir = str(tmp_path)
+
+    # Otro worker (vivo) y un worker muerto dejaron sus snapshots
+    other = {
+        "pid": os.getppid(),
+        "metrics": {"demo": [[["a"], 2.0]], "demo_seconds": [[[], [1.0, 0.0, 0.0, 0.05]]], "demo_gauge": [[[], 3.0]]},
+    }
+    dead = {"pid": 2 ** 22 + 12345, "metrics": {"demo": [[["a"], 5.0]], "demo_gauge": [[[], 100.0]]}}
+    (tmp_path / "metrics-1.json").write_text(json.dumps(other))
+    (tmp_path / "metrics-2.json").write_text(json.dumps(dead))
+
+    c.inc(k="a")
+    h.observe(0.5)
+    g.set(1)
+    text = reg.render()
+    assert 'demo_total{k="a"} 8' in text
+    assert 'demo_seconds_bucket{le="0.1"} 1' in text
+    assert 'demo_seconds_count 2' in text
+    assert "demo_gauge 4" in text
+    assert (tmp_path / f"metrics-{os.getpid()}.json").exists()
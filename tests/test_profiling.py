@@ -0,0 +1,111 @@
+# test_profiling.py
+import threading
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+from tasklist_app import main, profiling, utils
+
+
+def _admin_token():
+    email = f"admin_{uuid.uuid4().hex[:8]}@example.com"
+    return email, utils.create_access_token({"sub": email})
+
+
+def test_sampler_produces_folded_stacks():
+    sampler = profiling.StackSampler(interval=0.001)
+    sampler.start()
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(i * i for i in range(1000))
+    sampler.stop()
+    folded = sampler.folded()
+    assert sampler.samples > 0
+    assert "test_profiling.py:test_sampler_produces_folded_stacks" in folded
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded.splitlines())
+
+
+def test_only_whitelisted_admins_are_profiled(client):
+    email, token = _admin_token()
+    store = profiling.ProfileStore(maxlen=2)
+    wrapped = profiling.ProfilingMiddleware(main.app, admin_emails={email}, profile_store=store)
+    with TestClient(wrapped) as c:
+        r = c.get("/tasks?limit=5&__profile=1", headers={"Authorization": f"Bearer {token}"})
+        assert r.status_code == 200
+        profile_id = int(r.headers["x-profile-id"])
+
+        # Sin bandera, o sin ser admin: no se perfila
+        assert "x-profile-id" not in c.get("/tasks", headers={"Authorization": f"Bearer {token}"}).headers
+        _, other = _admin_token()
+        assert "x-profile-id" not in c.get("/tasks", headers={"X-Profile": "1", "Authorization": f"Bearer {other}"}).headers
+
+        for _ in range(3):
+            c.get("/health", headers={"X-Profile": "1", "Authorization": f"Bearer {token}"})
+
+    record = store.get(profile_id)
+    assert record is None  # el store está acotado a 2 perfiles
+    assert len(store.all()) == 2
+    assert all(p.path == "/health" and p.admin_email == email for p in store.all())
+
+
+def test_profiles_admin_pages(client, monkeypatch):
+    email = f"admin_{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/auth/register", json={"email": email, "password": "12345678"})
+    monkeypatch.setattr(main.authentication_backend, "admin_emails", {email})
+    profiling.store.add(profiling.ProfileRecord(
+        id=profiling.store.next_id(), method="GET", path="/tasks", admin_email=email,
+        status=200, duration_ms=12.5, samples=3, folded="MainThread;main.py:list_tasks 3\n",
+    ))
+    record = profiling.store.all()[0]
+
+    r = client.post("/admin/login", data={"username": email, "password": "12345678"}, follow_redirects=False)
+    assert r.status_code in (302, 303), r.text
+    r = client.get("/admin/profiles")
+    assert r.status_code == 200, r.text
+    assert "/admin/profiles\"" in r.text  # entrada del menú
+    assert f"#{record.id}" in r.text
+    r = client.get(f"/admin/profiles/{record.id}")
+    assert r.status_code == 200
+    assert "main.py:list_tasks" in r.text
+    r = client.get(f"/admin/profiles/{record.id}/folded")
+    assert r.text == record.folded
+    for path in ("/admin/profiles/abc", "/admin/profiles/-1/folded", "/admin/profiles/0"):
+        assert client.get(path).status_code == 400
+    assert client.get("/admin/profiles/999999/folded").status_code == 404
+
+
+def test_profile_samples_only_the_requests_threads():
+    from fastapi import FastAPI
+
+    email, token = _admin_token()
+    store = profiling.ProfileStore(maxlen=2)
+    app = FastAPI()
+    app.router.route_class = profiling.ProfiledRoute
+
+    @app.get("/busy")
+    def busy_endpoint():
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            sum(i * i for i in range(1000))
+        return {"ok": True}
+
+    # Otro hilo trabajando a la vez: no debe aparecer en el perfil
+    stop = threading.Event()
+
+    def unrelated_noise():
+        while not stop.is_set():
+            sum(i * i for i in range(1000))
+
+    noise = threading.Thread(target=unrelated_noise, daemon=True)
+    noise.start()
+    try:
+        wrapped = profiling.ProfilingMiddleware(app, admin_emails={email}, profile_store=store)
+        with TestClient(wrapped) as c:
+            r = c.get("/busy", headers={"X-Profile": "1", "Authorization": f"Bearer {token}"})
+    finally:
+        stop.set()
+        noise.join()
+    folded = store.get(int(r.headers["x-profile-id"])).folded
+    assert "busy_endpoint" in folded
+    assert "unrelated_noise" not in folded
@@ -0,0 +1,87 @@
+# test_read_replicas.py
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from tasklist_app import database, models
+from tasklist_app.database import Base, ReplicaSet, RoutingSession, WriteTracker, _make_engine
+
+
+def _two_sqlite_files(tmp_path):
+    primary = _make_engine(f"sqlite:///{tmp_path / 'primary.db'}", label="rr_primary")
+    replica = _make_engine(f"sqlite:///{tmp_path / 'replica.db'}", label="rr_replica")
+    for eng in (primary, replica):
+        Base.metadata.create_all(bind=eng)
+    # Marcamos cada base con un usuario distinto para saber de dónde se lee
+    with sessionmaker(bind=primary)() as s:
+        s.add(models.User(email="primary@example.com", password_hash="x"))
+        s.commit()
+    with sessionmaker(bind=replica)() as s:
+        s.add(models.User(email="replica@example.com", password_hash="x"))
+        s.commit()
+    return primary, replica
+
+
+def _emails(db):
+    return {u.email for u in db.query(models.User).all()}
+
+
+def test_read_only_sessions_use_replica_and_writes_stay_on_primary(tmp_path):
+    primary, replica = _two_sqlite_files(tmp_path)
+    Session = sessionmaker(bind=primary, class_=RoutingSession, replicas=ReplicaSet([replica]))
+    try:
+        with Session() as db:
+            assert _emails(db) == {"primary@example.com"}
+
+        with Session() as db:
+            db.info["read_only"] = True
+            assert _emails(db) == {"replica@example.com"}
+            # Una escritura siempre va al primario, y la sesión deja de leer de la réplica
+            db.add(models.User(email="new@example.com", password_hash="x"))
+            db.commit()
+            assert _emails(db) == {"primary@example.com", "new@example.com"}
+    finally:
+        primary.dispose()
+        replica.dispose()
+
+
+def test_replica_selection_strategies(tmp_path):
+    a = _make_engine(f"sqlite:///{tmp_path / 'a.db'}", label="rr_a")
+    b = _make_engine(f"sqlite:///{tmp_path / 'b.db'}", label="rr_b")
+    try:
+        rr = ReplicaSet([a, b])
+        assert [rr.choose() for _ in range(4)] == [a, b, a, b]
+
+        ll = ReplicaSet([a, b], strategy="least_loaded")
+        conn = a.connect()
+        assert ll.choose() is b
+        conn.close()
+    finally:
+        a.dispose()
+        b.dispose()
+
+
+def test_write_tracker_read_your_writes_window(monkeypatch):
+    tracker = WriteTracker(window_seconds=0.05)
+    assert not tracker.recently_wrote("a@example.com")
+    tracker.mark("a@example.com")
+    assert tracker.recently_wrote("a@example.com")
+    assert not tracker.recently_wrote(None)
+    time.sleep(0.06)
+    assert not tracker.recently_wrote("a@example.com")
+
+
+def test_commit_opens_read_your_writes_window(tmp_path, monkeypatch):
+    primary, replica = _two_sqlite_files(tmp_path)
+    tracker = WriteTracker(window_seconds=60)
+    monkeypatch.setattr(database, "write_tracker", tracker)
+    Session = sessionmaker(bind=primary, class_=RoutingSession, replicas=ReplicaSet([replica]))
+    try:
+        with Session() as db:
+            db.info["rw_key"] = "writer@example.com"
+            db.add(models.User(email="writer@example.com", password_hash="x"))
+            db.commit()
+        assert tracker.recently_wrote("writer@example.com")
+    finally:
+        primary.dispose()
+        replica.dispose()
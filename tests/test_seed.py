@@ -0,0 +1,59 @@
+# test_seed.py
+import datetime as dt
+import random
+
+from sqlalchemy import select
+
+from tasklist_app import database, models, seed, utils
+
+
+def _seeded_engine(path, seed_value, now):
+    eng = database._make_engine(f"sqlite:///{path}", label=f"seed_{path.stem}")
+    database.Base.metadata.create_all(bind=eng)
+    seed.seed_database(eng, users=5, tasks=300, seed=seed_value, password="pw-seed", batch_size=64, now=now)
+    return eng
+
+
+def _rows(eng):
+    with eng.connect() as conn:
+        return conn.execute(
+            select(models.Task.text, models.Task.status, models.Task.tags, models.Task.owner_id, models.Task.created_at)
+            .order_by(models.Task.id)
+        ).all()
+
+
+def test_seed_is_deterministic_and_realistic(tmp_path):
+    now = dt.datetime(2024, 6, 1, tzinfo=dt.timezone.utc)
+    a = _seeded_engine(tmp_path / "a.db", 7, now)
+    b = _seeded_engine(tmp_path / "b.db", 7, now)
+    c = _seeded_engine(tmp_path / "c.db", 8, now)
+    try:
+        rows = _rows(a)
+        assert len(rows) == 300
+        assert rows == _rows(b)
+        assert rows != _rows(c)
+
+        # Las etiquetas coinciden con lo que extraería la app, y hay mezcla de estados
+        assert all(r.tags == utils.extract_tags(r.text) for r in rows)
+        assert {"pending", "done"} <= {r.status for r in rows}
+        assert any("@user" in r.text for r in rows)
+
+        with a.connect() as conn:
+            users = conn.execute(select(models.User.email, models.User.password_hash)).all()
+        assert [u.email for u in users] == [seed.user_email(i) for i in range(5)]
+        assert len({u.password_hash for u in users}) == 1  # un solo hash bcrypt compartido
+        assert utils.verify_password("pw-seed", users[0].password_hash)
+    finally:
+        for eng in (a, b, c):
+            eng.dispose()
+
+
+def test_mentions_are_fanned_out_to_mentioned_users():
+    rows = list(seed.generate_tasks(random.Random(3), [10, 20, 30], 500))
+    assert len(rows) == 500
+    by_text = {}
+    for text, _, _, owner_id, created, _ in rows:
+        by_text.setdefault((text, created), []).append(owner_id)
+    for (text, _), owners in by_text.items():
+        mentioned = {10 + 10 * int(w[5:]) for w in text.split() if w.startswith("@user")}
+        assert mentioned <= set(owners)
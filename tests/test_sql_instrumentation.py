@@ -0,0 +1,55 @@
+# test_sql_instrumentation.py
+import logging
+
+import pytest
+
+from tasklist_app import models
+from tasklist_app.instrumentation import assert_max_queries, capture_queries
+
+
+def test_post_tasks_query_budget(client):
+    with assert_max_queries(4, "POST /tasks"):
+        r = client.post("/tasks", json={"text": "presupuesto #q", "status": "pending"})
+    assert r.status_code == 201, r.text
+
+
+def test_server_timing_header(client):
+    r = client.get("/tasks?limit=5")
+    assert r.status_code == 200
+    header = r.headers.get("server-timing", "")
+    assert header.startswith("db;dur=")
+    assert "queries" in header
+
+
+def test_assert_max_queries_reports_statements(db):
+    with pytest.raises(AssertionError) as exc:
+        with assert_max_queries(1, "lecturas"):
+            db.query(models.User).count()
+            db.query(models.Task).count()
+    assert "lecturas ran 2 queries (max 1)" in str(exc.value)
+
+
+def test_n_plus_one_is_logged(client, db, test_user, caplog, monkeypatch):
+    from tasklist_app import instrumentation, main
+
+    monkeypatch.setattr(instrumentation.settings, "N_PLUS_ONE_THRESHOLD", 3)
+
+    @main.app.get("/_test/n-plus-one")
+    def _n_plus_one():
+        for _ in range(3):
+            db.query(models.User).filter(models.User.id == test_user.id).first()
+        return {"ok": True}
+
+    try:
+        with caplog.at_level(logging.WARNING, logger="tasklist.sql"):
+            assert client.get("/_test/n-plus-one").status_code == 200
+        assert any("n_plus_one" in rec.getMessage() for rec in caplog.records)
+    finally:
+        main.app.router.routes = [r for r in main.app.router.routes if getattr(r, "path", "") != "/_test/n-plus-one"]
+
+
+def test_capture_queries_counts(db):
+    with capture_queries() as stats:
+        db.query(models.User).count()
+    assert stats.count == 1
+    assert stats.total_ms >= 0
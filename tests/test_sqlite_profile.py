@@ -0,0 +1,41 @@
+# test_sqlite_profile.py
+import tempfile
+
+from sqlalchemy import text
+
+from tasklist_app import database
+
+
+def _pragma(conn, name):
+    return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_sqlite_profile_applies_pragmas(tmp_path):
+    eng = database._make_engine(f"sqlite:///{tmp_path / 'prof.db'}", label="profile_test", sqlite_profile=True)
+    try:
+        with eng.connect() as conn:
+            assert _pragma(conn, "journal_mode").lower() == "wal"
+            assert _pragma(conn, "synchronous") == 1  # NORMAL
+            assert _pragma(conn, "busy_timeout") == 5000
+            assert _pragma(conn, "temp_store") == 2  # MEMORY
+            assert _pragma(conn, "cache_size") == -65536
+    finally:
+        eng.dispose()
+
+
+def test_sqlite_profile_is_opt_in(tmp_path):
+    eng = database._make_engine(f"sqlite:///{tmp_path / 'plain.db'}", label="plain_test", sqlite_profile=False)
+    try:
+        with eng.connect() as conn:
+            assert _pragma(conn, "journal_mode").lower() == "delete"
+    finally:
+        eng.dispose()
+
+
+def test_benchmark_smoke(tmp_path, monkeypatch):
+    from benchmarks import sqlite_profile
+
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    r = sqlite_profile.run_workload(True, writers=1, readers=1, duration=0.2, seed_tasks=50)
+    assert r["writes"] > 0 and r["reads"] > 0
+    assert list(tmp_path.iterdir()) == []  # la base temporal del benchmark se borra
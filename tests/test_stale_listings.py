@@ -0,0 +1,123 @@
+# test_stale_listings.py
+import time
+import uuid
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from tasklist_app import crud, degraded, invalidation, main, utils
+
+# Token válido cualquiera: los overrides del cliente ignoran el token, pero la caché se indexa por él
+AUTH = {"Authorization": "Bearer " + utils.create_access_token({"sub": "degradado@example.com"})}
+
+
+def _middleware():
+    stack = main.app.middleware_stack
+    while not isinstance(stack, degraded.StaleListingMiddleware):
+        stack = stack.app
+    return stack
+
+
+def _wait_refresh(timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while _middleware()._inflight and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def _texts(r):
+    return [t["text"] for t in r.json()["items"]]
+
+
+def _page(path, query, headers=AUTH):
+    key, _ = degraded.listing_key({
+        "type": "http", "path": path, "query_string": query.encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    })
+    return _middleware().pages.get(key)
+
+
+def _make_slow(monkeypatch):
+    real = crud.list_tasks_page
+
+    def slow(*args, **kwargs):
+        time.sleep(0.3)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(main.settings, "LISTING_LATENCY_BUDGET_SECONDS", 0.05)
+    monkeypatch.setattr(crud, "list_tasks_page", slow)
+
+
+def test_slow_listing_serves_last_good_page_and_refreshes(client, api_create, monkeypatch):
+    tag = uuid.uuid4().hex[:8]
+    api_create(f"primera {tag}")
+    r = client.get("/tasks-ui", params={"q": tag}, headers=AUTH)
+    assert r.status_code == 200 and "warning" not in r.headers
+    stored_at = _page("/tasks-ui", f"q={tag}").stored_at
+
+    _make_slow(monkeypatch)
+    before = degraded.STALE_RESPONSES.value(route="/tasks-ui", reason="slow")
+    r = client.get("/tasks-ui", params={"q": tag}, headers=AUTH)
+    assert r.status_code == 200
+    assert r.headers["warning"].startswith("110")
+    assert int(r.headers["age"]) >= 0
+    assert _texts(r) == [f"primera {tag}"]
+    assert degraded.STALE_RESPONSES.value(route="/tasks-ui", reason="slow") == before + 1
+
+    # la consulta siguió en segundo plano y dejó la página nueva en caché
+    _wait_refresh()
+    assert _page("/tasks-ui", f"q={tag}").stored_at > stored_at
+
+
+def test_stale_pages_are_dropped_on_write_deletion_and_expiry(client, api_create, test_user, monkeypatch):
+    tag = uuid.uuid4().hex[:8]
+    query = f"q={tag}"
+    api_create(f"propia {tag}")
+
+    # una escritura del dueño descarta su página: nunca se sirve una lista sin su propio cambio
+    client.get("/tasks-ui", params={"q": tag}, headers=AUTH)
+    api_create(f"otra {tag}")
+    assert _page("/tasks-ui", query) is None
+
+    # la baja de la cuenta publica user:<id>
+    client.get("/tasks-ui", params={"q": tag}, headers=AUTH)
+    invalidation.publish(invalidation.user_key(test_user.id))
+    assert _page("/tasks-ui", query) is None
+
+    # un token caducado no recibe la página que guardó
+    client.get("/tasks-ui", params={"q": tag}, headers=AUTH)
+    monkeypatch.setattr(_page("/tasks-ui", query), "expires_at", time.time() - 1)
+    _make_slow(monkeypatch)
+    r = client.get("/tasks-ui", params={"q": tag}, headers=AUTH)
+    assert r.status_code == 200 and "warning" not in r.headers
+    assert sorted(_texts(r)) == sorted([f"propia {tag}", f"otra {tag}"])
+    _wait_refresh()
+
+
+def test_pool_exhaustion_serves_stale_only_with_a_remembered_page(client, monkeypatch):
+    params = {"status": f"s-{uuid.uuid4().hex[:6]}"}
+    assert client.get("/tasks", params=params, headers=AUTH).status_code == 200
+
+    def exhausted(*args, **kwargs):
+        raise PoolTimeoutError("QueuePool limit reached, connection timed out")
+
+    monkeypatch.setattr(crud, "list_tasks_page", exhausted)
+    r = client.get("/tasks", params=params, headers=AUTH)
+    assert r.status_code == 200 and "warning" in r.headers
+    assert r.json()["items"] == []
+
+    # otra consulta, otra credencial o sin credencial: no hay página que servir
+    assert client.get("/tasks", params={"status": "otro"}, headers=AUTH).status_code == 503
+    other = "Bearer " + utils.create_access_token({"sub": "otro@example.com"})
+    assert client.get("/tasks", params=params, headers={"Authorization": other}).status_code == 503
+    assert client.get("/tasks", params=params).status_code == 503
+
+
+def test_listing_key_needs_a_valid_token_and_ignores_query_order():
+    token = AUTH["Authorization"].encode()
+    scope = {"type": "http", "path": "/tasks", "headers": [(b"authorization", token)]}
+    a = degraded.listing_key({**scope, "query_string": b"limit=5&status=done"})
+    b = degraded.listing_key({**scope, "query_string": b"status=done&limit=5"})
+    assert a == b != degraded.listing_key({**scope, "query_string": b"status=done"})
+    assert a[1] > time.time()
+    expired = utils.create_access_token({"sub": "x@example.com"}, expires_minutes=-1).encode()
+    for headers in ([], [(b"authorization", b"Bearer no-es-un-jwt")], [(b"authorization", b"Bearer " + expired)]):
+        assert degraded.listing_key({**scope, "headers": headers, "query_string": b""}) is None
@@ -0,0 +1,54 @@
+# test_statement_timeouts.py
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from tasklist_app import crud, database, deps
+
+# Consulta que no termina nunca por sí sola
+ENDLESS = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+
+
+def _slow(*args, db=None, **kwargs):
+    db = db if db is not None else args[0]
+    db.execute(text(ENDLESS))
+
+
+def test_route_classes_get_their_own_timeout(client, monkeypatch):
+    monkeypatch.setattr(deps.settings, "STATEMENT_TIMEOUT_LISTING_SECONDS", 0.05)
+    monkeypatch.setattr(deps.settings, "STATEMENT_TIMEOUT_SEARCH_SECONDS", 0.1)
+    monkeypatch.setattr(deps.settings, "STATEMENT_TIMEOUT_EXPORT_SECONDS", 0.1)
+    monkeypatch.setattr(crud, "list_tasks_page", _slow)
+    monkeypatch.setattr(crud, "list_tasks_for_export", _slow)
+
+    for path, params, route_class in (
+        ("/tasks", {}, "listing"),
+        ("/tasks-ui", {"q": "algo"}, "search"),
+        ("/tasks-export.csv", {}, "export"),
+    ):
+        before = database.STATEMENT_TIMEOUTS.value(route_class=route_class)
+        r = client.get(path, params=params)
+        assert r.status_code == 504, (path, r.text)
+        assert route_class in r.json()["detail"]
+        assert database.STATEMENT_TIMEOUTS.value(route_class=route_class) == before + 1
+
+
+def test_connection_is_clean_after_a_timeout(client, db, api_create, monkeypatch):
+    monkeypatch.setattr(deps.settings, "STATEMENT_TIMEOUT_LISTING_SECONDS", 0.05)
+    real = crud.list_tasks_page
+    monkeypatch.setattr(crud, "list_tasks_page", _slow)
+    assert client.get("/tasks").status_code == 504
+
+    monkeypatch.setattr(crud, "list_tasks_page", real)
+    api_create("después del timeout")  # escritura sin límite en la misma conexión
+    assert client.get("/tasks").status_code == 200
+    # fuera de una ruta acotada no hay plazo armado
+    assert db.execute(text("SELECT count(*) FROM tasks")).scalar() >= 1
+
+
+def test_pool_exhaustion_is_503(client, monkeypatch):
+    def exhausted(*args, **kwargs):
+        raise PoolTimeoutError("QueuePool limit reached, connection timed out")
+
+    monkeypatch.setattr(crud, "list_tasks_page", exhausted)
+    r = client.get("/tasks")
+    assert r.status_code == 503 and r.headers["retry-after"] == "1"
@@ -0,0 +1,42 @@
+# test_tag_facets.py
+from tasklist_app import crud
+from tasklist_app.instrumentation import assert_max_queries
+
+
+def _facets(client, **params):
+    r = client.get("/tasks", params={"facets": "tags", **params})
+    assert r.status_code == 200, r.text
+    return r.json()["facets"]["tags"]
+
+
+def test_facets_are_opt_in(client, api_create):
+    api_create("sin facetas #a")
+    assert "facets" not in client.get("/tasks").json()
+    assert client.get("/tasks", params={"facets": "status"}).status_code == 422
+
+
+def test_facets_follow_the_filter(client, api_create):
+    api_create("comprar pan #casa @ana")
+    api_create("comprar leche #casa")
+    api_create("informe #trabajo https://example.com", status="done")
+
+    assert _facets(client) == [
+        {"tag": "#casa", "count": 2},
+        {"tag": "#trabajo", "count": 1},
+        {"tag": "@ana", "count": 1},
+    ]  # las URLs no son facetas
+    assert _facets(client, status="done") == [{"tag": "#trabajo", "count": 1}]
+    assert _facets(client, q="leche") == [{"tag": "#casa", "count": 1}]
+    assert _facets(client, facet_limit=1) == [{"tag": "#casa", "count": 2}]
+
+
+def test_facets_cached_until_owner_writes(client, api_create, test_user):
+    t = api_create("cache #uno")
+    crud._facet_cache.clear()
+    assert _facets(client, q="cache") == [{"tag": "#uno", "count": 1}]
+    # segunda lectura: listado (count + página) y usuario, pero ningún agregado
+    with assert_max_queries(3, "GET /tasks?facets=tags (cached)"):
+        assert _facets(client, q="cache") == [{"tag": "#uno", "count": 1}]
+
+    client.patch(f"/tasks/{t['id']}", json={"text": "cache #dos"})
+    assert _facets(client, q="cache") == [{"tag": "#dos", "count": 1}]
@@ -0,0 +1,48 @@
+# test_task_patch.py
+from unittest import mock
+
+from tasklist_app import crud, utils
+from tasklist_app.instrumentation import capture_queries
+
+
+def test_patch_status_only_keeps_text_and_tags(client, api_create):
+    t = api_create("texto largo #keep @nadie")
+    with mock.patch.object(crud.utils, "extract_tags", wraps=utils.extract_tags) as spy:
+        r = client.patch(f"/tasks/{t['id']}", json={"status": "done"})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["status"] == "done"
+    assert body["text"] == "texto largo #keep @nadie"
+    assert body["tags"] == ["#keep", "@nadie"]
+    spy.assert_not_called()
+
+
+def test_patch_text_reextracts_tags_and_writes_only_changed_columns(client, api_create):
+    t = api_create("original #a")
+    with capture_queries() as stats:
+        r = client.patch(f"/tasks/{t['id']}", json={"text": "nueva #b", "status": "pending"})
+    assert r.status_code == 200, r.text
+    assert r.json()["tags"] == ["#b"]
+    updates = [s for s in stats.statements if s.lstrip().upper().startswith("UPDATE")]
+    assert len(updates) == 1
+    set_clause = updates[0].split("SET", 1)[1].split("WHERE", 1)[0]
+    assert "text" in set_clause and "tags" in set_clause
+    assert "status" not in set_clause  # no cambió: no se escribe
+
+
+def test_patch_noop_skips_the_write(client, api_create):
+    t = api_create("igual", status="done")
+    with capture_queries() as stats:
+        r = client.patch(f"/tasks/{t['id']}", json={"text": "igual", "status": "done"})
+    assert r.status_code == 200
+    assert r.json()["updated_at"] == t["updated_at"]
+    assert not any(s.lstrip().upper().startswith("UPDATE") for s in stats.statements)
+
+    assert client.patch(f"/tasks/{t['id']}", json={}).status_code == 200
+
+
+def test_patch_validation_and_missing(client, api_create):
+    t = api_create("validar")
+    assert client.patch(f"/tasks/{t['id']}", json={"status": "DONE"}).status_code == 422
+    assert client.patch(f"/tasks/{t['id']}", json={"text": ""}).status_code == 422
+    assert client.patch("/tasks/999999", json={"status": "done"}).status_code == 404
@@ -0,0 +1,117 @@
+# test_task_stream.py
+import asyncio
+import io
+import json
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+from tasklist_app import crud, events, importer, main, models, schemas
+
+
+def _drain(sub):
+    out = []
+    while not sub.queue.empty():
+        out.append(sub.queue.get_nowait())
+    return out
+
+
+def _user(db, handle):
+    u = models.User(email=f"{handle}@example.com", password_hash="x")
+    db.add(u)
+    db.commit()
+    db.refresh(u)
+    return u
+
+
+def test_broker_delivers_only_to_owner_and_collapses_overflow():
+    async def run():
+        broker = events.TaskEventBroker(queue_size=3)
+        mine, other = broker.subscribe(1), broker.subscribe(2)
+        broker.publish(1, {"type": events.CREATED, "task": {"id": 7}})
+        await asyncio.sleep(0)
+        got = _drain(mine)
+        assert [e["task"]["id"] for e in got] == [7]
+        assert got[0]["id"] == 1
+        assert _drain(other) == []
+
+        # Cliente lento: la cola se llena y se sustituye por un único resync
+        for i in range(5):
+            broker.publish(1, {"type": events.UPDATED, "task": {"id": i}})
+        await asyncio.sleep(0)
+        assert [e["type"] for e in _drain(mine)] == [events.RESYNC, events.UPDATED]
+
+        broker.unsubscribe(mine)
+        broker.unsubscribe(mine)  # idempotente
+        assert not broker.has_subscribers(1)
+        broker.publish(1, {"type": events.RESYNC})  # sin suscriptores: no-op
+
+    asyncio.run(run())
+
+
+def test_crud_publishes_create_fanout_update_delete(db, test_user):
+    handle = f"peer{uuid.uuid4().hex[:6]}"
+    peer = _user(db, handle)
+    broker = events.TaskEventBroker()
+
+    async def run():
+        mine, theirs = broker.subscribe(test_user.id), broker.subscribe(peer.id)
+        t = crud.create_task(db, schemas.TaskCreate(text=f"hola @{handle}", status="pending"), test_user.id)
+        crud.patch_task(db, t.id, {"status": "done"})
+        crud.delete_task(db, t.id)
+        await asyncio.sleep(0)
+        assert [(e["type"], e.get("task", {}).get("id", e.get("task_id"))) for e in _drain(mine)] == [
+            ("created", t.id), ("updated", t.id), ("deleted", t.id),
+        ]
+        fanned = _drain(theirs)
+        assert [e["type"] for e in fanned] == ["created"]
+        assert fanned[0]["task"]["id"] != t.id
+        assert fanned[0]["task"]["text"] == f"hola @{handle}"
+
+    with mock.patch.object(events, "broker", broker):
+        asyncio.run(run())
+
+
+def test_import_sends_single_resync(db, test_user):
+    broker = events.TaskEventBroker()
+
+    async def run():
+        sub = broker.subscribe(test_user.id)
+        raw = io.BytesIO(b"Text,Status\nuno,pending\ndos,done\n")
+        assert importer.import_tasks(db, test_user.id, raw, "csv", batch_size=1).imported == 2
+        await asyncio.sleep(0)
+        assert [e["type"] for e in _drain(sub)] == [events.RESYNC]
+
+    with mock.patch.object(events, "broker", broker):
+        asyncio.run(run())
+
+
+def test_format_sse():
+    frame = events.format_sse({"id": 3, "type": "deleted", "task_id": 9})
+    lines = frame.split("\n")
+    assert lines[:2] == ["id: 3", "event: task"]
+    assert json.loads(lines[2][len("data: "):]) == {"id": 3, "type": "deleted", "task_id": 9}
+    assert frame.endswith("\n\n")
+
+
+def test_stream_endpoint_releases_db_and_forwards_events(test_user):
+    broker = events.TaskEventBroker()
+    db = mock.Mock()
+    request = SimpleNamespace(is_disconnected=mock.AsyncMock(return_value=True))
+
+    async def run():
+        resp = await main.task_stream(request, db=db, current_user=test_user)
+        assert resp.media_type == "text/event-stream"
+        assert resp.headers["cache-control"] == "no-cache"
+        db.close.assert_called_once()  # no retiene conexión del pool
+
+        body = resp.body_iterator
+        assert (await body.__anext__()).startswith("retry:")
+        broker.publish(test_user.id, {"type": events.DELETED, "task_id": 5})
+        frame = await body.__anext__()
+        assert '"task_id":5' in frame
+        await body.aclose()
+        assert not broker.has_subscribers(test_user.id)
+
+    with mock.patch.object(events, "broker", broker):
+        asyncio.run(run())
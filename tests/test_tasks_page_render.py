@@ -0,0 +1,60 @@
+# test_tasks_page_render.py
+import json
+import re
+
+from tasklist_app import main, utils
+
+
+def _get_page(client, user):
+    client.cookies.set("access_token", utils.create_access_token({"sub": user.email}))
+    r = client.get("/app/tasks")
+    assert r.status_code == 200, r.text
+    return r.text
+
+
+def test_first_page_is_server_rendered(client, api_create, test_user):
+    a = api_create("primera <b>#html</b>")
+    b = api_create("segunda", status="done")
+    html = _get_page(client, test_user)
+
+    body = html.split('id="list-body">', 1)[1].split("</div>\n    </div>", 1)[0]
+    assert body.index(f"#{b['id']}") < body.index(f"#{a['id']}")  # más recientes primero
+    assert "primera &lt;b&gt;#html&lt;/b&gt;" in body  # escapado por Jinja
+    assert 'class="status-pill status-done"' in body
+
+    initial = json.loads(re.search(r"const INITIAL_TASKS = (.*);", html).group(1))
+    assert [t["id"] for t in initial] == [b["id"], a["id"]]
+
+
+def test_empty_page_and_redirect(client, test_user):
+    assert "No hay tareas" in _get_page(client, test_user)
+    client.cookies.clear()
+    assert client.get("/app/tasks", follow_redirects=False).status_code == 302
+
+
+def test_row_fragments_cached_by_updated_at(client, api_create, test_user, monkeypatch):
+    t = api_create("cacheable")
+    main.row_fragments.clear()
+    renders = []
+    real_get_template = main.templates.get_template
+
+    def counting_get_template(name, *args, **kwargs):
+        tpl = real_get_template(name, *args, **kwargs)
+        if name != "partials/task_row.html":
+            return tpl
+        real_render = tpl.render
+
+        class _Spy:
+            def render(self, **kw):
+                renders.append(kw["t"].id)
+                return real_render(**kw)
+        return _Spy()
+
+    monkeypatch.setattr(main.templates, "get_template", counting_get_template)
+    _get_page(client, test_user)
+    _get_page(client, test_user)
+    assert renders == [t["id"]]  # la segunda visita reutiliza el fragmento
+
+    assert client.patch(f"/tasks/{t['id']}", json={"text": "editada"}).status_code == 200
+    assert "editada" in _get_page(client, test_user)  # nuevo updated_at: se vuelve a renderizar
+    assert renders == [t["id"], t["id"]]
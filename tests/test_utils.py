@@ -7,3 +7,30 @@ def test_extract_tags_all():
     assert "#alldone" in tags
     assert "somebody@gmail.com" in tags
     assert "https://www.google.com" in tags
+
+
+def test_scan_tokens_single_pass_typed_and_deduplicated():
+    from tasklist_app.utils import scan_tokens, mention_handles, EMAIL, HASHTAG, MENTION, URL
+
+    text = "#a @Bob. ver https://ex.com/x#frag?u=@eve y ana@site.com #a @bob"
+    tokens = scan_tokens(text)
+    assert [(t.kind, t.value) for t in tokens] == [
+        (HASHTAG, "#a"),
+        (MENTION, "@Bob."),
+        (URL, "https://ex.com/x#frag?u=@eve"),
+        (EMAIL, "ana@site.com"),
+        (MENTION, "@bob"),
+    ]
+    assert tokens[1].start == text.index("@Bob.")
+    # Ni el dominio del email ni lo que va dentro de la URL cuentan como menciones
+    assert mention_handles(tokens) == ["bob"]
+    # Orden almacenado: hashtags, menciones, URLs, emails
+    assert extract_tags(text) == ["#a", "@Bob.", "@bob", "https://ex.com/x#frag?u=@eve", "ana@site.com"]
+
+
+def test_tokens_inside_urls_are_not_stored_as_tags():
+    # Cambio frente al escáner anterior: #frag, @usuario y emails dentro de una URL ya no son etiquetas
+    text = "ver https://ex.com/#frag y https://ex.com/?u=@eve&to=ana@site.com #real"
+    assert extract_tags(text) == ["#real", "https://ex.com/#frag", "https://ex.com/?u=@eve&to=ana@site.com"]
+    # fuera de una URL se siguen guardando
+    assert extract_tags("#frag @eve ana@site.com") == ["#frag", "@eve", "ana@site.com"]
@@ -0,0 +1,58 @@
+# test_write_round_trips.py
+import uuid
+
+import pytest
+
+from tasklist_app import crud, models, schemas
+from tasklist_app.instrumentation import assert_max_queries
+
+
+def test_register_is_a_single_insert(client):
+    email = f"rt_{uuid.uuid4().hex[:8]}@example.com"
+    with assert_max_queries(1, "POST /auth/register") as stats:
+        r = client.post("/auth/register", json={"email": email, "password": "12345678"})
+    assert r.status_code == 201, r.text
+    assert r.json()["email"] == email and r.json()["id"]
+    assert "RETURNING" in stats.statements[0]
+
+    # El duplicado lo detecta el índice único, sin SELECT previo
+    with assert_max_queries(1, "registro duplicado"):
+        r = client.post("/auth/register", json={"email": email, "password": "12345678"})
+    assert r.status_code == 400
+
+
+def test_task_writes_are_one_round_trip_each(client):
+    with assert_max_queries(1, "POST /tasks"):
+        r = client.post("/tasks", json={"text": "ida y vuelta #rt", "status": "pending"})
+    assert r.status_code == 201, r.text
+    task = r.json()
+    assert task["tags"] == ["#rt"] and task["created_at"] and task["updated_at"]
+
+    with assert_max_queries(1, "PUT /tasks/{id}"):
+        r = client.put(f"/tasks/{task['id']}", json={"text": "editada #otra", "status": "done"})
+    assert r.status_code == 200, r.text
+    assert r.json()["tags"] == ["#otra"] and r.json()["status"] == "done"
+
+    with assert_max_queries(1, "DELETE /tasks/{id}"):
+        assert client.delete(f"/tasks/{task['id']}").status_code == 204
+    with assert_max_queries(1, "PUT inexistente"):
+        assert client.put(f"/tasks/{task['id']}", json={"text": "x", "status": "done"}).status_code == 404
+    with assert_max_queries(1, "DELETE inexistente"):
+        assert client.delete(f"/tasks/{task['id']}").status_code == 404
+
+
+@pytest.fixture()
+def no_returning(db, monkeypatch):
+    dialect = db.get_bind().dialect
+    for kind in ("insert", "update", "delete"):
+        monkeypatch.setattr(dialect, f"{kind}_returning", False)
+
+
+def test_fallback_without_returning(db, test_user, no_returning):
+    obj = crud.create_task(db, schemas.TaskCreate(text="sin returning #fb"), test_user.id)
+    assert obj.id and obj.tags == ["#fb"]
+    updated = crud.update_task(db, obj.id, schemas.TaskUpdate(text="cambiada", status="done"))
+    assert updated.status == "done" and updated.tags == []
+    assert crud.delete_task(db, obj.id) is True
+    assert crud.delete_task(db, obj.id) is False
+    assert db.get(models.Task, obj.id) is None